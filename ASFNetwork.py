@@ -11,29 +11,31 @@ import random,itertools
 from copy import deepcopy
 from numpy import array, zeros, std, mean, sqrt
 
-from NetworkBase import NetworkBase
+from NetworkBase import NetworkBase, NetworkBase_importNetworkx
 from Agent import AgentFactory
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
-
 class ASFNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
     # number of coaches maximally present in the simulation, the    #
     # number of baseline nodes of the graph (m_0), and number       #
     # of edges to be added at each step of the initialization (m)   #
-    # produces an ASF network                                       #
+    # produces an ASF network. Unless linear is False, the graph is #
+    # generated in O(nodeCount * m) without going through networkx, #
+    # from seed, and if given a TopologyCache (cache) along with a  #
+    # seed, is loaded from it when already generated before. The    #
+    # initial states of the agents are drawn from rng (a numpy      #
+    # Generator) if given. Pass in False for createAgents to only   #
+    # generate the graph (the networkx generator, used unless       #
+    # linear, always needs the agents)                              #
     #################################################################
-    def __init__(self, nodeCount, maxCoachCount, m_0 = 4, m = 3):
+    def __init__(self, nodeCount, maxCoachCount, m_0 = 4, m = 3, \
+            linear = True, seed = None, cache = None, rng = None, \
+            createAgents = True):
         if not self.ASFNetwork_verifyNetwork(nodeCount, maxCoachCount,\
-                m_0, m):
+                m_0, m, linear):
             return None
 
         self.nodeCount = nodeCount
@@ -41,22 +43,31 @@ class ASFNetwork:
 
         self.m_0 = m_0
         self.m = m
+        self.seed = seed
+        self.cache = cache
+        self.rng = rng
         self.agentFactory = AgentFactory
 
         self.Agents = {}
         self.networkBase = NetworkBase("ASFNetwork", maxCoachCount)
         
-        self.ASFNetwork_createAgents()
+        if linear:
+            self.ASFNetwork_createAgentsLinear(createAgents)
+        else:
+            self.ASFNetwork_createAgents()
+            self.networkBase.NetworkBase_releaseGraph()
+            self.G = None
 
         # Sets the network base to have the agents just created and
-        # the graph just generated
+        # the graph just generated (kept only as adjacency arrays)
         self.networkBase.NetworkBase_setAgents(self.Agents)
     
     #################################################################
     # Ensures that the given parameters for defining an SW network  #
     # are appropriate                                               # 
     #################################################################
-    def ASFNetwork_verifyNetwork(self, nodeCount, maxCoachCount, m_0, m):
+    def ASFNetwork_verifyNetwork(self, nodeCount, maxCoachCount, m_0, m,
+            linear = False):
         if not isinstance(nodeCount, int):
             sys.stderr.write("Node count must be of type int")
             return False
@@ -74,7 +85,12 @@ class ASFNetwork:
                 type int")
             return False
 
-        if m_0 > 10:
+        if m_0 < 1 or m_0 > nodeCount:
+            sys.stderr.write("Baseline node count (m_0) must be " +
+                "between 1 and the node count")
+            return False
+
+        if m_0 > 10 and not linear:
             sys.stderr.write("Baseline node count (m_0) must < 10")
             return False
 
@@ -83,7 +99,12 @@ class ASFNetwork:
                 type int")
             return False
 
-        if m > 10:
+        if m < 1:
+            sys.stderr.write("Incremental edge count (m) must be at " +
+                "least 1")
+            return False
+
+        if m > 10 and not linear:
             sys.stderr.write("Incremental edge count (m) must < 10")
             return False
 
@@ -96,6 +117,7 @@ class ASFNetwork:
         # Creates baseline nodes (from m_0 specified)
         totalConnect = self.m_0
 
+        nx = NetworkBase_importNetworkx()
         self.G = nx.Graph()
         self.networkBase.NetworkBase_setGraph(self.G)
         
@@ -118,4 +140,66 @@ class ASFNetwork:
                 AgentFactory_createAgent(self, i)
             self.Agents[curAgent.agentID] = curAgent
             self.G.add_node(curAgent.agentID)
-            curAgent.Agent_preferentiallyAttach(self, self.m)
\ No newline at end of file
+            curAgent.Agent_preferentiallyAttach(self, self.m)
+
+    #################################################################
+    # Creates the agents present in the simulation (unless          #
+    # createAgents is False) and generates the ASF graph straight   #
+    # into the adjacency arrays of the network base (the networkx   #
+    # graph is only built if requested)                             #
+    #################################################################
+    def ASFNetwork_createAgentsLinear(self, createAgents = True):
+        if createAgents:
+            agents = self.agentFactory.AgentFactory_createAgents(self, \
+                range(0, self.nodeCount), self.rng)
+            for curAgent in agents:
+                self.Agents[curAgent.agentID] = curAgent
+
+        if self.cache is not None and self.seed is not None:
+            edges = self.cache.TopologyCache_getEdges("ASF", \
+                self.nodeCount, (self.m_0, self.m), self.seed, \
+                self.ASFNetwork_generateEdges)
+        else:
+            edges = self.ASFNetwork_generateEdges()
+        self.networkBase.NetworkBase_setEdges(range(0, self.nodeCount), \
+            edges)
+
+    #################################################################
+    # Generates the edges of the ASF graph: the baseline nodes are  #
+    # fully connected (with self-loops, as ASFNetwork_createAgents) #
+    # and each new node attaches to m distinct nodes picked with    #
+    # probability proportional to their degree. Degrees are tracked #
+    # through a list holding each node once per edge it has, so a   #
+    # uniform pick from it is a degree-weighted pick. Picks are     #
+    # drawn from seed if set, else from the global random state     #
+    #################################################################
+    def ASFNetwork_generateEdges(self):
+        totalConnect = self.m_0
+        edges = []
+        endpoints = []
+
+        for i in range(0, totalConnect):
+            for j in range(i, totalConnect):
+                edges.append((i, j))
+
+            # Matches len(G.edges(i)) in Agent_preferentiallyAttach,
+            # which counts a self-loop once
+            endpoints.extend([i] * totalConnect)
+
+        rand = random.random
+        if self.seed is not None:
+            rand = random.Random(self.seed).random
+        for i in range(totalConnect, self.nodeCount):
+            # Every existing node has at least one edge, so there are
+            # always i candidates to pick from
+            targetCount = min(self.m, i)
+            endpointCount = len(endpoints)
+            targets = set()
+            while len(targets) < targetCount:
+                targets.add(endpoints[int(rand() * endpointCount)])
+
+            for target in targets:
+                edges.append((i, target))
+            endpoints.extend(targets)
+            endpoints.extend([i] * targetCount)
+        return edges
@@ -20,20 +20,14 @@ TO CHANGE
 import sys
 import os
 import random
+import itertools
 import numpy as np
 
 from Coach import *
 from NetworkBase import *
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
-
 #####################################################################
 # Used to create several agents to produce the agents en masse for  #
 # the setup of the simulation                                       #
@@ -65,22 +59,96 @@ class AgentFactory(object):
             medLevel, highLevel, oldLowLevel, oldMedLevel, oldHighLevel)
         return agent
 
+    #################################################################
+    # Creates the agents with the given IDs in bulk, drawing their  #
+    # SE and coach assignments as vectors (with the distributions   #
+    # of AgentFactory_createAgent, coaches handed out in order until#
+    # maxCoachCount) and validating them once rather than per agent.#
+    # Draws come from rng (a numpy Generator) if given, else from   #
+    # the global numpy random state. Returns the agents in the      #
+    # order of agentIDs                                             #
+    #################################################################
+    def AgentFactory_createAgents(network, agentIDs, rng = None):
+        if rng is None:
+            rng = np.random
+        agentIDs = list(agentIDs)
+        if not all(isinstance(agentID, int) for agentID in agentIDs):
+            sys.stderr.write("Agent ID must be of type int")
+            return None
+
+        count = len(agentIDs)
+        oldSE = rng.normal(.5, .15, count)
+        SE = np.clip(rng.normal(.5, .15, count), 0.0, 1.0)
+
+        networkBase = network.networkBase
+        freeCoaches = networkBase.maxCoachCount - networkBase.coachCount
+        hasCoach = rng.random(count) >= .5
+        hasCoach &= np.cumsum(hasCoach) <= freeCoaches
+
+        # Columns in the order of the arguments of Agent
+        columns = zip(SE.tolist(), itertools.repeat(network, count),
+            agentIDs, hasCoach.astype(int).tolist(),
+            (10.0 * SE).astype(int).tolist(),
+            (10.0 * SE ** 2).astype(int).tolist(),
+            (10.0 * SE ** 3).astype(int).tolist(),
+            (10.0 * oldSE).astype(int).tolist(),
+            (10.0 * oldSE ** 2).astype(int).tolist(),
+            (10.0 * oldSE ** 3).astype(int).tolist())
+        return [Agent(*column, verify = False) for column in columns]
+
+    #################################################################
+    # Draws the initial states of agents as arrays of the given     #
+    # shape (i.e. (R, nodeCount) for R replicates), following the   #
+    # same distributions as AgentFactory_createAgent (drawn from rng#
+    # if given, else from the global numpy random state). Returns a #
+    # dict of arrays keyed as the state of an ArrayEngine           #
+    #################################################################
+    def AgentFactory_drawInitialStates(maxCoachCount, shape, rng = None):
+        if rng is None:
+            rng = np.random
+        oldSE = rng.normal(.5, .15, shape)
+        SE = np.clip(rng.normal(.5, .15, shape), 0.0, 1.0)
+
+        # Coaches are handed out in agent order until none are left
+        hasCoach = rng.random(shape) >= .5
+        hasCoach &= np.cumsum(hasCoach, axis=-1) <= maxCoachCount
+
+        return {
+            'SE': SE,
+            'oldSE': np.zeros(shape),
+            'hasCoach': hasCoach,
+            'lowLevel': (10.0 * SE).astype(np.int64),
+            'medLevel': (10.0 * SE ** 2).astype(np.int64),
+            'highLevel': (10.0 * SE ** 3).astype(np.int64),
+            'oldLowLevel': (10.0 * oldSE).astype(np.int64),
+            'oldMedLevel': (10.0 * oldSE ** 2).astype(np.int64),
+            'oldHighLevel': (10.0 * oldSE ** 3).astype(np.int64)
+        }
+
 #####################################################################
 # Agents are the constituent objects that comprise the simulation:  #
 # model the individuals (people) involved in the exercise/housing   #
 #####################################################################
 class Agent:
+    # Agents hold a fixed set of attributes: keeping them in slots
+    # rather than a per-agent __dict__ cuts their memory use
+    __slots__ = ['SE', 'oldSE', 'toUpdateSE', 'hasCoach', 'lowLevel', \
+        'oldLowLevel', 'medLevel', 'oldMedLevel', 'highLevel', \
+        'oldHighLevel', 'agentID', 'network']
 
     #################################################################
     # Given the SE (self-efficacy), a boolean determining whether or#
     # not an agent has a wellness coach, and the levels of exercise #
-    # (for low, medium, and high), creates an agent with properties #
+    # (for low, medium, and high), creates an agent with properties.#
+    # Pass in False for verify if the parameters were already       #
+    # checked (as done by AgentFactory_createAgents)                #
     #################################################################
     def __init__(self, SE, network, agentID, hasCoach, lowLevel, \
-            medLevel, highLevel, oldLowLevel, oldMedLevel, oldHighLevel):
-        if not self.Agent_verifyAgent(SE, hasCoach, lowLevel, \
-            medLevel, highLevel, agentID, oldLowLevel, oldMedLevel, \
-            oldHighLevel):
+            medLevel, highLevel, oldLowLevel, oldMedLevel, \
+            oldHighLevel, verify = True):
+        if verify and not self.Agent_verifyAgent(SE, hasCoach, \
+            lowLevel, medLevel, highLevel, agentID, oldLowLevel, \
+            oldMedLevel, oldHighLevel):
             return None
 
         self.SE = SE
@@ -327,7 +395,6 @@ class Agent:
         # Determines the number of hours expected to have exercised
         # in the two-week span and finds corresponding pts for #hrs
         curPt = self.Agent_getOldExercisePts()
-        self.Agent_updateExerciseLevels()
 
         zScore = (curPt - meanOld)/stdOld
         self.Agent_zScoreUpdate(zScore, pastImpact)
@@ -346,14 +413,10 @@ class Agent:
         self.Agent_zScoreUpdate(zScore, socialImpact)
 
     #################################################################
-    # From the proposal, "functions will be applied in the          # 
-    # following "order: decay, coaching, past-exercise, social      #
-    # network." Given an agent and current time (in ticks), new SE  #
-    # is determined. Uses the impact parameters as methods of doing #
-    # sensitivity analysis: default values provided as well         #
+    # Starts the update of the SE of the agent over a time step,    #
+    # before the decay, coaching, past and social updates are made  #
     #################################################################
-    def Agent_updateSE(self, timeImpact, coachImpact, pastImpact, \
-            socialImpact, time):
+    def Agent_startUpdate(self):
         self.oldSE = self.SE
 
         # toUpdateSE will be used for all the calculations and then
@@ -361,22 +424,18 @@ class Agent:
         # used to update SE: simulates "simultaneous change"
         self.toUpdateSE = self.SE
 
+    #################################################################
+    # From the proposal, "functions will be applied in the          # 
+    # following "order: decay, coaching, past-exercise, social      #
+    # network." Given an agent and current time (in ticks), new SE  #
+    # is determined. Uses the impact parameters as methods of doing #
+    # sensitivity analysis: default values provided as well         #
+    #################################################################
+    def Agent_updateSE(self, timeImpact, coachImpact, pastImpact, \
+            socialImpact, time):
+        self.Agent_startUpdate()
         self.Agent_timeUpdate(time, timeImpact)
         self.Agent_coachUpdate(coachImpact)
         self.Agent_pastUpdate(pastImpact)
         self.Agent_socialUpdate(socialImpact)
-
-    #################################################################
-    # Simulates change in the agent over a single time step given   #
-    # the current time (in ticks) of simulation: includes updating  #
-    # coach presence/retention and SE. Each of the impact parameters#
-    # look at the different parts of the model to determine the     #
-    # sensitivity of the final result to its variance               #
-    #################################################################
-    def Agent_timeStep(self, timeImpact, coachImpact, pastImpact, \
-            socialImpact, time):
-        Coach_acquireCoachWithProb(self)
-        Coach_keepCoachWithProb(self)
-        self.Agent_updateSE(timeImpact, coachImpact, pastImpact, \
-            socialImpact, time)
-        self.Agent_normalizeSE()
\ No newline at end of file
+        self.Agent_updateExerciseLevels()
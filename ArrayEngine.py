@@ -0,0 +1,287 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: ArrayEngine.py                                              #
+# Description: Contains the struct-of-arrays engine used to advance #
+# the whole population one tick at a time with NumPy operations in  #
+# place of the per-agent updates performed by the Agent objects     #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+
+#####################################################################
+# Given the sum, sum of squares and count of a set of exercise      #
+# points, returns their mean and (population) standard deviation.   #
+# Exercise points are integers, so the sums are exact and the stats #
+# do not depend on the order in which the points were added up      #
+#####################################################################
+def ArrayEngine_meanStdFromSums(total, totalSq, count):
+    popMean = total / count
+    popVar = np.maximum(totalSq / count - popMean ** 2, 0.0)
+    return popMean, np.sqrt(popVar)
+
+#####################################################################
+# Returns the mean and standard deviation of the exercise points    #
+# along the last axis (i.e. over the agents of each population)     #
+#####################################################################
+def ArrayEngine_getMeanStd(exercisePts):
+    exercisePts = np.asarray(exercisePts, dtype=np.int64)
+    total = exercisePts.sum(axis=-1)
+    totalSq = (exercisePts * exercisePts).sum(axis=-1)
+    return ArrayEngine_meanStdFromSums(total, totalSq, \
+        exercisePts.shape[-1])
+
+#####################################################################
+# Names of the per-agent arrays making up the state of the engine   #
+#####################################################################
+ArrayEngine_stateNames = ['SE', 'oldSE', 'hasCoach', 'lowLevel', \
+    'medLevel', 'highLevel', 'oldLowLevel', 'oldMedLevel', \
+    'oldHighLevel']
+
+class ArrayEngine:
+    #################################################################
+    # Given a network base (with its agents and graph already set), #
+    # copies the state of every agent into contiguous arrays. The   #
+    # order of the arrays follows the node IDs of the adjacency     #
+    # arrays of the network base. If given states (a dict of arrays #
+    # keyed by ArrayEngine_stateNames), uses those instead, which   #
+    # may hold several replicates as rows of shape (R, nodeCount)   #
+    #################################################################
+    def __init__(self, networkBase, states = None):
+        self.networkBase = networkBase
+        if states is None:
+            self.ArrayEngine_loadAgents()
+        else:
+            self.ArrayEngine_setStates(states)
+
+    #################################################################
+    # Copies SE, oldSE, the exercise levels and the coach flags of  #
+    # the agents into the arrays used by the engine                 #
+    #################################################################
+    def ArrayEngine_loadAgents(self):
+        Agents = self.networkBase.Agents
+        self.agentIDs = self.networkBase.NetworkBase_getAdjacency()[0]
+        agents = [Agents[agentID] for agentID in self.agentIDs.tolist()]
+
+        self.SE = np.array([agent.SE for agent in agents], dtype=float)
+        self.oldSE = np.array([agent.oldSE for agent in agents], \
+            dtype=float)
+        self.hasCoach = np.array([agent.hasCoach for agent in agents], \
+            dtype=bool)
+
+        self.lowLevel = np.array([agent.lowLevel for agent in agents], \
+            dtype=np.int64)
+        self.medLevel = np.array([agent.medLevel for agent in agents], \
+            dtype=np.int64)
+        self.highLevel = np.array([agent.highLevel for agent in agents],\
+            dtype=np.int64)
+
+        self.oldLowLevel = np.array([agent.oldLowLevel for agent in \
+            agents], dtype=np.int64)
+        self.oldMedLevel = np.array([agent.oldMedLevel for agent in \
+            agents], dtype=np.int64)
+        self.oldHighLevel = np.array([agent.oldHighLevel for agent in \
+            agents], dtype=np.int64)
+
+    #################################################################
+    # Given a dict of arrays keyed by ArrayEngine_stateNames, sets  #
+    # them as the state of the engine                               #
+    #################################################################
+    def ArrayEngine_setStates(self, states):
+        self.agentIDs = self.networkBase.NetworkBase_getAdjacency()[0]
+        for name in ArrayEngine_stateNames:
+            setattr(self, name, np.array(states[name]))
+
+    #################################################################
+    # Returns a copy of the state of the engine, as a dict of       #
+    # arrays keyed by ArrayEngine_stateNames                        #
+    #################################################################
+    def ArrayEngine_getStates(self):
+        return dict((name, getattr(self, name).copy()) for name in \
+            ArrayEngine_stateNames)
+
+    #################################################################
+    # Returns the final results of each replicate in the form       #
+    # [[MeanExercise, MeanSE], ...] (a single pair if the engine    #
+    # holds only one population)                                    #
+    #################################################################
+    def ArrayEngine_getPopResults(self):
+        meanEx = self.ArrayEngine_getExercisePts().mean(axis=-1)
+        meanSE = self.SE.mean(axis=-1)
+        return np.stack((meanEx, meanSE), axis=-1).tolist()
+
+    #################################################################
+    # Returns the mean exercise points of the neighbors of each     #
+    # agent. Replicates with topologies of their own are laid out   #
+    # as one disjoint union in the network base, so their points    #
+    # are flattened before going through the kernel                 #
+    #################################################################
+    def ArrayEngine_getMeanLocalExercise(self, exercisePts, meanPop):
+        networkBase = self.networkBase
+        if exercisePts.ndim > 1 and \
+                len(self.agentIDs) == exercisePts.size:
+            meanLocal = networkBase.NetworkBase_getMeanLocalExercises(
+                exercisePts.reshape(-1),
+                np.repeat(meanPop, exercisePts.shape[-1]))
+            return meanLocal.reshape(exercisePts.shape)
+        return networkBase.NetworkBase_getMeanLocalExercises(
+            exercisePts, meanPop[..., None])
+
+    #################################################################
+    # Writes the arrays back onto the Agent objects of the network  #
+    # base, along with the resulting count of coaches               #
+    #################################################################
+    def ArrayEngine_storeAgents(self):
+        Agents = self.networkBase.Agents
+        for i, agentID in enumerate(self.agentIDs.tolist()):
+            agent = Agents[agentID]
+            agent.SE = float(self.SE[i])
+            agent.oldSE = float(self.oldSE[i])
+            agent.toUpdateSE = agent.SE
+            agent.hasCoach = int(self.hasCoach[i])
+
+            agent.lowLevel = int(self.lowLevel[i])
+            agent.medLevel = int(self.medLevel[i])
+            agent.highLevel = int(self.highLevel[i])
+
+            agent.oldLowLevel = int(self.oldLowLevel[i])
+            agent.oldMedLevel = int(self.oldMedLevel[i])
+            agent.oldHighLevel = int(self.oldHighLevel[i])
+        self.networkBase.coachCount = int(self.hasCoach.sum())
+
+    #################################################################
+    # Returns the exercise points for every agent (2 pts/hr low, 3  #
+    # pts/hr medium, 5 pts/hr high), for the old levels if isOld    #
+    #################################################################
+    def ArrayEngine_getExercisePts(self, isOld = False):
+        if isOld:
+            return 2 * self.oldLowLevel + 3 * self.oldMedLevel \
+                + 5 * self.oldHighLevel
+        return 2 * self.lowLevel + 3 * self.medLevel \
+            + 5 * self.highLevel
+
+    #################################################################
+    # Releases and acquires coaches for the whole population at     #
+    # once, with the allocation policy of the network base (see     #
+    # NetworkBase_allocateCoaches)                                  #
+    #################################################################
+    def ArrayEngine_updateCoaches(self):
+        self.hasCoach = self.networkBase.NetworkBase_allocateCoaches(
+            self.hasCoach, self.SE, self.oldSE)
+
+    #################################################################
+    # Given z-scores for each agent, scales the SE to be updated up #
+    # or down by const as done in Agent_zScoreUpdate                #
+    #################################################################
+    def ArrayEngine_zScoreUpdate(self, toUpdateSE, zScore, const):
+        scale = np.where(zScore > .25, 1 + const, 1 - const)
+        scale = np.where((zScore < .25) & (zScore > -.25), 1.0, scale)
+        return toUpdateSE * scale
+
+    #################################################################
+    # Given the current time, applies the updates of a tick that    #
+    # depend only on each agent itself (time decay, doubled for     #
+    # those lacking a coach, and coaching), keeping the SE at the   #
+    # start of the tick in oldSE. Returns the SE to be updated      #
+    #################################################################
+    def ArrayEngine_selfUpdate(self, time, timeImpact, coachImpact):
+        profiler = self.networkBase.profiler
+        self.oldSE = self.SE
+        toUpdateSE = self.SE.copy()
+
+        # Time decay (doubled for those lacking a coach)
+        profiler.Profiler_start('decay')
+        decay = np.where(self.hasCoach, timeImpact, 2.0 * timeImpact)
+        toUpdateSE = toUpdateSE * (1 + time) ** (-decay)
+        profiler.Profiler_stop('decay')
+
+        # Coaching
+        profiler.Profiler_start('coaching')
+        toUpdateSE = np.where(self.hasCoach & (toUpdateSE >= .5),
+            toUpdateSE + (1 - toUpdateSE) * coachImpact,
+            np.where(self.hasCoach, toUpdateSE * (1 + coachImpact),
+            toUpdateSE))
+        profiler.Profiler_stop('coaching')
+        return toUpdateSE
+
+    #################################################################
+    # Given the SE to be updated, the old exercise points of the    #
+    # agents, the (mean, std) of the old and current exercise of    #
+    # the population and the mean exercise of the neighbors of each #
+    # agent, applies the past and social updates of a tick and      #
+    # returns the SE to be updated                                  #
+    #################################################################
+    def ArrayEngine_peerUpdate(self, toUpdateSE, oldPts, oldStats, \
+            curStats, meanLocal, pastImpact, socialImpact):
+        profiler = self.networkBase.profiler
+        meanOld, stdOld = [np.asarray(stat) for stat in oldStats]
+        meanPop, stdPop = [np.asarray(stat) for stat in curStats]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Past exercise, relative to the population in the past
+            profiler.Profiler_start('past')
+            zScore = (oldPts - meanOld[..., None]) / stdOld[..., None]
+            toUpdateSE = self.ArrayEngine_zScoreUpdate(toUpdateSE,
+                zScore, pastImpact)
+            profiler.Profiler_stop('past')
+
+            # Social network, relative to the population currently
+            profiler.Profiler_start('social')
+            zScore = (meanLocal - meanPop[..., None]) / stdPop[..., None]
+            toUpdateSE = self.ArrayEngine_zScoreUpdate(toUpdateSE,
+                zScore, socialImpact)
+            profiler.Profiler_stop('social')
+        return toUpdateSE
+
+    #################################################################
+    # Given the SE to be updated, recomputes the exercise levels    #
+    # from the SE at the start of the tick and sets the new SE      #
+    #################################################################
+    def ArrayEngine_levelUpdate(self, toUpdateSE):
+        # Ex_t = floor(10.0 * SE^t), where t = 1 is low, 2 is medium,
+        # and 3 is high
+        profiler = self.networkBase.profiler
+        profiler.Profiler_start('levels')
+        self.oldLowLevel = self.lowLevel
+        self.lowLevel = (10.0 * self.SE).astype(np.int64)
+        self.oldMedLevel = self.medLevel
+        self.medLevel = (10.0 * self.SE ** 2).astype(np.int64)
+        self.oldHighLevel = self.highLevel
+        self.highLevel = (10.0 * self.SE ** 3).astype(np.int64)
+        profiler.Profiler_stop('levels')
+
+        self.SE = np.minimum(toUpdateSE, 1.0)
+
+    #################################################################
+    # Simulates updating all agents over a single time step, with   #
+    # the same decay, coaching, past, social and normalization      #
+    # updates as the agents get in NetworkBase_updateAgents. All    #
+    # agents read the state at the start of the tick, so the update #
+    # is fully synchronous                                          #
+    #################################################################
+    def ArrayEngine_timeStep(self, time, timeImpact = .005,
+            coachImpact = .225, pastImpact = .025,
+            socialImpact = .015):
+        profiler = self.networkBase.profiler
+        profiler.Profiler_start('coaches')
+        self.ArrayEngine_updateCoaches()
+        profiler.Profiler_stop('coaches')
+
+        toUpdateSE = self.ArrayEngine_selfUpdate(time, timeImpact, \
+            coachImpact)
+
+        profiler.Profiler_start('popStats')
+        oldPts = self.ArrayEngine_getExercisePts(True)
+        curPts = self.ArrayEngine_getExercisePts()
+        oldStats = ArrayEngine_getMeanStd(oldPts)
+        curStats = ArrayEngine_getMeanStd(curPts)
+        profiler.Profiler_stop('popStats')
+
+        profiler.Profiler_start('neighbors')
+        meanLocal = self.ArrayEngine_getMeanLocalExercise(curPts,
+            curStats[0])
+        profiler.Profiler_stop('neighbors')
+
+        toUpdateSE = self.ArrayEngine_peerUpdate(toUpdateSE, oldPts, \
+            oldStats, curStats, meanLocal, pastImpact, socialImpact)
+        self.ArrayEngine_levelUpdate(toUpdateSE)
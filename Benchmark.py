@@ -0,0 +1,278 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: Benchmark.py                                                #
+# Description: Measures how the stages of the simulation (network   #
+# generation, agent construction, the updates, snapshot output and  #
+# plotting) scale with the population for each network type, and    #
+# compares the results against a saved baseline                     #
+#####################################################################
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import shutil
+import tempfile
+
+#####################################################################
+# Network types and population sizes benchmarked by default, the    #
+# largest population for which the network is still plotted (the    #
+# layout and the drawing grow far faster than the rest) and the     #
+# seconds each case may run before it is reported as timed out      #
+#####################################################################
+Benchmark_networkTypes = ['ER', 'SW', 'ASF']
+Benchmark_sizes = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+Benchmark_maxPlotSize = 10 ** 4
+Benchmark_timeout = 1800
+
+#####################################################################
+# Given a function, calls it repeatedly until it has been called    #
+# minCalls times and has run for at least minSeconds (or maxCalls   #
+# calls are made), returning the number of calls and the time taken #
+#####################################################################
+def Benchmark_repeat(function, minCalls = 1, minSeconds = 1.0, \
+        maxCalls = 26):
+    calls = 0
+    start = time.perf_counter()
+    while calls < maxCalls:
+        function(calls)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if calls >= minCalls and elapsed >= minSeconds:
+            break
+    return {'calls': calls, 'seconds': elapsed, \
+        'perSecond': calls / elapsed if elapsed > 0 else None}
+
+#####################################################################
+# Given a network type and a population size, times each stage of   #
+# the simulation in this process (run in a fresh process by         #
+# Benchmark_runCase) and returns a dict of the timings by stage     #
+#####################################################################
+def Benchmark_measureCase(networkType, numAgents, minSeconds = 1.0):
+    import numpy as np
+    from SESimulation import SEModel
+    from Agent import AgentFactory
+    from ArrayEngine import ArrayEngine
+    from SnapshotWriter import SnapshotWriter
+    from NetworkBase import NetworkBase_importNetworkx
+
+    stages = {}
+    model = SEModel(networkType=networkType, timeSpan=10, \
+        numAgents=numAgents, numCoaches=numAgents // 10, seed=0)
+    network = model.network
+    networkBase = network.networkBase
+
+    # Network generation alone (the edges of the graph, from a new
+    # seed each call), after a first call so that one-off imports
+    # (i.e. of networkx) are not timed
+    generateEdges = getattr(network, "{}Network_generateEdges"\
+        .format(networkType))
+    generateEdges()
+    def generate(call):
+        network.seed = call + 1
+        generateEdges()
+    stages['network'] = Benchmark_repeat(generate, 1, minSeconds, 5)
+    network.seed = 0
+
+    # Agent construction alone, restoring the coach count after
+    coachCount = networkBase.coachCount
+    rng = np.random.default_rng(0)
+    def createAgents(call):
+        networkBase.coachCount = coachCount
+        AgentFactory.AgentFactory_createAgents(network, \
+            range(0, numAgents), rng)
+    stages['agents'] = Benchmark_repeat(createAgents, 1, minSeconds, 5)
+    networkBase.coachCount = coachCount
+
+    def updateAgents(call):
+        networkBase.NetworkBase_updateAgents(call, model.timeImpact, \
+            model.coachImpact, model.pastImpact, model.socialImpact)
+    stages['updateAgents'] = Benchmark_repeat(updateAgents, 2, \
+        minSeconds)
+
+    # The array engine is built before timing, as it is only built
+    # once per run
+    networkBase.engine = ArrayEngine(networkBase)
+    def updateVectorized(call):
+        networkBase.NetworkBase_updateAgents(call, model.timeImpact, \
+            model.coachImpact, model.pastImpact, model.socialImpact, \
+            True)
+    stages['updateVectorized'] = Benchmark_repeat(updateVectorized, 2, \
+        minSeconds)
+    networkBase.NetworkBase_syncAgents()
+
+    directory = tempfile.mkdtemp()
+    writer = SnapshotWriter(os.path.join(directory, "results.snap"))
+    def snapshot(call):
+        writer.SnapshotWriter_write(call, model.SEModel_getSnapshot())
+    stages['snapshot'] = Benchmark_repeat(snapshot, 2, minSeconds)
+    writer.SnapshotWriter_close()
+
+    if numAgents <= Benchmark_maxPlotSize:
+        nx = NetworkBase_importNetworkx()
+        pos = nx.random_layout(networkBase.NetworkBase_getGraph())
+        def visualize(call):
+            networkBase.NetworkBase_visualizeNetwork(False, call, pos, \
+                outputDir = directory)
+        stages['visualize'] = Benchmark_repeat(visualize, 1, \
+            minSeconds, 5)
+    shutil.rmtree(directory)
+
+    # Peak resident memory of the process (in KB on Linux)
+    peakBytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peakBytes *= 1024
+    return {'stages': stages, 'peakBytes': peakBytes}
+
+#####################################################################
+# Given a network type and a population size, runs the case in a    #
+# fresh process (so that its peak memory is its own) and returns    #
+# its results, or a dict holding the error if it failed or ran past #
+# timeout seconds                                                   #
+#####################################################################
+def Benchmark_runCase(networkType, numAgents, minSeconds = 1.0, \
+        timeout = Benchmark_timeout):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, os.path.join(directory, "Benchmark.py"), \
+        "--case", networkType, str(numAgents), "--min-seconds", \
+        str(minSeconds)]
+    result = {'networkType': networkType, 'numAgents': numAgents}
+    try:
+        output = subprocess.check_output(command, cwd=directory, \
+            timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result['error'] = "timeout"
+        return result
+    except subprocess.CalledProcessError as e:
+        result['error'] = "exit status {}".format(e.returncode)
+        return result
+
+    result.update(json.loads(output.decode().strip().splitlines()[-1]))
+    return result
+
+#####################################################################
+# Given the network types and population sizes, runs every case and #
+# returns the results along with the environment they were run in   #
+#####################################################################
+def Benchmark_run(networkTypes = Benchmark_networkTypes, \
+        sizes = Benchmark_sizes, minSeconds = 1.0, \
+        timeout = Benchmark_timeout):
+    import numpy as np
+    results = []
+    for networkType in networkTypes:
+        for numAgents in sizes:
+            result = Benchmark_runCase(networkType, numAgents, \
+                minSeconds, timeout)
+            Benchmark_printResult(result)
+            results.append(result)
+    return {'python': platform.python_version(), \
+        'numpy': np.__version__, 'machine': platform.machine(), \
+        'results': results}
+
+#####################################################################
+# Given the results of a case, prints a one-line summary of them    #
+# (stages too fast to time are marked as such)                      #
+#####################################################################
+def Benchmark_printResult(result):
+    label = "{} {:>8}".format(result['networkType'], \
+        result['numAgents'])
+    if 'error' in result:
+        print("{}: {}".format(label, result['error']))
+        return
+    rates = ", ".join("{} {}".format(name, "{:.3g}/s".format(\
+        stage['perSecond']) if stage['perSecond'] is not None else \
+        "too fast to time") for name, stage in \
+        sorted(result['stages'].items()))
+    print("{}: {} (peak {:.1f} MB)".format(label, rates, \
+        result['peakBytes'] / 2.0 ** 20))
+
+#####################################################################
+# Given baseline and current benchmark results, returns a list of   #
+# the stages of the cases present in both that are slower than the  #
+# baseline by more than tolerance (as a fraction), along with the   #
+# cases that failed now but not in the baseline. Stages too fast to #
+# time (no rate) in either are skipped                              #
+#####################################################################
+def Benchmark_compare(baseline, current, tolerance = .1):
+    baselineCases = dict(((result['networkType'], \
+        result['numAgents']), result) for result in baseline['results'])
+
+    regressions = []
+    for result in current['results']:
+        key = (result['networkType'], result['numAgents'])
+        if key not in baselineCases:
+            continue
+        base = baselineCases[key]
+        if 'error' in result:
+            if 'error' not in base:
+                regressions.append({'networkType': key[0], \
+                    'numAgents': key[1], 'stage': None, \
+                    'error': result['error']})
+            continue
+        if 'error' in base:
+            continue
+
+        for name, stage in sorted(result['stages'].items()):
+            if name not in base['stages'] or \
+                    base['stages'][name]['perSecond'] is None or \
+                    stage['perSecond'] is None:
+                continue
+            ratio = base['stages'][name]['perSecond'] / \
+                stage['perSecond']
+            if ratio > 1 + tolerance:
+                regressions.append({'networkType': key[0], \
+                    'numAgents': key[1], 'stage': name, \
+                    'slowdown': ratio})
+    return regressions
+
+#####################################################################
+# Runs the benchmark, writing the results as JSON and comparing     #
+# them against a baseline if given: exits with a non-zero status if #
+# any stage regressed. Run with --case to measure a single case in  #
+# this process (as done for each case by Benchmark_runCase)         #
+#####################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the " +
+        "simulation across network types and population sizes")
+    parser.add_argument("--types", nargs="+", \
+        default=Benchmark_networkTypes, choices=Benchmark_networkTypes)
+    parser.add_argument("--sizes", nargs="+", type=int, \
+        default=Benchmark_sizes)
+    parser.add_argument("--min-seconds", type=float, default=1.0, \
+        help="minimum time spent timing each stage")
+    parser.add_argument("--timeout", type=float, \
+        default=Benchmark_timeout, help="seconds allowed per case")
+    parser.add_argument("--output", help="file to write results to")
+    parser.add_argument("--compare", help="baseline results to " +
+        "compare against")
+    parser.add_argument("--tolerance", type=float, default=.1, \
+        help="allowed slowdown against the baseline (fraction)")
+    parser.add_argument("--case", nargs=2, metavar=("TYPE", "SIZE"), \
+        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case is not None:
+        print(json.dumps(Benchmark_measureCase(args.case[0], \
+            int(args.case[1]), args.min_seconds)))
+        sys.exit(0)
+
+    results = Benchmark_run(args.types, args.sizes, args.min_seconds, \
+        args.timeout)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = Benchmark_compare(baseline, results, \
+            args.tolerance)
+        for regression in regressions:
+            sys.stderr.write("Regression: {}\n".format(\
+                json.dumps(regression)))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,80 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: Checkpoint.py                                               #
+# Description: Writes and reads checkpoints of a simulation: a      #
+# binary (npz) file of its arrays along with a JSON header of its   #
+# parameters and random states, from which a run can be resumed     #
+#####################################################################
+
+import sys
+import os
+import json
+import random
+import tempfile
+import numpy as np
+
+# Version of the checkpoint layout, stored in (and checked against)
+# the header of every checkpoint
+Checkpoint_version = 1
+
+#####################################################################
+# Returns the state of the global random generators (those of the   #
+# random module and numpy), drawn from by runs without a seed, as a #
+# header entry and an array of the numpy key                        #
+#####################################################################
+def Checkpoint_getGlobalRandomState():
+    pyVersion, pyState, pyGauss = random.getstate()
+    bitGenerator, keys, pos, hasGauss, gauss = np.random.get_state()
+    header = {'random': [pyVersion, list(pyState), pyGauss], \
+        'numpy': [bitGenerator, pos, hasGauss, gauss]}
+    return header, keys
+
+#####################################################################
+# Given the header entry and the numpy key returned by              #
+# Checkpoint_getGlobalRandomState, restores the global generators   #
+#####################################################################
+def Checkpoint_setGlobalRandomState(header, keys):
+    pyVersion, pyState, pyGauss = header['random']
+    random.setstate((pyVersion, tuple(pyState), pyGauss))
+    bitGenerator, pos, hasGauss, gauss = header['numpy']
+    np.random.set_state((bitGenerator, np.asarray(keys, \
+        dtype=np.uint32), pos, hasGauss, gauss))
+
+#####################################################################
+# Given the path of the checkpoint, its header (a dict of JSON      #
+# values) and a dict of named arrays, writes the checkpoint,        #
+# compressed unless compress is False. It is written under a        #
+# temporary name and moved in place, so that a run interrupted      #
+# while writing still leaves the previous checkpoint intact         #
+#####################################################################
+def Checkpoint_write(path, header, arrays, compress = True):
+    header = dict(header, version=Checkpoint_version)
+    arrays = dict(arrays, header=np.frombuffer(json.dumps(header).\
+        encode(), dtype=np.uint8))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, tempPath = tempfile.mkstemp(suffix=".npz", dir=directory)
+    with os.fdopen(handle, 'wb') as f:
+        if compress:
+            np.savez_compressed(f, **arrays)
+        else:
+            np.savez(f, **arrays)
+    os.replace(tempPath, path)
+
+#####################################################################
+# Given the path of a checkpoint, returns its header and a dict of  #
+# its arrays, or None if it is not a checkpoint of this version     #
+#####################################################################
+def Checkpoint_read(path):
+    with np.load(path) as data:
+        arrays = dict((name, data[name]) for name in data.files)
+
+    if 'header' not in arrays:
+        sys.stderr.write("File is not a checkpoint")
+        return None
+    header = json.loads(arrays.pop('header').tobytes().decode())
+    if header.get('version') != Checkpoint_version:
+        sys.stderr.write("Checkpoint version must be {}".format(\
+            Checkpoint_version))
+        return None
+    return header, arrays
@@ -17,64 +17,108 @@ import sys
 import os
 import random
 from numpy import array, zeros, std, mean, sqrt
+import numpy as np
 
 from Agent import *
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
-
 #####################################################################
-# Given a particular agent, determines their probability of         #
-# getting a coach (based on connected agents in network and SE)     #
+# Given the SE of agents (a float or an array), returns their       #
+# probabilities of getting a coach                                  #
 #####################################################################
-def Coach_getCoachProbability(agent):
+def Coach_getCoachProbabilities(SE):
     pBase = .25
     const = .25
-    return (1 - agent.SE) * const + pBase
+    return (1 - SE) * const + pBase
 
 #####################################################################
-# Given a particular agent, determines their probability of         #
-# keeping a coach (based on changes in SE due to the presence of    #
-# an agent and current SE)                                          #
+# Given the current and previous SE of agents (floats or arrays),   #
+# returns their probabilities of keeping a coach                    #
 #####################################################################
-def Coach_keepCoachProbability(agent):
+def Coach_keepCoachProbabilities(SE, oldSE):
     pBase = .75
-    delta = agent.Agent_getSEChange()
-    return agent.SE * delta + pBase
+    delta = SE - oldSE
+    return SE * delta + pBase
+
+#####################################################################
+# Allocation policies: given the agents requesting a coach this     #
+# tick (candidates, a boolean array over the agents along the last  #
+# axis), the number of coaches still free (capacity, broadcastable  #
+# against the leading axes), the SE of the agents and a random      #
+# generator, each returns which of the candidates get a coach       #
+#####################################################################
+
+#####################################################################
+# Grants coaches to candidates in agent order until none are left   #
+#####################################################################
+def Coach_allocateInOrder(candidates, capacity, SE, rng):
+    return candidates & (np.cumsum(candidates, axis=-1) <= capacity)
 
 #####################################################################
-# Given a particular agent, acquires a coach with probability       #
-# determined by SE and network                                      #
+# Given the priorities of the agents (lower goes first), grants     #
+# coaches to the candidates in order of priority until none are     #
+# left. Ties are broken by tieBreak if given (lower goes first),    #
+# and otherwise by agent order                                      #
 #####################################################################
-def Coach_acquireCoachWithProb(agent):
-    # print("Current: {}".format(agent.network.coachCount))
-    # print("Max: {}".format(agent.network.maxCoachCount))
+def Coach_allocateByPriority(candidates, capacity, priority, \
+        tieBreak = None):
+    priority = np.where(candidates, priority, np.inf)
+    keys = [priority]
+    if tieBreak is not None:
+        keys = [tieBreak, priority]
+    order = np.lexsort(keys, axis=-1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[-1]) + \
+        np.zeros_like(order), axis=-1)
+    return candidates & (ranks < capacity)
 
-    # Accounts for the case where all of the coaches have been taken
-    if agent.network.coachCount >= agent.network.maxCoachCount:
-        return
+#####################################################################
+# Grants coaches to candidates in a uniformly random order, so no   #
+# agent is favored by its position                                  #
+#####################################################################
+def Coach_allocateRandom(candidates, capacity, SE, rng):
+    return Coach_allocateByPriority(candidates, capacity, \
+        rng.random(candidates.shape))
 
-    if agent.hasCoach:
-        return
-    prob = Coach_getCoachProbability(agent)
-    rand = random.random()
-    if rand < prob:
-        agent.Agent_addCoach()
+#####################################################################
+# Grants coaches to the candidates with the lowest SE first (ties   #
+# broken at random)                                                 #
+#####################################################################
+def Coach_allocateNeediest(candidates, capacity, SE, rng):
+    return Coach_allocateByPriority(candidates, capacity, SE, \
+        rng.random(candidates.shape))
+
+Coach_allocationPolicies = {
+    'random': Coach_allocateRandom,
+    'order': Coach_allocateInOrder,
+    'neediest': Coach_allocateNeediest
+}
 
 #####################################################################
-# Given a particular agent, keep a coach with probability           #
-# determined by SE and changes caused by coach                      #
+# Allocates the coaches of a whole population for one tick. Given   #
+# whether each agent has a coach, their current and previous SE,    #
+# the maximum number of coaches, uniform draws for acquiring and    #
+# retaining coaches, the name of the allocation policy (a key of    #
+# Coach_allocationPolicies) and the generator it draws from,        #
+# releases coaches (with Coach_keepCoachProbabilities) and then     #
+# fills the freed and remaining capacity from the agents acquiring  #
+# one (with Coach_getCoachProbabilities) as ordered by the policy.  #
+# Only agents without a coach at the start of the tick may acquire  #
+# one, so an agent released this tick stays without one until the   #
+# next. Returns the new array of whether each agent has a coach     #
 #####################################################################
-def Coach_keepCoachWithProb(agent):
-    if not agent.hasCoach:
-        return
-    prob = Coach_keepCoachProbability(agent)
-    rand = random.random()
-    if rand > prob:
-        agent.Agent_removeCoach()
\ No newline at end of file
+def Coach_allocateCoaches(hasCoach, SE, oldSE, maxCoachCount, \
+        acquireRands, retainRands, policy = 'random', rng = None):
+    if rng is None:
+        rng = np.random
+    hasCoach = np.asarray(hasCoach, dtype=bool)
+
+    keepProb = Coach_keepCoachProbabilities(SE, oldSE)
+    keepsCoach = hasCoach & ~(retainRands > keepProb)
+
+    capacity = maxCoachCount - keepsCoach.sum(axis=-1, keepdims=True)
+    acquireProb = Coach_getCoachProbabilities(SE)
+    candidates = ~hasCoach & (acquireRands < acquireProb)
+    allocate = Coach_allocationPolicies[policy]
+    return keepsCoach | allocate(candidates, capacity, SE, rng)
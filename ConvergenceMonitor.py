@@ -0,0 +1,105 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: ConvergenceMonitor.py                                       #
+# Description: Watches the population statistics of a simulation    #
+# tick by tick and declares steady state once they stay within a    #
+# tolerance over a window, so that runs can be stopped early        #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+
+#####################################################################
+# Population statistics watched by the monitor, in the order they   #
+# are given to ConvergenceMonitor_observe, and the full range of    #
+# each (SE lies in [0, 1] and exercise points in [0, 100]) against  #
+# which the tolerance is scaled                                     #
+#####################################################################
+Convergence_statNames = ['meanSE', 'stdSE', 'meanExercise', \
+    'stdExercise']
+Convergence_statScales = [1.0, 1.0, 100.0, 100.0]
+
+class ConvergenceMonitor:
+    #################################################################
+    # Given the number of ticks over which the statistics must stay #
+    # steady (window), the tolerance on their change over that      #
+    # window (as a fraction of their full range, see                #
+    # Convergence_statScales) and the minimum number of ticks to    #
+    # run before steady state may be declared (minTicks), creates a #
+    # monitor                                                       #
+    #################################################################
+    def __init__(self, window = 26, tolerance = .005, minTicks = 0):
+        if not self.ConvergenceMonitor_verifyMonitor(window, tolerance, \
+                minTicks):
+            return None
+
+        self.window = window
+        self.tolerance = tolerance
+        self.minTicks = minTicks
+        self.ConvergenceMonitor_reset()
+
+    #################################################################
+    # Ensures that the given parameters for the monitor are         #
+    # appropriate                                                   #
+    #################################################################
+    def ConvergenceMonitor_verifyMonitor(self, window, tolerance, \
+            minTicks):
+        if not isinstance(window, int) or window < 2:
+            sys.stderr.write("Window must be an int of at least 2")
+            return False
+
+        if not isinstance(tolerance, float) or tolerance < 0.0:
+            sys.stderr.write("Tolerance must be a non-negative float")
+            return False
+
+        if not isinstance(minTicks, int) or minTicks < 0:
+            sys.stderr.write("Minimum tick count must be a " +
+                "non-negative int")
+            return False
+        return True
+
+    #################################################################
+    # Clears the observed history, so that the monitor can watch    #
+    # another run                                                   #
+    #################################################################
+    def ConvergenceMonitor_reset(self):
+        self.ticks = []
+        self.history = []
+        self.converged = False
+        self.convergedTick = None
+
+    #################################################################
+    # Given the current tick and the population statistics (in the  #
+    # order of Convergence_statNames), records them and returns     #
+    # True once steady state is declared: every statistic has moved #
+    # by at most tolerance (times its range) over the window        #
+    #################################################################
+    def ConvergenceMonitor_observe(self, tick, stats):
+        self.ticks.append(tick)
+        self.history.append(list(stats))
+        if self.converged:
+            return True
+
+        if len(self.history) < self.window or tick < self.minTicks:
+            return False
+
+        recent = np.array(self.history[-self.window:])
+        spread = recent.max(axis=0) - recent.min(axis=0)
+        if np.all(spread <= self.tolerance * \
+                np.array(Convergence_statScales)):
+            self.converged = True
+            self.convergedTick = tick
+        return self.converged
+
+    #################################################################
+    # Returns the observed statistics as a dict of arrays keyed by  #
+    # Convergence_statNames (along with the 'tick' of each)         #
+    #################################################################
+    def ConvergenceMonitor_getHistory(self):
+        history = np.array(self.history).reshape(-1, \
+            len(Convergence_statNames))
+        results = dict((name, history[:, i]) for i, name in \
+            enumerate(Convergence_statNames))
+        results['tick'] = np.array(self.ticks)
+        return results
@@ -11,26 +11,24 @@ import random,itertools
 from copy import deepcopy
 from numpy import array, zeros, std, mean, sqrt
 
-from NetworkBase import NetworkBase
+from NetworkBase import NetworkBase, NetworkBase_importNetworkx
 from Agent import AgentFactory, Agent
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
-
 class ERNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
     # number of coaches maximally present in the simulation, and the#
     # probability of attaching to other nodes (defaulted to .5)     #
-    # initializes ER Network                                        #
+    # initializes ER Network. The graph is generated from seed, and #
+    # if given a TopologyCache (cache) along with a seed, is loaded #
+    # from it when already generated before. The initial states of  #
+    # the agents are drawn from rng (a numpy Generator) if given.   #
+    # Pass in False for createAgents to only generate the graph     #
     #################################################################
-    def __init__(self, nodeCount, maxCoachCount, p = 0.5):
+    def __init__(self, nodeCount, maxCoachCount, p = 0.5, seed = None, \
+            cache = None, rng = None, createAgents = True):
         if not self.ERNetwork_verifyNetwork(nodeCount, maxCoachCount, p):
             return None
 
@@ -38,16 +36,28 @@ class ERNetwork:
         self.maxCoachCount = maxCoachCount
 
         self.p = p
+        self.seed = seed
+        self.cache = cache
+        self.rng = rng
         self.agentFactory = AgentFactory
 
         self.Agents = {}
         self.networkBase = NetworkBase("ERNetwork", maxCoachCount)
 
-        self.ERNetwork_createAgents()
+        if createAgents:
+            self.ERNetwork_createAgents()
 
         # Sets the network base to have the agents just created and
-        # the graph just generated
-        self.networkBase.NetworkBase_setGraph(self.G)
+        # the graph just generated (or loaded), kept only as adjacency
+        # arrays: the networkx graph is built again only if requested
+        if self.cache is not None and self.seed is not None:
+            edges = self.cache.TopologyCache_getEdges("ER", \
+                self.nodeCount, (self.p,), self.seed, \
+                self.ERNetwork_generateEdges)
+        else:
+            edges = self.ERNetwork_generateEdges()
+        self.networkBase.NetworkBase_setEdges(range(0, self.nodeCount), \
+            edges)
         self.networkBase.NetworkBase_setAgents(self.Agents)
     
     #################################################################
@@ -78,16 +88,31 @@ class ERNetwork:
         return True
 
     #################################################################
-    # Creates the agents present in the simulation (ER graph)       #
+    # Generates the ER graph of the network from its seed           #
     #################################################################
-    def ERNetwork_createAgents(self):
+    def ERNetwork_generateGraph(self):
+        nx = NetworkBase_importNetworkx()
         self.G = nx.generators.random_graphs.fast_gnp_random_graph(
                     n = self.nodeCount,
                     p = self.p,
-                    seed = None)
+                    seed = self.seed)
         self.G.name = "erdosrenyi_graph(%s,%s)"%(self.nodeCount, self.p)
 
-        for i in range(0, self.nodeCount):    
-            curAgent=self.agentFactory.\
-                AgentFactory_createAgent(self, i)
+    #################################################################
+    # Generates the ER graph and returns its edge list, as stored   #
+    # in the topology cache                                         #
+    #################################################################
+    def ERNetwork_generateEdges(self):
+        self.ERNetwork_generateGraph()
+        edges = list(self.G.edges())
+        self.G = None
+        return edges
+
+    #################################################################
+    # Creates the agents present in the simulation (ER graph)       #
+    #################################################################
+    def ERNetwork_createAgents(self):
+        agents = self.agentFactory.AgentFactory_createAgents(self, \
+            range(0, self.nodeCount), self.rng)
+        for curAgent in agents:
             self.Agents[curAgent.agentID] = curAgent
\ No newline at end of file
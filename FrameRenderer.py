@@ -0,0 +1,118 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: FrameRenderer.py                                            #
+# Description: Draws frames of the network (nodes as one collection #
+# with per-node colors, edges as one line collection) on a pool of  #
+# background processes and optionally assembles them into a GIF     #
+#####################################################################
+
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#####################################################################
+# Given a frame, a dict holding the (x, y) positions of the nodes   #
+# ('pos'), their sizes ('sizes') and RGBA colors ('colors'), the    #
+# (edgeCount x 2 x 2) segments of the edges ('segments'), the time  #
+# of the frame ('time') and the file to save it to ('fileName'),    #
+# draws the frame with a single call for the nodes and one for the  #
+# edges. Pass in True for toShow to display it once saved           #
+#####################################################################
+def FrameRenderer_drawFrame(frame, toShow = False):
+    from matplotlib.collections import LineCollection
+    if toShow:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(12,12))
+    else:
+        # Drawn without pyplot, so workers need no GUI backend
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(12,12))
+    ax = fig.add_subplot(1, 1, 1)
+
+    edges = LineCollection(frame['segments'], colors=[(0, 0, 0, .5)], \
+        linewidths=1.0)
+    ax.add_collection(edges)
+    ax.scatter(frame['pos'][:, 0], frame['pos'][:, 1], \
+        s=frame['sizes'], c=frame['colors'])
+
+    ax.set_axis_off()
+    ax.set_title("SE Network at Time {}".format(frame['time']))
+    fig.savefig(frame['fileName'])
+    if toShow:
+        plt.show()
+        plt.close(fig)
+    return frame['fileName']
+
+class FrameRenderer:
+    #################################################################
+    # Given the number of background processes drawing the frames   #
+    # (numWorkers, frames are drawn in the calling process if 0)    #
+    # and optionally the file to assemble the frames into as an     #
+    # animated GIF (animationFile, shown frameDuration ms apiece),  #
+    # initializes the renderer                                      #
+    #################################################################
+    def __init__(self, numWorkers = 1, animationFile = None, \
+            frameDuration = 500):
+        if not isinstance(numWorkers, int) or numWorkers < 0:
+            sys.stderr.write("Number of workers must be a " +
+                "non-negative int")
+            return None
+
+        self.numWorkers = numWorkers
+        self.animationFile = animationFile
+        self.frameDuration = frameDuration
+
+        self.executor = None
+        if numWorkers > 0:
+            self.executor = ProcessPoolExecutor(max_workers = numWorkers)
+        self.frames = []
+
+    #################################################################
+    # Given a frame (see FrameRenderer_drawFrame), hands it off to  #
+    # be drawn, returning without waiting for it if there are       #
+    # background processes                                          #
+    #################################################################
+    def FrameRenderer_submit(self, frame):
+        if self.executor is not None:
+            self.frames.append(self.executor.submit(\
+                FrameRenderer_drawFrame, frame))
+        else:
+            self.frames.append(FrameRenderer_drawFrame(frame))
+
+    #################################################################
+    # Waits for all frames to be drawn, assembles them into the     #
+    # animation file (if one was given) and shuts down the workers. #
+    # Returns the files of the frames in the order submitted        #
+    #################################################################
+    def FrameRenderer_close(self):
+        fileNames = [frame.result() if self.executor is not None else \
+            frame for frame in self.frames]
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.frames = []
+
+        if self.animationFile is not None and fileNames:
+            FrameRenderer_assembleAnimation(fileNames, \
+                self.animationFile, self.frameDuration)
+        return fileNames
+
+#####################################################################
+# Given the image files of the frames in order, the file to write   #
+# and the time (in ms) each frame is shown for, assembles the       #
+# frames into an animated GIF                                       #
+#####################################################################
+def FrameRenderer_assembleAnimation(fileNames, animationFile, \
+        frameDuration = 500):
+    try:
+        from PIL import Image
+    except ImportError:
+        sys.stderr.write("You must install Pillow to assemble frames " +
+            "into an animation")
+        return
+
+    images = [Image.open(fileName).convert('P', \
+        palette=Image.ADAPTIVE) for fileName in fileNames]
+    images[0].save(animationFile, save_all=True, \
+        append_images=images[1:], duration=frameDuration, loop=0)
@@ -0,0 +1,74 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: ImportBudget.py                                             #
+# Description: Measures the time taken to import the simulation     #
+# core in a fresh interpreter and checks that it stays within its   #
+# budget without loading the plotting stack                         #
+#####################################################################
+
+import sys
+import os
+import json
+import subprocess
+
+#####################################################################
+# Modules that must load headless (without matplotlib or networkx), #
+# the modules they must not pull in, and the budget in seconds for  #
+# importing all of them                                             #
+#####################################################################
+ImportBudget_modules = ['SESimulation', 'NetworkBase', 'Agent', 'Coach', \
+    'ArrayEngine', 'SensitivitySimulations']
+ImportBudget_forbidden = ['matplotlib', 'networkx']
+ImportBudget_seconds = 0.5
+
+ImportBudget_script = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [name for name in \
+    {forbidden!r} if name in sys.modules]}}))
+"""
+
+#####################################################################
+# Imports the core modules in a fresh interpreter (run from the     #
+# directory of this file) and returns the time taken along with the #
+# forbidden modules that were loaded, taking the fastest of repeats #
+# runs to discount a cold disk cache                                #
+#####################################################################
+def ImportBudget_measure(repeats = 5):
+    script = ImportBudget_script.format(modules=ImportBudget_modules, \
+        forbidden=ImportBudget_forbidden)
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    seconds = None
+    loaded = []
+    for i in range(0, repeats):
+        output = subprocess.check_output([sys.executable, "-c", \
+            script], cwd=directory)
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        if seconds is None or result['seconds'] < seconds:
+            seconds = result['seconds']
+        loaded = result['loaded']
+    return seconds, loaded
+
+#####################################################################
+# Measures the import time of the core, reporting whether it is in  #
+# budget: exits with a non-zero status if it is not                 #
+#####################################################################
+if __name__ == "__main__":
+    budget = ImportBudget_seconds
+    if len(sys.argv) > 1:
+        budget = float(sys.argv[1])
+
+    seconds, loaded = ImportBudget_measure()
+    print("Core import time: {:.3f}s (budget {:.3f}s)".format(seconds, \
+        budget))
+    if loaded:
+        sys.stderr.write("Core imports loaded {}\n".format(\
+            ", ".join(loaded)))
+        sys.exit(1)
+    if seconds > budget:
+        sys.stderr.write("Core import time over budget\n")
+        sys.exit(1)
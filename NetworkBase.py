@@ -9,17 +9,26 @@ import sys
 import os
 import random
 from numpy import array, zeros, std, mean, sqrt
+import numpy as np
 
 from Agent import *
+from ArrayEngine import ArrayEngine, ArrayEngine_getMeanStd
+from FrameRenderer import FrameRenderer_drawFrame
+from Profiler import Profiler_null
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
+#####################################################################
+# Imports and returns networkx, only loaded once a networkx graph   #
+# is actually needed so the simulation core starts up without it   #
+#####################################################################
+def NetworkBase_importNetworkx():
+    try:
+        import networkx as nx
+    except ImportError:
+        raise ImportError("You must install NetworkX:\
+        (http://networkx.lanl.gov/) for SE simulation")
+    return nx
 
 class NetworkBase:
     #################################################################
@@ -32,6 +41,85 @@ class NetworkBase:
         self.networkType = networkType
         self.maxCoachCount = maxCoachCount
         self.coachCount = 0
+        self.engine = None
+        self.popStats = None
+        self.localExercise = None
+        self.streams = None
+        self.coachPolicy = 'random'
+        self.incremental = False
+        self.neighborState = None
+        self.profiler = Profiler_null
+
+        self.graph = None
+        self.adjacency = None
+
+    #################################################################
+    # Given RandomStreams (see RandomStreams.py), draws the coach   #
+    # allocations of each tick from them (as arrays over the        #
+    # population) in place of the global random state               #
+    #################################################################
+    def NetworkBase_setRandomStreams(self, streams):
+        self.streams = streams
+
+    #################################################################
+    # Given a Profiler (see Profiler.py), records the time spent in #
+    # each phase of the updates with it                             #
+    #################################################################
+    def NetworkBase_setProfiler(self, profiler):
+        self.profiler = profiler
+
+    #################################################################
+    # Given the name of a coach allocation policy (a key of         #
+    # Coach_allocationPolicies), sets the order in which agents     #
+    # requesting a coach are granted one                            #
+    #################################################################
+    def NetworkBase_setCoachPolicy(self, coachPolicy):
+        if coachPolicy not in Coach_allocationPolicies:
+            sys.stderr.write("Coach policy must be one of " +
+                ", ".join(sorted(Coach_allocationPolicies)))
+            return False
+        self.coachPolicy = coachPolicy
+        return True
+
+    #################################################################
+    # Given whether each agent has a coach along with their current #
+    # and previous SE (arrays in the order of the adjacency arrays, #
+    # possibly with leading replicate axes), allocates the coaches  #
+    # for one tick (see Coach_allocateCoaches) with the draws taken #
+    # from the random streams if set (else the global random state) #
+    #################################################################
+    def NetworkBase_allocateCoaches(self, hasCoach, SE, oldSE):
+        shape = np.shape(SE)
+        if self.streams is None:
+            rng = np.random
+            retainRands = rng.random(shape)
+            acquireRands = rng.random(shape)
+        else:
+            retainRands = self.streams.RandomStreams_get('coachRetain')\
+                .random(shape)
+            acquireRands = self.streams.\
+                RandomStreams_get('coachAcquire').random(shape)
+            rng = self.streams.RandomStreams_get('coachAllocate')
+
+        return Coach_allocateCoaches(hasCoach, SE, oldSE, \
+            self.maxCoachCount, acquireRands, retainRands, \
+            self.coachPolicy, rng)
+
+    #################################################################
+    # Allocates the coaches of the Agent objects for one tick, all  #
+    # at once (see NetworkBase_allocateCoaches)                     #
+    #################################################################
+    def NetworkBase_updateCoaches(self):
+        nodeIDs = self.NetworkBase_getAdjacency()[0]
+        agents = [self.Agents[nodeID] for nodeID in nodeIDs.tolist()]
+        hasCoach = self.NetworkBase_allocateCoaches(
+            array([agent.hasCoach for agent in agents], dtype=bool),
+            array([agent.SE for agent in agents]),
+            array([agent.oldSE for agent in agents]))
+
+        for agent, agentHasCoach in zip(agents, hasCoach.tolist()):
+            agent.hasCoach = int(agentHasCoach)
+        self.coachCount = int(hasCoach.sum())
 
     #################################################################
     # Given parameters for initializing the network base, ensures   #
@@ -49,10 +137,248 @@ class NetworkBase:
         return True
 
     #################################################################
-    # Given a graph G, assigns it to be the graph for this network  #
+    # Given a graph G, assigns it to be the graph for this network. #
+    # The adjacency arrays are only built from it once needed, as   #
+    # the graph may still be filled in by the network after this    #
     #################################################################
     def NetworkBase_setGraph(self, G):
-        self.G = G
+        self.graph = G
+        self.adjacency = None
+
+    #################################################################
+    # Returns the networkx graph for this network, materializing it #
+    # from the adjacency arrays if it has been released             #
+    #################################################################
+    def NetworkBase_getGraph(self):
+        if self.graph is None:
+            nx = NetworkBase_importNetworkx()
+            nodeIDs, indptr, indices = self.NetworkBase_getAdjacency()
+            G = nx.Graph()
+            G.add_nodes_from(nodeIDs.tolist())
+            rows = np.repeat(np.arange(len(nodeIDs)), np.diff(indptr))
+            upper = rows <= indices
+            G.add_edges_from(zip(nodeIDs[rows[upper]].tolist(),
+                nodeIDs[indices[upper]].tolist()))
+            self.graph = G
+        return self.graph
+
+    #################################################################
+    # Builds the adjacency arrays (if needed) and drops the         #
+    # networkx graph, materialized again only once requested        #
+    #################################################################
+    def NetworkBase_releaseGraph(self):
+        self.NetworkBase_getAdjacency()
+        self.graph = None
+
+    #################################################################
+    # Returns the topology in compressed sparse row form: an array  #
+    # of the node IDs, the row pointers and the column indices,     #
+    # the neighbors of node i being at indptr[i] up to indptr[i+1]  #
+    # in indices (self-loops are kept once, as in nx.neighbors)     #
+    #################################################################
+    def NetworkBase_getAdjacency(self):
+        if self.adjacency is None:
+            G = self.graph
+            nodeIDs = array(list(G.nodes()), dtype=np.int64)
+            nodeIndex = dict((nodeID, i) for i, nodeID in \
+                enumerate(nodeIDs.tolist()))
+
+            edges = array([(nodeIndex[u], nodeIndex[v]) for u, v in \
+                G.edges()], dtype=np.int64).reshape(-1, 2)
+            self.NetworkBase_setEdges(nodeIDs, edges)
+        return self.adjacency
+
+    #################################################################
+    # Given the node IDs and an (edgeCount x 2) array of the        #
+    # indices of the endpoints of each undirected edge, sets the    #
+    # adjacency arrays of the network without going through networkx#
+    #################################################################
+    def NetworkBase_setEdges(self, nodeIDs, edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        isLoop = edges[:, 0] == edges[:, 1]
+        rows = np.concatenate((edges[:, 0], edges[~isLoop, 1]))
+        cols = np.concatenate((edges[:, 1], edges[~isLoop, 0]))
+        self.NetworkBase_setAdjacency(np.asarray(nodeIDs, \
+            dtype=np.int64), rows, cols)
+
+    #################################################################
+    # Given the node IDs and the (row, column) index pairs of every #
+    # directed half-edge, sorts them into the adjacency arrays      #
+    #################################################################
+    def NetworkBase_setAdjacency(self, nodeIDs, rows, cols):
+        order = np.argsort(rows, kind='stable')
+        degree = np.bincount(rows, minlength=len(nodeIDs))
+
+        indptr = zeros(len(nodeIDs) + 1, dtype=np.int64)
+        np.cumsum(degree, out=indptr[1:])
+        indexType = np.int32 if len(nodeIDs) < 2 ** 31 else np.int64
+        indices = cols[order].astype(indexType)
+
+        self.adjacency = (nodeIDs, indptr, indices)
+        self.nodeIndex = dict((nodeID, i) for i, nodeID in \
+            enumerate(nodeIDs.tolist()))
+        self.degree = degree
+
+    #################################################################
+    # Given adjacency arrays (as returned by                        #
+    # NetworkBase_getAdjacency), sets them as the topology of the   #
+    # network, i.e. when restoring it from a checkpoint             #
+    #################################################################
+    def NetworkBase_loadAdjacency(self, nodeIDs, indptr, indices):
+        rows = np.repeat(np.arange(len(nodeIDs)), np.diff(indptr))
+        self.NetworkBase_setAdjacency(np.asarray(nodeIDs, \
+            dtype=np.int64), rows, np.asarray(indices, dtype=np.int64))
+        self.graph = None
+
+    #################################################################
+    # Given adjacency arrays already in sorted form (i.e. attached  #
+    # from shared memory, see SharedState.py), sets them as the     #
+    # topology of the network as they are, without copying them     #
+    #################################################################
+    def NetworkBase_attachAdjacency(self, nodeIDs, indptr, indices):
+        self.adjacency = (nodeIDs, indptr, indices)
+        self.nodeIndex = None
+        self.degree = np.diff(indptr)
+        self.graph = None
+
+    #################################################################
+    # Returns the dict from the ID of each node to its index in the #
+    # adjacency arrays, built on first use for attached adjacency   #
+    #################################################################
+    def NetworkBase_getNodeIndex(self):
+        self.NetworkBase_getAdjacency()
+        if self.nodeIndex is None:
+            self.nodeIndex = dict((nodeID, i) for i, nodeID in \
+                enumerate(self.adjacency[0].tolist()))
+        return self.nodeIndex
+
+    #################################################################
+    # Given another network base, shares its adjacency arrays       #
+    # rather than copying them: they are never modified in place    #
+    # (edits to the graph replace them), so both stay independent   #
+    #################################################################
+    def NetworkBase_shareAdjacency(self, networkBase):
+        self.adjacency = networkBase.NetworkBase_getAdjacency()
+        self.nodeIndex = networkBase.nodeIndex
+        self.degree = networkBase.degree
+        self.graph = None
+
+    #################################################################
+    # Given a list of network bases with the same number of nodes,  #
+    # sets the adjacency of this network base to their disjoint     #
+    # union (the nodes of the i-th base offset by i * nodeCount)    #
+    #################################################################
+    def NetworkBase_stackAdjacency(self, networkBases):
+        rows = []
+        cols = []
+        nodeCount = len(networkBases[0].NetworkBase_getAdjacency()[0])
+        for i, networkBase in enumerate(networkBases):
+            nodeIDs, indptr, indices = networkBase.\
+                NetworkBase_getAdjacency()
+            if len(nodeIDs) != nodeCount:
+                sys.stderr.write("Stacked networks must have the same " +
+                    "number of nodes")
+                return False
+            offset = i * nodeCount
+            rows.append(offset + np.repeat(np.arange(nodeCount),
+                np.diff(indptr)))
+            cols.append(offset + indices.astype(np.int64))
+
+        nodeIDs = np.arange(nodeCount * len(networkBases), \
+            dtype=np.int64)
+        self.NetworkBase_setAdjacency(nodeIDs, np.concatenate(rows),
+            np.concatenate(cols))
+        self.graph = None
+        return True
+
+    #################################################################
+    # Given values for every node (along the last axis, in the      #
+    # order of the adjacency node IDs), returns the sum of the      #
+    # values of the neighbors of each node in one pass              #
+    #################################################################
+    def NetworkBase_getNeighborSums(self, values):
+        nodeIDs, indptr, indices = self.NetworkBase_getAdjacency()
+        values = np.asarray(values)
+        cumulative = zeros(values.shape[:-1] + (len(indices) + 1,),
+            dtype=values.dtype)
+        np.cumsum(values[..., indices], axis=-1, out=cumulative[..., 1:])
+        return cumulative[..., indptr[1:]] - cumulative[..., indptr[:-1]]
+
+    #################################################################
+    # Pass in True for incremental to keep running neighbor sums    #
+    # between ticks, updated only from the nodes whose values       #
+    # changed (see NetworkBase_getIncrementalNeighborSums)          #
+    #################################################################
+    def NetworkBase_setIncremental(self, incremental):
+        self.incremental = incremental
+        self.neighborState = None
+
+    #################################################################
+    # Given integer values for every node (as given to              #
+    # NetworkBase_getNeighborSums), returns the same neighbor sums  #
+    # by updating those of the previous call: each node whose value #
+    # changed pushes its delta to its neighbors, so the cost scales #
+    # with the number of changes rather than the number of edges.   #
+    # The sums are rebuilt in full on the first call or once the    #
+    # topology or the shape of the values changes. The returned     #
+    # array is kept for the next call and must not be modified      #
+    #################################################################
+    def NetworkBase_getIncrementalNeighborSums(self, values):
+        adjacency = self.NetworkBase_getAdjacency()
+        nodeIDs, indptr, indices = adjacency
+        values = np.asarray(values)
+
+        state = self.neighborState
+        if state is None or state[0] is not adjacency or \
+                state[1].shape != values.shape:
+            sums = self.NetworkBase_getNeighborSums(values)
+            self.neighborState = (adjacency, values.copy(), sums)
+            return sums
+
+        lastValues, sums = state[1], state[2]
+        nodeCount = len(nodeIDs)
+        curRows = values.reshape(-1, nodeCount)
+        lastRows = lastValues.reshape(-1, nodeCount)
+        rows, changed = np.nonzero(curRows != lastRows)
+        if len(changed) == 0:
+            return sums
+
+        delta = curRows[rows, changed] - lastRows[rows, changed]
+        counts = self.degree[changed]
+
+        # Positions in indices of the neighbors of each changed node
+        # (the adjacency is symmetric, so those are also the nodes
+        # whose sums include the changed node)
+        offsets = np.cumsum(counts) - counts
+        positions = np.repeat(indptr[changed] - offsets, counts) + \
+            np.arange(counts.sum())
+        targets = np.repeat(rows * nodeCount, counts) + \
+            indices[positions]
+
+        pushed = np.bincount(targets, weights=np.repeat(delta, counts), \
+            minlength=sums.size)
+        sums += pushed.reshape(sums.shape).astype(sums.dtype)
+        lastValues[...] = values
+        return sums
+
+    #################################################################
+    # Given the exercise points of every node (in adjacency order), #
+    # returns the mean exercise of the neighbors of each node.      #
+    # Nodes without neighbors are given isolatedValue instead (the  #
+    # population mean, so they feel no social pressure either way), #
+    # which must broadcast against the exercise points              #
+    #################################################################
+    def NetworkBase_getMeanLocalExercises(self, exercisePts, \
+            isolatedValue):
+        if self.incremental:
+            sums = self.NetworkBase_getIncrementalNeighborSums(
+                exercisePts)
+        else:
+            sums = self.NetworkBase_getNeighborSums(exercisePts)
+        degree = self.degree
+        isolated = degree == 0
+        meanLocal = sums / np.maximum(degree, 1)
+        return np.where(isolated, isolatedValue, meanLocal)
 
     #################################################################
     # Given dictionary of agents, assigns them for this network     #
@@ -67,39 +393,161 @@ class NetworkBase:
     # analysis on each of the factors (i.e. coach impact helps look #
     # at, if the "effectiveness" of the coaches is different, how   #
     # would the final results vary) with default values given       #
+    # (pass in True for vectorized to advance the population with   #
+    # the array engine, in which case NetworkBase_syncAgents must   #
+    # be called before the Agent objects are read again)            #
     #################################################################
     def NetworkBase_updateAgents(self, time, timeImpact = .005, 
             coachImpact = .225, pastImpact = .025, 
-            socialImpact = .015): 
+            socialImpact = .015, vectorized = False): 
+        if vectorized:
+            if self.engine is None:
+                self.engine = ArrayEngine(self)
+            self.engine.ArrayEngine_timeStep(time, timeImpact, \
+                coachImpact, pastImpact, socialImpact)
+            return
+
         # Since we wished for update to happen synchronously, the
         # first loop determines and stores all the values to which 
-        # the SE will change and the second then updates all agents
-
-        for agentID in self.Agents:
-            self.Agents[agentID].Agent_timeStep(timeImpact, coachImpact,\
-                pastImpact, socialImpact, time)
-        for agentID in self.Agents:
-            self.Agents[agentID].SE = self.Agents[agentID].toUpdateSE
+        # the SE will change and the second then updates all agents.
+        # All agents read the population statistics from the same
+        # snapshot, taken before any of them are updated
+        profiler = self.profiler
+        profiler.Profiler_start('popStats')
+        self.NetworkBase_snapshotPopStats()
+        profiler.Profiler_stop('popStats')
+        profiler.Profiler_start('neighbors')
+        self.NetworkBase_snapshotLocalExercise()
+        profiler.Profiler_stop('neighbors')
+
+        # Coaches are allocated for the whole population at once, so
+        # the order in which agents are visited does not matter
+        profiler.Profiler_start('coaches')
+        self.NetworkBase_updateCoaches()
+        profiler.Profiler_stop('coaches')
+
+        # Each update (as in Agent_updateSE) is made for every agent
+        # in turn, so it is timed as its own phase as in the array
+        # engine: the updates of an agent only read its own state and
+        # the snapshots above, so the order of the loops is free
+        agents = list(self.Agents.values())
+        profiler.Profiler_start('decay')
+        for agent in agents:
+            agent.Agent_startUpdate()
+            agent.Agent_timeUpdate(time, timeImpact)
+        profiler.Profiler_stop('decay')
+
+        profiler.Profiler_start('coaching')
+        for agent in agents:
+            agent.Agent_coachUpdate(coachImpact)
+        profiler.Profiler_stop('coaching')
+
+        profiler.Profiler_start('past')
+        for agent in agents:
+            agent.Agent_pastUpdate(pastImpact)
+        profiler.Profiler_stop('past')
+
+        profiler.Profiler_start('social')
+        for agent in agents:
+            agent.Agent_socialUpdate(socialImpact)
+        profiler.Profiler_stop('social')
+
+        # The exercise levels are recomputed from the SE at the start
+        # of the tick, as in ArrayEngine_levelUpdate
+        profiler.Profiler_start('levels')
+        for agent in agents:
+            agent.Agent_updateExerciseLevels()
+            agent.Agent_normalizeSE()
+            agent.SE = agent.toUpdateSE
+        profiler.Profiler_stop('levels')
+
+        self.popStats = None
+        self.localExercise = None
+
+    #################################################################
+    # Computes and freezes the mean and standard deviation of the   #
+    # current and old exercise points of the population, which are  #
+    # then returned by the population getters until the end of the  #
+    # current time step                                             #
+    #################################################################
+    def NetworkBase_snapshotPopStats(self):
+        self.popStats = None
+        meanEx, stdEx = ArrayEngine_getMeanStd(
+            self.NetworkBase_getPopExercise())
+        meanOld, stdOld = ArrayEngine_getMeanStd(
+            self.NetworkBase_getPopExercise(True))
+        self.popStats = {
+            'meanExercise': meanEx,
+            'stdExercise': stdEx,
+            'meanOldExercise': meanOld,
+            'stdOldExercise': stdOld
+        }
+
+    #################################################################
+    # Computes and freezes the mean exercise of the neighbors of    #
+    # every agent, returned by NetworkBase_getMeanLocalExercise     #
+    # until the end of the current time step                        #
+    #################################################################
+    def NetworkBase_snapshotLocalExercise(self):
+        self.localExercise = None
+        nodeIDs = self.NetworkBase_getAdjacency()[0]
+        exercisePts = array([self.Agents[nodeID].Agent_getExercisePts() \
+            for nodeID in nodeIDs.tolist()], dtype=np.int64)
+        self.localExercise = self.NetworkBase_getMeanLocalExercises(
+            exercisePts, self.NetworkBase_getMeanPopExercise())
+
+    #################################################################
+    # Copies the state held by the array engine (if in use) back    #
+    # onto the Agent objects and releases the engine                #
+    #################################################################
+    def NetworkBase_syncAgents(self):
+        if self.engine is not None:
+            self.engine.ArrayEngine_storeAgents()
+            self.engine = None
+
+    #################################################################
+    # Returns the state of the agents (held by the array engine if  #
+    # in use) as a dict of arrays keyed by ArrayEngine_stateNames,  #
+    # in the order of the adjacency arrays                          #
+    #################################################################
+    def NetworkBase_getStates(self):
+        if self.engine is not None:
+            return self.engine.ArrayEngine_getStates()
+        return ArrayEngine(self).ArrayEngine_getStates()
+
+    #################################################################
+    # Given a dict of arrays keyed by ArrayEngine_stateNames (as    #
+    # returned by NetworkBase_getStates), sets the agents to it     #
+    #################################################################
+    def NetworkBase_setStates(self, states):
+        self.neighborState = None
+        if self.engine is not None:
+            self.engine.ArrayEngine_setStates(states)
+            self.coachCount = int(np.sum(states['hasCoach']))
+            return
+        ArrayEngine(self, states).ArrayEngine_storeAgents()
 
     #################################################################
     # Given a list of nodes, adds edges between all of them         #
     #################################################################
     def NetworkBase_addEdges(self, nodeList):
-        self.G.add_edges_from(nodeList)
+        self.NetworkBase_getGraph().add_edges_from(nodeList)
+        self.adjacency = None
 
     #################################################################
     # Given two agents in the graph, respectively with IDs agentID1 #
     # and agentID2, removes the edge between them                   #
     #################################################################
     def NetworkBase_removeEdge(self, agentID1, agentID2):
-        self.G.remove_edge(agentID1, agentID2)
+        self.NetworkBase_getGraph().remove_edge(agentID1, agentID2)
+        self.adjacency = None
 
     #################################################################
     # Returns all the edges present in the graph associated with the#
     # network base                                                  #
     #################################################################
     def NetworkBase_getEdges(self):
-        return self.G.edges()
+        return self.NetworkBase_getGraph().edges()
 
     #################################################################
     # Returns the agent associated with the agentID specified       #
@@ -118,8 +566,9 @@ class NetworkBase:
     # Returns an array of the neighbors of a given agent in graph   #
     #################################################################
     def NetworkBase_getNeighbors(self, agent):
-        agentID = agent.agentID
-        return nx.neighbors(self.G, agentID)
+        nodeIDs, indptr, indices = self.NetworkBase_getAdjacency()
+        i = self.NetworkBase_getNodeIndex()[agent.agentID]
+        return nodeIDs[indices[indptr[i]:indptr[i + 1]]].tolist()
 
     #################################################################
     # Returns an array comprised of the exercising levels for all   #
@@ -181,7 +630,13 @@ class NetworkBase:
     # all those directly connected (neighbors) to a given agent     #
     #################################################################
     def NetworkBase_getMeanLocalExercise(self, agent):
+        if self.localExercise is not None:
+            return self.localExercise[self.NetworkBase_getNodeIndex()\
+                [agent.agentID]]
+
         exerNeighbors = self.NetworkBase_getNeighborsExercise(agent)
+        if not exerNeighbors:
+            return self.NetworkBase_getMeanPopExercise()
         return mean(exerNeighbors)
 
     #################################################################
@@ -190,7 +645,12 @@ class NetworkBase:
     # value is False)                                               #
     #################################################################
     def NetworkBase_getMeanPopExercise(self, isOld = False):
-        exerPop = self.NetworkBase_getPopExercise()
+        if self.popStats is not None:
+            if isOld:
+                return self.popStats['meanOldExercise']
+            return self.popStats['meanExercise']
+
+        exerPop = self.NetworkBase_getPopExercise(isOld)
         return mean(exerPop)
 
     #################################################################
@@ -199,7 +659,12 @@ class NetworkBase:
     # True for isOld (default value is False)                       #
     #################################################################
     def NetworkBase_getStdPopExercise(self, isOld = False):
-        exerPop = self.NetworkBase_getPopExercise()
+        if self.popStats is not None:
+            if isOld:
+                return self.popStats['stdOldExercise']
+            return self.popStats['stdExercise']
+
+        exerPop = self.NetworkBase_getPopExercise(isOld)
         return std(exerPop)
 
     #################################################################
@@ -213,25 +678,61 @@ class NetworkBase:
         return mean(agentsSE)
 
     #################################################################
-    # Assigns to each nodes the appropriate visual attributes, with #
-    # those nodes with wellness coaches given a color of red and    #
-    # those without blue along with an opacity corresponding to SE  #
+    # Returns the population statistics watched for convergence in  #
+    # the form [MeanSE, StdSE, MeanExercise, StdExercise], read from#
+    # the array engine if in use                                    #
     #################################################################
-    def NetworkBase_addVisualAttributes(self):
-        # Iterate through each of the nodes present in the graph and
-        # finds respective agent
-        for agentID in self.G.nodes():
-            curAgent = self.Agents[agentID]
-
-            exPts = curAgent.Agent_getExercisePts()
-            nodeSize = int(500 * exPts/30) 
-            self.G.node[agentID]['size'] = nodeSize
-
-            if not curAgent.hasCoach:
-                self.G.node[agentID]['color'] = 'red'
-            else:
-                self.G.node[agentID]['color'] = 'blue'
-            self.G.node[agentID]['opacity'] = curAgent.SE
+    def NetworkBase_getPopStats(self):
+        if self.engine is not None:
+            SE = self.engine.SE
+            exercisePts = self.engine.ArrayEngine_getExercisePts()
+        else:
+            agents = self.Agents.values()
+            SE = array([agent.SE for agent in agents])
+            exercisePts = array([agent.Agent_getExercisePts() for agent \
+                in agents], dtype=np.int64)
+        meanEx, stdEx = ArrayEngine_getMeanStd(exercisePts)
+        return [float(SE.mean()), float(SE.std()), float(meanEx), \
+            float(stdEx)]
+
+    #################################################################
+    # Given the layout of the nodes (pos, a dict from node to (x, y)#
+    # or an array in the order of the adjacency arrays), returns    #
+    # the positions, sizes and RGBA colors of the nodes along with  #
+    # the segments of the edges: nodes with wellness coaches are    #
+    # blue and those without red, with an opacity corresponding to  #
+    # SE, and are sized by their exercise points                    #
+    #################################################################
+    def NetworkBase_getVisualAttributes(self, pos):
+        nodeIDs, indptr, indices = self.NetworkBase_getAdjacency()
+        if isinstance(pos, dict):
+            pos = np.array([pos[nodeID] for nodeID in nodeIDs.tolist()])
+        pos = np.asarray(pos, dtype=float)
+
+        if self.engine is not None:
+            exPts = self.engine.ArrayEngine_getExercisePts()
+            hasCoach = self.engine.hasCoach
+            SE = self.engine.SE
+        else:
+            agents = [self.Agents[nodeID] for nodeID in nodeIDs.tolist()]
+            exPts = np.array([agent.Agent_getExercisePts() for agent in \
+                agents])
+            hasCoach = np.array([agent.hasCoach for agent in agents], \
+                dtype=bool)
+            SE = np.array([agent.SE for agent in agents])
+
+        sizes = (500 * exPts / 30).astype(int)
+        colors = np.zeros((len(nodeIDs), 4))
+        colors[:, 0] = ~hasCoach
+        colors[:, 2] = hasCoach
+        colors[:, 3] = np.clip(SE, 0.0, 1.0)
+
+        # Each undirected edge is drawn once, from its lower index
+        rows = np.repeat(np.arange(len(nodeIDs)), np.diff(indptr))
+        isLower = rows < indices
+        segments = np.stack((pos[rows[isLower]], \
+            pos[indices[isLower]]), axis=1)
+        return pos, sizes, colors, segments
 
     #################################################################
     # Provides graphical display of the population, color coded to  #
@@ -239,21 +740,24 @@ class NetworkBase:
     # sized proportional to the level of exercise. Pass in True for #
     # toShow to display directly and False to save for later view   #
     # with the fileName indicating the current timestep simulated.  #
-    # pos provides the initial layout for the visual display        #
-    #################################################################
-    def NetworkBase_visualizeNetwork(self, toShow, time, pos):
-        self.NetworkBase_addVisualAttributes()
-
-        plt.figure(figsize=(12,12))
-        for node in self.G.nodes():
-            nx.draw_networkx_nodes(self.G,pos, nodelist=[node], 
-                node_color=self.G.node[node]['color'],
-                node_size=self.G.node[node]['size'], 
-                alpha=self.G.node[node]['opacity'])
-        nx.draw_networkx_edges(self.G,pos,width=1.0,alpha=.5)
-
-        plt.title("SE Network at Time {}".format(time))
-        plt.savefig("Results\\TimeResults\\timestep{}.png".format(time))
-        if toShow: 
-            plt.show()
-        plt.close()
\ No newline at end of file
+    # pos provides the initial layout for the visual display. If    #
+    # given a FrameRenderer (renderer), the frame is handed off to  #
+    # it to be drawn in the background instead. Frames are saved    #
+    # under TimeResults in outputDir                                #
+    #################################################################
+    def NetworkBase_visualizeNetwork(self, toShow, time, pos, \
+            renderer = None, outputDir = "Results"):
+        directory = os.path.join(outputDir, "TimeResults")
+        os.makedirs(directory, exist_ok=True)
+
+        pos, sizes, colors, segments = \
+            self.NetworkBase_getVisualAttributes(pos)
+        frame = {'pos': pos, 'sizes': sizes, 'colors': colors,
+            'segments': segments, 'time': time,
+            'fileName': os.path.join(directory, "timestep{}.png"\
+            .format(time))}
+
+        if renderer is not None and not toShow:
+            renderer.FrameRenderer_submit(frame)
+        else:
+            FrameRenderer_drawFrame(frame, toShow)
@@ -0,0 +1,286 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: PartitionedSimulation.py                                    #
+# Description: Runs a single population over several processes by   #
+# splitting its graph into parts, each advanced by its own worker   #
+# on state held in shared memory, with the coaches and population   #
+# statistics handled by the coordinating process                    #
+#####################################################################
+
+import sys
+import os
+import multiprocessing
+import numpy as np
+
+from NetworkBase import NetworkBase
+from ArrayEngine import ArrayEngine, ArrayEngine_stateNames, \
+    ArrayEngine_meanStdFromSums
+from SharedState import SharedState, SharedState_attach, \
+    SharedState_detach
+
+#####################################################################
+# Types of the per-agent arrays kept in shared memory: the state of #
+# the array engine along with the current exercise points, which    #
+# the workers publish each tick for the neighbors of their agents   #
+#####################################################################
+Partition_sharedTypes = {'SE': np.float64, 'oldSE': np.float64, \
+    'hasCoach': np.bool_, 'lowLevel': np.int64, 'medLevel': np.int64, \
+    'highLevel': np.int64, 'oldLowLevel': np.int64, \
+    'oldMedLevel': np.int64, 'oldHighLevel': np.int64, \
+    'exercisePts': np.int64}
+
+#####################################################################
+# Given the row pointers and column indices of the rows of a CSR    #
+# graph, returns the positions in indices of the neighbors of each  #
+# of the given rows, concatenated                                   #
+#####################################################################
+def Partition_getNeighborPositions(indptr, rows):
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + \
+        np.arange(lengths.sum())
+
+#####################################################################
+# Given the adjacency arrays of a graph (indptr, indices) and the   #
+# number of parts, splits the nodes into that many parts of equal   #
+# size with few edges between them: the nodes are ordered by a      #
+# breadth-first search (so neighbors end up close to one another)   #
+# and the order is cut into consecutive runs. Returns the sorted    #
+# node indices of each part                                         #
+#####################################################################
+def Partition_partitionGraph(indptr, indices, numParts):
+    nodeCount = len(indptr) - 1
+    visited = np.zeros(nodeCount, dtype=bool)
+    order = []
+    nextStart = 0
+    while nextStart < nodeCount:
+        if visited[nextStart]:
+            nextStart += 1
+            continue
+
+        # Expands the component of nextStart one level at a time
+        frontier = np.array([nextStart])
+        visited[nextStart] = True
+        while len(frontier) > 0:
+            order.append(frontier)
+            neighbors = indices[Partition_getNeighborPositions(indptr, \
+                frontier)]
+            neighbors = np.unique(neighbors[~visited[neighbors]])
+            visited[neighbors] = True
+            frontier = neighbors
+
+    order = np.concatenate(order) if order else np.zeros(0, np.int64)
+    return [np.sort(part) for part in np.array_split(order, numParts)]
+
+#####################################################################
+# Given the adjacency arrays of a graph and its parts, returns the  #
+# number of edges joining nodes of different parts                  #
+#####################################################################
+def Partition_countCutEdges(indptr, indices, parts):
+    label = np.zeros(len(indptr) - 1, dtype=np.int64)
+    for i, part in enumerate(parts):
+        label[part] = i
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    return int(np.count_nonzero(label[rows] != label[indices]) // 2)
+
+#####################################################################
+# Given the connection to the coordinator, the specs of the shared  #
+# topology and of the shared state (see SharedState.py) and the     #
+# node indices of the part of the worker (members), advances the    #
+# part on request: the loop run by each worker process. Only the    #
+# rows of the adjacency of the part are copied out of the topology  #
+#####################################################################
+def Partition_runWorker(connection, topologySpecs, stateSpecs, \
+        members):
+    topologyBlocks, topology = SharedState_attach(topologySpecs)
+    blocks, shared = SharedState_attach(stateSpecs, True)
+
+    indptr = topology['indptr']
+    partIndptr = np.zeros(len(members) + 1, dtype=np.int64)
+    np.cumsum(indptr[members + 1] - indptr[members], out=partIndptr[1:])
+    networkBase = NetworkBase("Partition", 0)
+    networkBase.NetworkBase_loadAdjacency(topology['nodeIDs'][members], \
+        partIndptr, topology['indices'][Partition_getNeighborPositions(\
+        indptr, members)])
+    engine = ArrayEngine(networkBase, dict((name, \
+        shared[name][members]) for name in ArrayEngine_stateNames))
+    del indptr, topology
+    SharedState_detach(topologyBlocks)
+
+    while True:
+        message = connection.recv()
+        if message[0] == 'selfUpdate':
+            # Coaches were allocated by the coordinator
+            _, time, timeImpact, coachImpact = message
+            engine.hasCoach = shared['hasCoach'][members]
+            toUpdateSE = engine.ArrayEngine_selfUpdate(time, \
+                timeImpact, coachImpact)
+            oldPts = engine.ArrayEngine_getExercisePts(True)
+            curPts = engine.ArrayEngine_getExercisePts()
+            shared['exercisePts'][members] = curPts
+            connection.send((int(oldPts.sum()), \
+                int((oldPts * oldPts).sum()), int(curPts.sum()), \
+                int((curPts * curPts).sum())))
+
+        elif message[0] == 'peerUpdate':
+            # The exercise of every agent has been published
+            _, oldStats, curStats, pastImpact, socialImpact = message
+            meanPop = np.asarray(curStats[0])
+            meanLocal = networkBase.NetworkBase_getMeanLocalExercises(\
+                shared['exercisePts'], meanPop[..., None])
+            toUpdateSE = engine.ArrayEngine_peerUpdate(toUpdateSE, \
+                oldPts, oldStats, curStats, meanLocal, pastImpact, \
+                socialImpact)
+            engine.ArrayEngine_levelUpdate(toUpdateSE)
+            for name in ArrayEngine_stateNames:
+                shared[name][members] = getattr(engine, name)
+            connection.send(True)
+
+        else:
+            break
+
+    del shared
+    SharedState_detach(blocks)
+    connection.send(True)
+
+class PartitionedSimulation:
+    #################################################################
+    # Given a network base (with its agents, or array engine, set)  #
+    # and the number of parts (and so worker processes), partitions #
+    # its graph and copies the state of its agents into shared      #
+    # memory (see SharedState.py), along with its topology. The     #
+    # coaches are allocated by the network base, drawing            #
+    # from its random streams, so that the run is identical to one  #
+    # advanced by the array engine in a single process              #
+    #################################################################
+    def __init__(self, networkBase, numParts = 2):
+        if not isinstance(numParts, int) or numParts < 1:
+            sys.stderr.write("Number of parts must be a positive int")
+            return None
+
+        self.networkBase = networkBase
+        self.numParts = numParts
+        nodeIDs, indptr, indices = networkBase.NetworkBase_getAdjacency()
+        self.parts = Partition_partitionGraph(indptr, indices, numParts)
+        self.cutEdges = Partition_countCutEdges(indptr, indices, \
+            self.parts)
+
+        states = networkBase.NetworkBase_getStates()
+        states['exercisePts'] = np.zeros(len(nodeIDs), dtype=np.int64)
+        self.topology = SharedState({'nodeIDs': nodeIDs, \
+            'indptr': indptr, 'indices': indices})
+        self.state = SharedState(dict((name, np.asarray(states[name], \
+            dtype=dtype)) for name, dtype in \
+            Partition_sharedTypes.items()))
+        self.shared = self.state.arrays
+
+        self.workers = []
+        self.connections = []
+        self.PartitionedSimulation_startWorkers()
+
+    #################################################################
+    # Starts one worker process per part, each attaching to the     #
+    # shared topology and state                                     #
+    #################################################################
+    def PartitionedSimulation_startWorkers(self):
+        topologySpecs = self.topology.SharedState_getSpecs()
+        stateSpecs = self.state.SharedState_getSpecs()
+        for members in self.parts:
+            connection, workerConnection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target = \
+                Partition_runWorker, args=(workerConnection, \
+                topologySpecs, stateSpecs, members))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+            self.connections.append(connection)
+
+    #################################################################
+    # Given a message, sends it to every worker and returns their   #
+    # replies (in the order of the parts)                           #
+    #################################################################
+    def PartitionedSimulation_broadcast(self, message):
+        for connection in self.connections:
+            connection.send(message)
+        return [connection.recv() for connection in self.connections]
+
+    #################################################################
+    # Simulates updating all agents over a single time step, as     #
+    # ArrayEngine_timeStep does: the coaches are allocated here,    #
+    # then each worker updates its part in two rounds, between      #
+    # which the exercise of every agent is published and the        #
+    # population statistics are reduced from the sums of the parts  #
+    #################################################################
+    def PartitionedSimulation_timeStep(self, time, timeImpact = .005, \
+            coachImpact = .225, pastImpact = .025, socialImpact = .015):
+        profiler = self.networkBase.profiler
+        shared = self.shared
+
+        profiler.Profiler_start('coaches')
+        shared['hasCoach'][:] = self.networkBase.\
+            NetworkBase_allocateCoaches(shared['hasCoach'], \
+            shared['SE'], shared['oldSE'])
+        profiler.Profiler_stop('coaches')
+
+        profiler.Profiler_start('selfUpdate')
+        sums = np.array(self.PartitionedSimulation_broadcast(( \
+            'selfUpdate', time, timeImpact, coachImpact)), \
+            dtype=np.int64).sum(axis=0)
+        profiler.Profiler_stop('selfUpdate')
+
+        nodeCount = len(shared['SE'])
+        oldStats = ArrayEngine_meanStdFromSums(sums[0], sums[1], \
+            nodeCount)
+        curStats = ArrayEngine_meanStdFromSums(sums[2], sums[3], \
+            nodeCount)
+
+        profiler.Profiler_start('peerUpdate')
+        self.PartitionedSimulation_broadcast(('peerUpdate', \
+            tuple(float(stat) for stat in oldStats), \
+            tuple(float(stat) for stat in curStats), pastImpact, \
+            socialImpact))
+        profiler.Profiler_stop('peerUpdate')
+
+    #################################################################
+    # Returns a copy of the state of the population, as a dict of   #
+    # arrays keyed by ArrayEngine_stateNames                        #
+    #################################################################
+    def PartitionedSimulation_getStates(self):
+        return dict((name, self.shared[name].copy()) for name in \
+            ArrayEngine_stateNames)
+
+    #################################################################
+    # Stops the workers, returning False if any of them could not   #
+    # be stopped cleanly (i.e. it died), in which case it is        #
+    # terminated                                                    #
+    #################################################################
+    def PartitionedSimulation_stopWorkers(self):
+        stopped = True
+        for connection, worker in zip(self.connections, self.workers):
+            try:
+                connection.send(('close',))
+                connection.recv()
+            except (OSError, EOFError):
+                stopped = False
+                worker.terminate()
+            worker.join()
+            connection.close()
+        self.workers = []
+        self.connections = []
+        return stopped
+
+    #################################################################
+    # Stops the workers, copies the state of the population back    #
+    # onto the network base (unless a worker died) and releases the #
+    # shared memory, even if stopping the workers fails             #
+    #################################################################
+    def PartitionedSimulation_close(self):
+        try:
+            if self.workers and self.PartitionedSimulation_stopWorkers():
+                self.networkBase.NetworkBase_setStates(\
+                    self.PartitionedSimulation_getStates())
+        finally:
+            self.shared = {}
+            self.state.SharedState_close()
+            self.topology.SharedState_close()
@@ -0,0 +1,172 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: Profiler.py                                                 #
+# Description: Records the wall time and call count of each phase   #
+# of the simulation tick by tick (along with the memory allocated   #
+# in them on demand) and reports them as a summary or a trace       #
+#####################################################################
+
+import sys
+import os
+import json
+import time
+import tracemalloc
+
+class Profiler:
+    #################################################################
+    # Creates a profiler. Pass in True for trace to keep the time   #
+    # of every phase in every tick (see Profiler_getTrace) and for  #
+    # allocations to also track the memory allocated in each phase  #
+    # with tracemalloc, which slows the run down considerably       #
+    #################################################################
+    def __init__(self, trace = False, allocations = False):
+        self.enabled = True
+        self.trace = trace
+        self.allocations = allocations
+
+        self.calls = {}
+        self.seconds = {}
+        self.tickPhaseSeconds = {}
+        self.allocatedBytes = {}
+        self.peakBytes = {}
+
+        self.started = {}
+        self.tickCount = 0
+        self.tickSeconds = 0.0
+        self.tickStart = None
+        self.tickPhases = None
+        self.ticks = []
+
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    #################################################################
+    # Given the name of a phase, starts timing it. Phases must not  #
+    # be nested if allocations are tracked, as the peak is reset at #
+    # the start of each                                             #
+    #################################################################
+    def Profiler_start(self, name):
+        if self.allocations:
+            tracemalloc.reset_peak()
+            self.started[name] = (time.perf_counter(), \
+                tracemalloc.get_traced_memory()[0])
+        else:
+            self.started[name] = (time.perf_counter(), 0)
+
+    #################################################################
+    # Given the name of a phase started before, stops timing it and #
+    # adds its time (and allocations) to its totals                 #
+    #################################################################
+    def Profiler_stop(self, name):
+        end = time.perf_counter()
+        start, startBytes = self.started.pop(name)
+        elapsed = end - start
+
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+        if self.tickStart is not None:
+            self.tickPhaseSeconds[name] = self.tickPhaseSeconds.get(\
+                name, 0.0) + elapsed
+        if self.allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            self.allocatedBytes[name] = self.allocatedBytes.get(name, \
+                0) + current - startBytes
+            self.peakBytes[name] = max(self.peakBytes.get(name, 0), \
+                peak - startBytes)
+        if self.tickPhases is not None:
+            self.tickPhases[name] = self.tickPhases.get(name, 0.0) + \
+                elapsed
+
+    #################################################################
+    # Given the index of a tick, marks its start                    #
+    #################################################################
+    def Profiler_startTick(self, tick):
+        self.tickStart = (tick, time.perf_counter())
+        if self.trace:
+            self.tickPhases = {}
+
+    #################################################################
+    # Marks the end of the tick started last, adding it to the      #
+    # trace if one is kept                                          #
+    #################################################################
+    def Profiler_endTick(self):
+        tick, start = self.tickStart
+        elapsed = time.perf_counter() - start
+        self.tickCount += 1
+        self.tickSeconds += elapsed
+        if self.trace:
+            self.ticks.append({'tick': tick, 'seconds': elapsed, \
+                'phases': self.tickPhases})
+            self.tickPhases = None
+        self.tickStart = None
+
+    #################################################################
+    # Returns the summary of the run as a dict: the number of ticks #
+    # and their total time, and for each phase its call count,      #
+    # total and mean time, share of the tick time (counting only    #
+    # the time spent in it within ticks, None if never timed in     #
+    # one, so shares add up to at most 1) and (if tracked) net and  #
+    # peak allocated bytes                                          #
+    #################################################################
+    def Profiler_getSummary(self):
+        phases = {}
+        for name in self.calls:
+            share = None
+            if name in self.tickPhaseSeconds and self.tickSeconds > 0:
+                share = self.tickPhaseSeconds[name] / self.tickSeconds
+            phase = {
+                'calls': self.calls[name],
+                'seconds': self.seconds[name],
+                'meanSeconds': self.seconds[name] / self.calls[name],
+                'share': share
+            }
+            if self.allocations:
+                phase['allocatedBytes'] = self.allocatedBytes[name]
+                phase['peakBytes'] = self.peakBytes[name]
+            phases[name] = phase
+
+        return {'ticks': self.tickCount, 'tickSeconds': \
+            self.tickSeconds, 'phases': phases}
+
+    #################################################################
+    # Returns the trace of the run: a list with, for each tick, its #
+    # index, time and the time of each phase in it (empty unless    #
+    # created with trace)                                           #
+    #################################################################
+    def Profiler_getTrace(self):
+        return self.ticks
+
+    #################################################################
+    # Given the path of the report, writes the summary (and the     #
+    # trace if kept) to it as JSON                                  #
+    #################################################################
+    def Profiler_writeReport(self, path):
+        report = {'summary': self.Profiler_getSummary()}
+        if self.trace:
+            report['trace'] = self.Profiler_getTrace()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+#####################################################################
+# Profiler that records nothing, used when profiling is off so that #
+# the instrumented code costs only an empty method call per phase   #
+#####################################################################
+class NullProfiler(Profiler):
+    def __init__(self):
+        Profiler.__init__(self)
+        self.enabled = False
+
+    def Profiler_start(self, name):
+        pass
+
+    def Profiler_stop(self, name):
+        pass
+
+    def Profiler_startTick(self, tick):
+        pass
+
+    def Profiler_endTick(self):
+        pass
+
+# Shared profiler used by default (records nothing)
+Profiler_null = NullProfiler()
@@ -0,0 +1,88 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: RandomStreams.py                                            #
+# Description: Derives independent, named random number streams     #
+# from the seed of a simulation, so that runs can be reproduced and #
+# each source of randomness can be drawn from in batches            #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+
+#####################################################################
+# Names of the streams derived from a seed. Each stream is spawned  #
+# from the seed by its position here, so new streams must only ever #
+# be appended to keep earlier runs reproducible                     #
+#####################################################################
+RandomStreams_names = ['topology', 'initialState', 'coachAcquire', \
+    'coachRetain', 'coachAllocate']
+
+class RandomStreams:
+    #################################################################
+    # Given a seed (an int, or None to draw one from the OS) and    #
+    # optionally a key (a tuple of ints, i.e. the index of a        #
+    # replicate or shard), derives one generator per name in        #
+    # RandomStreams_names. Streams with the same seed and key are   #
+    # identical whichever process they are created in               #
+    #################################################################
+    def __init__(self, seed = None, key = ()):
+        if seed is not None and not isinstance(seed, int):
+            sys.stderr.write("Seed must be of type int")
+            return None
+
+        self.seedSeq = np.random.SeedSequence(seed, spawn_key=tuple(key))
+        self.seed = self.seedSeq.entropy
+        self.key = tuple(key)
+
+        self.streams = {}
+        for name, child in zip(RandomStreams_names, \
+                self.seedSeq.spawn(len(RandomStreams_names))):
+            self.streams[name] = np.random.Generator(
+                np.random.PCG64(child))
+
+    #################################################################
+    # Returns the generator of the stream with the given name       #
+    #################################################################
+    def RandomStreams_get(self, name):
+        return self.streams[name]
+
+    #################################################################
+    # Draws and returns an int seed from the stream with the given  #
+    # name, for generators (i.e. networkx) taking an int seed       #
+    #################################################################
+    def RandomStreams_getSeed(self, name):
+        return int(self.streams[name].integers(0, 2 ** 31 - 1))
+
+    #################################################################
+    # Returns the streams for the replicate or shard with the given #
+    # key, independent of these streams and of those of other keys  #
+    #################################################################
+    def RandomStreams_forKey(self, key):
+        return RandomStreams(self.seed, self.key + tuple(key))
+
+    #################################################################
+    # Returns the state of every stream (as plain dicts of ints and #
+    # strings, suitable for JSON) along with the seed and key       #
+    #################################################################
+    def RandomStreams_getState(self):
+        return {'seed': self.seed, 'key': list(self.key),
+            'streams': dict((name, self.streams[name].bit_generator.\
+            state) for name in self.streams)}
+
+    #################################################################
+    # Given a state from RandomStreams_getState, restores the       #
+    # streams to it, so draws continue exactly where they left off  #
+    #################################################################
+    def RandomStreams_setState(self, state):
+        for name, streamState in state['streams'].items():
+            self.streams[name].bit_generator.state = streamState
+
+#####################################################################
+# Given a state from RandomStreams_getState, returns the streams it #
+# was taken from, restored to that state                            #
+#####################################################################
+def RandomStreams_fromState(state):
+    streams = RandomStreams(state['seed'], state['key'])
+    streams.RandomStreams_setState(state)
+    return streams
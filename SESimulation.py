@@ -13,21 +13,38 @@ import random,itertools
 from copy import deepcopy
 import numpy as np
 
-from NetworkBase import NetworkBase
+from NetworkBase import NetworkBase, NetworkBase_importNetworkx
+from ArrayEngine import ArrayEngine
+from SnapshotWriter import SnapshotWriter, Snapshot_toCSV
+from TrajectoryStore import TrajectoryStore
+from FrameRenderer import FrameRenderer
+from Agent import AgentFactory, Agent
+from Coach import Coach_allocationPolicies
+from RandomStreams import RandomStreams, RandomStreams_fromState
+from Profiler import Profiler_null
+from SharedState import SharedState, SharedState_attach
+from Checkpoint import Checkpoint_write, Checkpoint_read, \
+    Checkpoint_getGlobalRandomState, Checkpoint_setGlobalRandomState
 from ERNetwork import ERNetwork
 from SWNetwork import SWNetwork
 from ASFNetwork import ASFNetwork
 
-from SensitivitySimulations import *
-
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
+# Network classes by the network type of the model, used to restore
+# the network of a model from a checkpoint
+SEModel_networkClasses = {'ER': ERNetwork, 'SW': SWNetwork, \
+    'ASF': ASFNetwork}
+
+# Parameters of the model kept in the header of its checkpoints
+SEModel_checkpointParams = ['timeImpact', 'coachImpact', 'pastImpact', \
+    'socialImpact', 'networkType', 'timeSpan', 'numAgents', \
+    'numCoaches', 'seed', 'coachPolicy']
+
+# Parameters of the model that may be changed when forking it into a
+# scenario (see SEModel_fork)
+SEModel_forkParams = ['timeImpact', 'coachImpact', 'pastImpact', \
+    'socialImpact', 'timeSpan', 'numCoaches', 'coachPolicy']
 
 class SEModel:
     #################################################################
@@ -35,16 +52,42 @@ class SEModel:
     # in years, and sensitivity to the different update methods,    #
     # produces an SE simulation object. The default values for the  #
     # impact parameters are as follow: timeImpact = .005,           #
-    # coachImpact = .225, pastImpact = .025, socialImpact = .015    #
+    # coachImpact = .225, pastImpact = .025, socialImpact = .015.   #
+    # If given a seed, the run is reproducible: the topology, the   #
+    # initial states and the coach draws each come from a random    #
+    # stream derived from it (see RandomStreams), and with a        #
+    # TopologyCache (topologyCache) the network is loaded from the  #
+    # cache if the same network was generated before. coachPolicy   #
+    # names the order in which coaches are allocated each tick (a   #
+    # key of Coach_allocationPolicies: random, order or neediest).  #
+    # If given topologySeed, the network is generated from it       #
+    # rather than from the topology stream (i.e. to share a network,#
+    # and its cache entry, across the points of a sweep)            #
     #################################################################
     def __init__(self, timeImpact=.005, coachImpact=.225, 
             pastImpact=.025, socialImpact=.015, networkType='ASF', \
-            timeSpan=10, numAgents=10, numCoaches = 10):
+            timeSpan=10, numAgents=10, numCoaches = 10, seed = None, \
+            topologyCache = None, coachPolicy = 'random', \
+            topologySeed = None):
         if not self.SEModel_verifySE(timeImpact, coachImpact, 
             pastImpact, socialImpact, networkType, timeSpan, \
             numAgents, numCoaches):
             return None
 
+        if seed is not None and not isinstance(seed, int):
+            sys.stderr.write("Seed must be of type int")
+            return None
+
+        if topologySeed is not None and \
+                not isinstance(topologySeed, int):
+            sys.stderr.write("Topology seed must be of type int")
+            return None
+
+        if coachPolicy not in Coach_allocationPolicies:
+            sys.stderr.write("Coach policy must be one of " +
+                ", ".join(sorted(Coach_allocationPolicies)))
+            return None
+
         self.timeImpact = timeImpact
         self.coachImpact = coachImpact
         self.pastImpact = pastImpact
@@ -55,22 +98,55 @@ class SEModel:
         self.numAgents = numAgents
         self.numCoaches = numCoaches
 
-        self.SEModel_setNetwork()
+        self.seed = seed
+        self.topologyCache = topologyCache
+        self.coachPolicy = coachPolicy
+        self.streams = None
+        if seed is not None:
+            self.streams = RandomStreams(seed)
+
+        self.tick = 0
+        self.profiler = Profiler_null
+        self.SEModel_setNetwork(topologySeed)
         
     #################################################################
     # Based on the specified value of the network type, generates   #
-    # and sets the network accordingly                              #
+    # and sets the network accordingly (from seed, defaulting to    #
+    # the next seed of the topology stream of the model if seeded). #
+    # Pass in False for createAgents to only generate its graph     #
     #################################################################
-    def SEModel_setNetwork(self):
+    def SEModel_setNetwork(self, seed = None, createAgents = True):
+        rng = None
+        if self.streams is not None:
+            if seed is None:
+                seed = self.streams.RandomStreams_getSeed('topology')
+            rng = self.streams.RandomStreams_get('initialState')
+
         if self.networkType == 'ER':
             self.network = ERNetwork(self.numAgents, self.numCoaches, \
-                10.0/self.numAgents, )
+                10.0/self.numAgents, seed, self.topologyCache, rng, \
+                createAgents)
         elif self.networkType == 'SW':
             self.network = SWNetwork(self.numAgents, self.numCoaches, \
-                10, 0.0)
+                10, 0.0, seed, self.topologyCache, rng, createAgents)
         else:
             self.network = ASFNetwork(self.numAgents, self.numCoaches,\
-                9, 7)
+                9, 7, seed = seed, cache = self.topologyCache, \
+                rng = rng, createAgents = createAgents)
+        self.network.networkBase.NetworkBase_setRandomStreams(\
+            self.streams)
+        self.network.networkBase.NetworkBase_setCoachPolicy(\
+            self.coachPolicy)
+        self.network.networkBase.NetworkBase_setProfiler(self.profiler)
+
+    #################################################################
+    # Given a Profiler (see Profiler.py), records the time spent in #
+    # each phase of every tick with it (pass in Profiler_null to    #
+    # stop profiling)                                               #
+    #################################################################
+    def SEModel_setProfiler(self, profiler):
+        self.profiler = profiler
+        self.network.networkBase.NetworkBase_setProfiler(profiler)
 
     #################################################################
     # Given parameters for initializing the simulation, ensures they#
@@ -119,43 +195,33 @@ class SEModel:
         return True
 
     #################################################################
-    # Writes the header of the CSV file to be given as output in the#
-    # specified file                                                #
+    # Returns the current data/parameters corresponding to each     #
+    # agent in the network as a dict of arrays keyed by the columns #
+    # of the snapshot file (see SnapshotWriter)                     #
     #################################################################
-    def SEModel_writeSimulationHeader(self, resultsFile):
-        if resultsFile is not None:
-            columns = ['time', 'agent_id','has_coach', 'lowLevel', \
-                'medLevel', 'highLevel', 'exercise_pts', 'SE']
-            with open(resultsFile, 'w') as f:
-                writer = csv.writer(f)
-                writer.writerow(columns)
-    
-    #################################################################
-    # Writes the current data/parameters corresponding to each agent#
-    # in the network at the current time step, given the current    #
-    # time in the simulation and the file to be written to          #
-    #################################################################
-    def SEModel_writeSimulationData(self, time, resultsFile):
-        if resultsFile is not None:
-            with open(resultsFile, 'a') as f:
-                writer = csv.writer(f)
-                Agents = self.network.networkBase.Agents
-                for agent in Agents:
-                    curAgent = Agents[agent]
-                    exLevels = curAgent.Agent_getExerciseLevels()
-                    row = [time, curAgent.agentID,                  \
-                    	curAgent.hasCoach, exLevels[0],             \
-                    	exLevels[1], exLevels[2],                   \
-                        curAgent.Agent_getExercisePts(), curAgent.SE]
-                    writer.writerow(row)
+    def SEModel_getSnapshot(self):
+        Agents = self.network.networkBase.Agents
+        agents = [Agents[agentID] for agentID in Agents]
+        return {
+            'agent_id': [agent.agentID for agent in agents],
+            'has_coach': [agent.hasCoach for agent in agents],
+            'lowLevel': [agent.lowLevel for agent in agents],
+            'medLevel': [agent.medLevel for agent in agents],
+            'highLevel': [agent.highLevel for agent in agents],
+            'exercise_pts': [agent.Agent_getExercisePts() for agent \
+                in agents],
+            'SE': [agent.SE for agent in agents]}
 
     #################################################################
     # Creates a bar graph comparing two specified values (val1,val2)#
-    # outputting result into file with fileName. Uses label, title  #
-    # for producing the graph                                       #
+    # outputting result into file with fileName (under TimeResults  #
+    # in outputDir). Uses label, title for producing the graph      #
     #################################################################
     def SEModel_createBarResults(self, val1, val2, fileName, label, 
-            title):
+            title, outputDir = "Results"):
+        import matplotlib.pyplot as plt
+        directory = os.path.join(outputDir, "TimeResults")
+        os.makedirs(directory, exist_ok=True)
         N = len(val1)
 
         ind = np.arange(N)  # the x locations for the groups
@@ -178,19 +244,221 @@ class SEModel:
 
         ax.set_xticklabels(labels)
         ax.legend( (rects1[0], rects2[0]), ('Before', 'After') )
-        plt.savefig("Results\\TimeResults\\" + fileName + ".png")
+        plt.savefig(os.path.join(directory, fileName + ".png"))
         plt.close()
 
+    #################################################################
+    # Given the directory to record the trajectory of the agents to #
+    # (or None), the number of ticks to be run and the tick the run #
+    # starts from, returns the TrajectoryStore to record into: it   #
+    # holds the state of every agent before each tick along with    #
+    # the final state                                               #
+    #################################################################
+    def SEModel_createTrajectory(self, trajectoryDir, numTicks, \
+            startTick = 0):
+        if trajectoryDir is None:
+            return None
+        agentIDs = self.network.networkBase.NetworkBase_getAdjacency()[0]
+        return TrajectoryStore(trajectoryDir, numTicks + 1, agentIDs, \
+            startTick)
+
+    #################################################################
+    # Given the results file, writes a snapshot of the agents at the#
+    # current tick into it, as a CSV in the results format or as a  #
+    # (compressed unless compress is False) binary snapshot file if #
+    # outputFormat is 'snapshot'                                    #
+    #################################################################
+    def SEModel_writeFinalState(self, resultsFile, \
+            outputFormat = 'csv', compress = True):
+        snapshotFile = resultsFile
+        if outputFormat == 'csv':
+            snapshotFile = resultsFile + ".snap"
+
+        writer = SnapshotWriter(snapshotFile, compress)
+        writer.SnapshotWriter_write(self.tick, \
+            self.SEModel_getSnapshot())
+        writer.SnapshotWriter_close()
+        if outputFormat == 'csv':
+            Snapshot_toCSV(snapshotFile, resultsFile)
+            os.remove(snapshotFile)
+
+    #################################################################
+    # Given the tick, returns the state of the model as a header    #
+    # (its parameters, the type of its network base and the state   #
+    # of its random streams, all JSON-serializable) and a dict of   #
+    # the arrays of the topology and of the state of every agent    #
+    #################################################################
+    def SEModel_getState(self, tick):
+        networkBase = self.network.networkBase
+        nodeIDs, indptr, indices = networkBase.NetworkBase_getAdjacency()
+        arrays = dict(networkBase.NetworkBase_getStates(), \
+            nodeIDs=nodeIDs, indptr=indptr, indices=indices)
+
+        header = {
+            'tick': tick,
+            'params': dict((name, getattr(self, name)) for name in \
+                SEModel_checkpointParams),
+            'baseType': networkBase.networkType,
+            'streams': None
+        }
+        if self.streams is not None:
+            header['streams'] = self.streams.RandomStreams_getState()
+        return header, arrays
+
+    #################################################################
+    # Publishes the state of the model at its current tick (see     #
+    # SEModel_getState) into shared memory for worker processes.    #
+    # Returns the SharedState holding it, which the caller closes   #
+    # once the workers are done, and the handle to pass to them     #
+    # (see SEModel_attachState), small enough to send with a task   #
+    #################################################################
+    def SEModel_publishState(self):
+        header, arrays = self.SEModel_getState(self.tick)
+        shared = SharedState(arrays)
+        return shared, {'header': header, \
+            'specs': shared.SharedState_getSpecs()}
+
+    #################################################################
+    # Given the path of the checkpoint and the tick from which the  #
+    # run is to resume (i.e. the number of ticks already run),      #
+    # writes a checkpoint of the full state of the model: its       #
+    # parameters, the topology, the state of every agent and the    #
+    # state of its random streams (or of the global generators if   #
+    # not seeded). See SEModel_loadCheckpoint to restore it         #
+    #################################################################
+    def SEModel_saveCheckpoint(self, path, tick, compress = True):
+        header, arrays = self.SEModel_getState(tick)
+        if self.streams is None:
+            header['globalRandom'], arrays['numpyKeys'] = \
+                Checkpoint_getGlobalRandomState()
+        Checkpoint_write(path, header, arrays, compress)
+
+    #################################################################
+    # Given the header and arrays of a checkpoint, sets the network #
+    # of the model to the topology and agents held in it. If given  #
+    # the network base of another model (source), its topology is   #
+    # shared rather than read from the arrays                       #
+    #################################################################
+    def SEModel_restoreNetwork(self, header, arrays, source = None):
+        networkClass = SEModel_networkClasses[self.networkType]
+        network = networkClass.__new__(networkClass)
+        network.nodeCount = self.numAgents
+        network.maxCoachCount = self.numCoaches
+        network.Agents = {}
+        network.networkBase = NetworkBase(header['baseType'], \
+            self.numCoaches)
+
+        networkBase = network.networkBase
+        if source is not None:
+            networkBase.NetworkBase_shareAdjacency(source)
+        else:
+            networkBase.NetworkBase_loadAdjacency(arrays['nodeIDs'], \
+                arrays['indptr'], arrays['indices'])
+        nodeIDs = networkBase.NetworkBase_getAdjacency()[0]
+        for agentID in nodeIDs.tolist():
+            network.Agents[agentID] = Agent(0.0, network, agentID, 0, \
+                0, 0, 0, 0, 0, 0, verify = False)
+        networkBase.NetworkBase_setAgents(network.Agents)
+        networkBase.NetworkBase_setStates(arrays)
+
+        networkBase.NetworkBase_setRandomStreams(self.streams)
+        networkBase.NetworkBase_setCoachPolicy(self.coachPolicy)
+        networkBase.NetworkBase_setProfiler(self.profiler)
+        self.network = network
+
+    #################################################################
+    # Given a dict of parameters to change (keys of                 #
+    # SEModel_forkParams, i.e. {'numCoaches': 20}), returns a copy  #
+    # of the model at its current tick with those changed, to run a #
+    # scenario from the state reached so far. The topology is       #
+    # shared with this model and the agent states copied. The       #
+    # random streams continue from their current state, so forks    #
+    # with unchanged parameters run exactly as this model would     #
+    #################################################################
+    def SEModel_fork(self, changes = None):
+        if changes is None:
+            changes = {}
+        for name in changes:
+            if name not in SEModel_forkParams:
+                sys.stderr.write("Forked parameters must be among " +
+                    ", ".join(SEModel_forkParams))
+                return None
+
+        params = dict((name, getattr(self, name)) for name in \
+            SEModel_checkpointParams)
+        params.update(changes)
+        if not self.SEModel_verifySE(params['timeImpact'], \
+                params['coachImpact'], params['pastImpact'], \
+                params['socialImpact'], params['networkType'], \
+                params['timeSpan'], params['numAgents'], \
+                params['numCoaches']):
+            return None
+        if params['coachPolicy'] not in Coach_allocationPolicies:
+            sys.stderr.write("Coach policy must be one of " +
+                ", ".join(sorted(Coach_allocationPolicies)))
+            return None
+
+        model = SEModel.__new__(SEModel)
+        for name in params:
+            setattr(model, name, params[name])
+        model.topologyCache = self.topologyCache
+        model.profiler = self.profiler
+        model.streams = None
+        if self.streams is not None:
+            model.streams = RandomStreams_fromState(\
+                self.streams.RandomStreams_getState())
+
+        networkBase = self.network.networkBase
+        states = networkBase.NetworkBase_getStates()
+        model.SEModel_restoreNetwork({'baseType': \
+            networkBase.networkType}, states, networkBase)
+        model.tick = self.tick
+        return model
+
     #################################################################
     # Runs simulation over the desired timespan and produces/outputs#
-    # results in CSV file specified along with displaying graphics  #
+    # results in the file specified along with displaying graphics. #
+    # A snapshot of the agents is taken every snapshotInterval      #
+    # ticks and written as a (compressed unless compress is False)  #
+    # binary snapshot file, converted to CSV at the end of the run  #
+    # if outputFormat is 'csv' (pass in 'snapshot' to keep it as is)#
+    # If given trajectoryDir, every tick is also recorded there     #
+    # (see SEModel_createTrajectory). Frames of the network are     #
+    # drawn by renderWorkers background processes (in the loop if   #
+    # 0), and assembled into animationFile (a GIF) if given. The    #
+    # frames and bar graphs are saved under outputDir               #
     #################################################################
-    def SEModel_runSimulation(self, resultsFile):
-        self.SEModel_writeSimulationHeader(resultsFile)
+    def SEModel_runSimulation(self, resultsFile, snapshotInterval = 10, \
+            outputFormat = 'csv', compress = True, \
+            trajectoryDir = None, renderWorkers = 1, \
+            animationFile = None, outputDir = "Results"):
+        if not isinstance(snapshotInterval, int) or snapshotInterval < 1:
+            sys.stderr.write("Snapshot interval must be a positive int")
+            return
+
+        if outputFormat != 'csv' and outputFormat != 'snapshot':
+            sys.stderr.write("Output format must either be csv or " +
+                "snapshot")
+            return
+
+        writer = None
+        if resultsFile is not None:
+            snapshotFile = resultsFile
+            if outputFormat == 'csv':
+                snapshotFile = resultsFile + ".snap"
+            writer = SnapshotWriter(snapshotFile, compress)
 
         # Converts from years to "ticks" (represent 2 week span)
         numTicks = self.timeSpan * 26
-        pos = nx.random_layout(self.network.G)
+        trajectory = self.SEModel_createTrajectory(trajectoryDir, \
+            numTicks)
+        # The graph is only needed for the layout, drawn from the
+        # adjacency arrays afterwards
+        nx = NetworkBase_importNetworkx()
+        pos = nx.random_layout(self.network.networkBase.\
+            NetworkBase_getGraph())
+        self.network.networkBase.NetworkBase_releaseGraph()
+        renderer = FrameRenderer(renderWorkers, animationFile)
         
         SEBefore = []
         ExBefore = []
@@ -200,13 +468,28 @@ class SEModel:
             SEBefore.append(agent.SE)
             ExBefore.append(agent.Agent_getExercisePts())
 
+        profiler = self.profiler
         for i in range(0, numTicks):
-            if i % 10 == 0:
-                self.SEModel_writeSimulationData(i, resultsFile)    
+            profiler.Profiler_startTick(i)
+            if trajectory is not None:
+                profiler.Profiler_start('trajectory')
+                trajectory.TrajectoryStore_recordNetwork(\
+                    self.network.networkBase)
+                profiler.Profiler_stop('trajectory')
+
+            if i % snapshotInterval == 0:
+                if writer is not None:
+                    profiler.Profiler_start('snapshot')
+                    writer.SnapshotWriter_write(i, \
+                        self.SEModel_getSnapshot())
+                    profiler.Profiler_stop('snapshot')
                 
                 print("Plotting time step " + str(i))
+                profiler.Profiler_start('plotting')
                 self.network.networkBase.\
-                    NetworkBase_visualizeNetwork(False, i, pos)
+                    NetworkBase_visualizeNetwork(False, i, pos, \
+                    renderer, outputDir)
+                profiler.Profiler_stop('plotting')
 
             # Updates the agents in the network base and copies those
             # to the network
@@ -214,6 +497,23 @@ class SEModel:
                 self.timeImpact, self.coachImpact, self.pastImpact, \
                 self.socialImpact)
             self.network.Agents = self.network.networkBase.Agents
+            profiler.Profiler_endTick()
+
+        if trajectory is not None:
+            trajectory.TrajectoryStore_recordNetwork(\
+                self.network.networkBase)
+            trajectory.TrajectoryStore_close()
+
+        profiler.Profiler_start('plotting')
+        renderer.FrameRenderer_close()
+        profiler.Profiler_stop('plotting')
+        if writer is not None:
+            profiler.Profiler_start('snapshot')
+            writer.SnapshotWriter_close()
+            if outputFormat == 'csv':
+                Snapshot_toCSV(snapshotFile, resultsFile)
+                os.remove(snapshotFile)
+            profiler.Profiler_stop('snapshot')
 
         SEAfter = []
         ExAfter = []
@@ -225,62 +525,489 @@ class SEModel:
 
         # Creates bar graphs of change in SE, exercise for individuals
         self.SEModel_createBarResults(SEBefore, SEAfter, \
-            "BarSEResults", "SE", "SE Before/After")
+            "BarSEResults", "SE", "SE Before/After", outputDir)
         self.SEModel_createBarResults(ExBefore, ExAfter, \
-            "BarExResults", "Exercise Pts", "Exercise Pts Before/After")
+            "BarExResults", "Exercise Pts", \
+            "Exercise Pts Before/After", outputDir)
 
     #################################################################
     # Runs simulation over the desired timespan without producing   #
-    # visible output: used for sensitivity analysis                 #
+    # visible output: used for sensitivity analysis. Pass in True   #
+    # for vectorized to use the array engine for the updates. If    #
+    # given trajectoryDir, every tick is recorded there. Pass in    #
+    # True for incremental to maintain the neighbor sums of the     #
+    # social update incrementally (see NetworkBase_setIncremental). #
+    # If given a ConvergenceMonitor (monitor), the run stops early  #
+    # once it declares steady state, the tick of which is kept in   #
+    # convergedTick (None if the run never settled, as flagged by   #
+    # the monitor). The monitor is reset at the start of a fresh    #
+    # run (startTick of 0) and keeps its history when resuming one. #
+    # If given checkpointFile, a checkpoint is written there every  #
+    # checkpointInterval ticks; a model restored from it (see       #
+    # SEModel_loadCheckpoint) resumes the run when given its tick   #
+    # as startTick. The run stops before endTick if given (the tick #
+    # reached is kept in tick)                                      #
     #################################################################
-    def SEModel_runStreamlineSimulation(self):
+    def SEModel_runStreamlineSimulation(self, vectorized = False, \
+            trajectoryDir = None, incremental = False, monitor = None, \
+            startTick = 0, checkpointFile = None, \
+            checkpointInterval = 26, endTick = None):
+        if checkpointFile is not None and (not isinstance(\
+                checkpointInterval, int) or checkpointInterval < 1):
+            sys.stderr.write("Checkpoint interval must be a " +
+                "positive int")
+            return
+
+        if monitor is not None:
+            if startTick == 0:
+                monitor.ConvergenceMonitor_reset()
+            elif monitor.converged:
+                sys.stderr.write("Monitor has already declared steady " +
+                    "state, so the run cannot be resumed with it\n")
+                return
+
         numTicks = self.timeSpan * 26
+        if endTick is not None:
+            numTicks = min(numTicks, endTick)
+        self.network.networkBase.NetworkBase_setIncremental(incremental)
+        trajectory = self.SEModel_createTrajectory(trajectoryDir, \
+            numTicks - startTick, startTick)
+        self.convergedTick = None
+
+        profiler = self.profiler
+        self.tick = startTick
+        for i in range(startTick, numTicks):
+            profiler.Profiler_startTick(i)
+            if trajectory is not None:
+                profiler.Profiler_start('trajectory')
+                trajectory.TrajectoryStore_recordNetwork(\
+                    self.network.networkBase)
+                profiler.Profiler_stop('trajectory')
 
-        for i in range(0, numTicks):
             # Updates the agents in the network base and copies those
             # to the network
             self.network.networkBase.NetworkBase_updateAgents(i, \
                 self.timeImpact, self.coachImpact, self.pastImpact, \
-                self.socialImpact)
-            self.network.Agents = self.network.networkBase.Agents
+                self.socialImpact, vectorized)
+            self.tick = i + 1
+
+            if checkpointFile is not None and \
+                    (i + 1) % checkpointInterval == 0:
+                profiler.Profiler_start('checkpoint')
+                self.SEModel_saveCheckpoint(checkpointFile, i + 1)
+                profiler.Profiler_stop('checkpoint')
+
+            if monitor is None:
+                profiler.Profiler_endTick()
+                continue
+            profiler.Profiler_start('monitor')
+            stats = self.network.networkBase.NetworkBase_getPopStats()
+            converged = monitor.ConvergenceMonitor_observe(i, stats)
+            profiler.Profiler_stop('monitor')
+            profiler.Profiler_endTick()
+            if converged:
+                self.convergedTick = monitor.convergedTick
+                break
+
+        if trajectory is not None:
+            trajectory.TrajectoryStore_recordNetwork(\
+                self.network.networkBase)
+            trajectory.TrajectoryStore_close()
+
+        self.network.networkBase.NetworkBase_syncAgents()
+        self.network.Agents = self.network.networkBase.Agents
+
+    #################################################################
+    # Runs the simulation without visible output (as                #
+    # SEModel_runStreamlineSimulation does) from startTick up to    #
+    # endTick if given, with the graph split into numParts parts    #
+    # each advanced by its own process (see PartitionedSimulation). #
+    # The results are identical to those of a vectorized run        #
+    #################################################################
+    def SEModel_runPartitionedSimulation(self, numParts = 2, \
+            startTick = 0, endTick = None):
+        from PartitionedSimulation import PartitionedSimulation
+        numTicks = self.timeSpan * 26
+        if endTick is not None:
+            numTicks = min(numTicks, endTick)
+
+        simulation = PartitionedSimulation(self.network.networkBase, \
+            numParts)
+        if not hasattr(simulation, 'workers'):
+            return
+
+        profiler = self.profiler
+        self.tick = startTick
+        try:
+            for i in range(startTick, numTicks):
+                profiler.Profiler_startTick(i)
+                simulation.PartitionedSimulation_timeStep(i, \
+                    self.timeImpact, self.coachImpact, self.pastImpact, \
+                    self.socialImpact)
+                self.tick = i + 1
+                profiler.Profiler_endTick()
+        finally:
+            simulation.PartitionedSimulation_close()
+        self.network.Agents = self.network.networkBase.Agents
+
+    #################################################################
+    # Given the tick at which scenarios branch off and a list of    #
+    # dicts of the parameters changed in each (see SEModel_fork),   #
+    # runs the shared prefix up to branchTick once on this model,   #
+    # then forks it into the scenarios and runs each from there on  #
+    # (see SEModel_runStreamlineSimulation for vectorized and       #
+    # incremental). With numWorkers above 1, the scenarios are run  #
+    # by that many processes, attached to the state at branchTick   #
+    # published in shared memory (see SEModel_publishState).        #
+    # Returns the list of the finished scenarios                    #
+    #################################################################
+    def SEModel_runScenarios(self, branchTick, scenarios, \
+            vectorized = False, incremental = False, numWorkers = 1):
+        if self.tick < branchTick:
+            self.SEModel_runStreamlineSimulation(vectorized, \
+                incremental = incremental, startTick = self.tick, \
+                endTick = branchTick)
+
+        forks = []
+        for changes in scenarios:
+            fork = self.SEModel_fork(changes)
+            if fork is None:
+                return None
+            forks.append(fork)
+
+        if numWorkers <= 1:
+            for fork in forks:
+                fork.SEModel_runStreamlineSimulation(vectorized, \
+                    incremental = incremental, startTick = fork.tick)
+            return forks
+
+        from concurrent.futures import ProcessPoolExecutor
+        shared, handle = self.SEModel_publishState()
+        try:
+            with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+                results = list(executor.map(SEModel_runScenarioTask, \
+                    [(handle, changes, vectorized, incremental) \
+                    for changes in scenarios]))
+        finally:
+            shared.SharedState_close()
+
+        for fork, (states, streams, tick) in zip(forks, results):
+            fork.network.networkBase.NetworkBase_setStates(states)
+            if streams is not None:
+                fork.streams = RandomStreams_fromState(streams)
+                fork.network.networkBase.NetworkBase_setRandomStreams(\
+                    fork.streams)
+            fork.tick = tick
+        return forks
+
+    #################################################################
+    # Runs numReplicates independent replicates of the simulation   #
+    # together, advancing all of them in (replicate x agent) arrays #
+    # with the array engine. Each replicate draws its own initial   #
+    # state; pass in False for shareTopology for each to also have  #
+    # its own network (only its graph is generated, as the agents   #
+    # live in the arrays). Returns the final results in the form    #
+    # [[MeanExercise, MeanSE], ...], one pair per replicate         #
+    #################################################################
+    def SEModel_runEnsemble(self, numReplicates, shareTopology = True):
+        if not isinstance(numReplicates, int) or numReplicates < 1:
+            sys.stderr.write("Number of replicates must be a " +
+                "positive int\n")
+            return None
+
+        networkBase = self.network.networkBase
+        if not shareTopology:
+            network = self.network
+            replicateBases = []
+            for i in range(0, numReplicates):
+                self.SEModel_setNetwork(createAgents = False)
+                replicateBases.append(self.network.networkBase)
+            self.network = network
+
+            networkBase = NetworkBase(networkBase.networkType, \
+                self.numCoaches)
+            networkBase.NetworkBase_stackAdjacency(replicateBases)
+            networkBase.NetworkBase_setRandomStreams(self.streams)
+            networkBase.NetworkBase_setCoachPolicy(self.coachPolicy)
+
+        rng = None
+        if self.streams is not None:
+            rng = self.streams.RandomStreams_get('initialState')
+        states = AgentFactory.AgentFactory_drawInitialStates( \
+            self.numCoaches, (numReplicates, self.numAgents), rng)
+        engine = ArrayEngine(networkBase, states)
+
+        numTicks = self.timeSpan * 26
+        networkBase.NetworkBase_setProfiler(self.profiler)
+        for i in range(0, numTicks):
+            self.profiler.Profiler_startTick(i)
+            engine.ArrayEngine_timeStep(i, self.timeImpact, \
+                self.coachImpact, self.pastImpact, self.socialImpact)
+            self.profiler.Profiler_endTick()
+        return engine.ArrayEngine_getPopResults()
+
+#####################################################################
+# Given the path of a checkpoint written by SEModel_saveCheckpoint  #
+# (and optionally a TopologyCache for later networks), returns the  #
+# model restored from it, with the tick to resume from in tick, or  #
+# None if the file is not a checkpoint. The random streams (or the  #
+# global generators if not seeded) are restored as well, so the     #
+# resumed run continues exactly as the original would have          #
+#####################################################################
+def SEModel_loadCheckpoint(path, topologyCache = None):
+    checkpoint = Checkpoint_read(path)
+    if checkpoint is None:
+        return None
+    header, arrays = checkpoint
+
+    model = SEModel_fromHeader(header, topologyCache)
+    if model.streams is None:
+        Checkpoint_setGlobalRandomState(header['globalRandom'], \
+            arrays['numpyKeys'])
+    model.SEModel_restoreNetwork(header, arrays)
+    return model
+
+#####################################################################
+# Given the header of the state of a model (see SEModel_getState),  #
+# returns a model with its parameters, random streams and tick set, #
+# for its network to be restored                                    #
+#####################################################################
+def SEModel_fromHeader(header, topologyCache = None):
+    model = SEModel.__new__(SEModel)
+    for name in SEModel_checkpointParams:
+        setattr(model, name, header['params'][name])
+    model.topologyCache = topologyCache
+    model.profiler = Profiler_null
+    model.streams = None
+    if header['streams'] is not None:
+        model.streams = RandomStreams_fromState(header['streams'])
+    model.tick = header['tick']
+    return model
+
+# Shared states attached to by this process: {block name: arrays}
+SEModel_attachedStates = {}
+
+#####################################################################
+# Given the handle of a state published by SEModel_publishState,    #
+# returns the model restored from it in this (worker) process. The  #
+# topology is used in place from shared memory, read-only, while    #
+# the agents get private copies of their state. Each process        #
+# attaches to a published state once, for all the models built from #
+# it, and stays attached until it exits                             #
+#####################################################################
+def SEModel_attachState(handle):
+    key = handle['specs']['indices'][0]
+    if key not in SEModel_attachedStates:
+        SEModel_attachedStates[key] = SharedState_attach(\
+            handle['specs'])
+    arrays = SEModel_attachedStates[key][1]
+
+    header = handle['header']
+    source = NetworkBase(header['baseType'], 0)
+    source.NetworkBase_attachAdjacency(arrays['nodeIDs'], \
+        arrays['indptr'], arrays['indices'])
+    model = SEModel_fromHeader(header)
+    model.SEModel_restoreNetwork(header, arrays, source)
+    return model
+
+#####################################################################
+# Given a tuple of the handle of a published state, the parameters  #
+# changed by a scenario and vectorized and incremental (see         #
+# SEModel_runScenarios), runs the scenario from that state in this  #
+# (worker) process. Returns the final states of the agents, the     #
+# state of the random streams (None if not seeded) and the tick     #
+#####################################################################
+def SEModel_runScenarioTask(task):
+    handle, changes, vectorized, incremental = task
+    model = SEModel_attachState(handle).SEModel_fork(changes)
+    model.SEModel_runStreamlineSimulation(vectorized, \
+        incremental = incremental, startTick = model.tick)
+
+    streams = None
+    if model.streams is not None:
+        streams = model.streams.RandomStreams_getState()
+    return model.network.networkBase.NetworkBase_getStates(), \
+        streams, model.tick
+
+#####################################################################
+# Returns the parser of the command line of the batch driver: every #
+# parameter of SEModel along with the mode of the run, its outputs  #
+# and the sensitivity sweep (see SEModel_runBatch)                  #
+#####################################################################
+def SEModel_getArgumentParser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs the SE " +
+        "simulation (and optionally the sensitivity sweep) in batch")
+
+    model = parser.add_argument_group("model")
+    model.add_argument("--network-type", default="SW", \
+        choices=sorted(SEModel_networkClasses))
+    model.add_argument("--time-span", type=int, default=15, \
+        help="years simulated (26 ticks each)")
+    model.add_argument("--num-agents", type=int, default=25)
+    model.add_argument("--num-coaches", type=int, default=10)
+    model.add_argument("--time-impact", type=float, default=.005)
+    model.add_argument("--coach-impact", type=float, default=.225)
+    model.add_argument("--past-impact", type=float, default=.025)
+    model.add_argument("--social-impact", type=float, default=.015)
+    model.add_argument("--coach-policy", default="random", \
+        choices=sorted(Coach_allocationPolicies))
+    model.add_argument("--seed", type=int, default=None)
+
+    run = parser.add_argument_group("run")
+    run.add_argument("--mode", default=None, choices=["visual", \
+        "streamline", "none"], help="visual plots the network as it " +
+        "runs, streamline only keeps the final state, none skips the " +
+        "single simulation (i.e. to only run the sweep). Defaults to " +
+        "visual, or none with --shard or --merge")
+    run.add_argument("--vectorized", action="store_true", \
+        help="advance streamline runs with the array engine")
+    run.add_argument("--output-dir", default=".", \
+        help="directory the results are written to")
+    run.add_argument("--output-format", default="csv", \
+        choices=["csv", "snapshot"])
+    run.add_argument("--snapshot-interval", type=int, default=10)
+    run.add_argument("--no-compress", action="store_true", \
+        help="write snapshot files uncompressed")
+    run.add_argument("--animation-file", default=None, \
+        help="GIF to assemble the frames of a visual run into")
+    run.add_argument("--workers", type=int, default=1, \
+        help="processes used for the sweep and for drawing frames")
+    run.add_argument("--cache-dir", default=None, \
+        help="directory of the topology cache, reused across the " +
+        "runs of the sweep and later batches (needs --seed)")
+
+    sweep = parser.add_argument_group("sensitivity")
+    sweep.add_argument("--sensitivity", action="store_true", \
+        help="run the sensitivity sweep around the model parameters")
+    sweep.add_argument("--replicates", type=int, default=1, \
+        help="replicates run together (sharing the network) and " +
+        "averaged for every point of the sweep")
+    sweep.add_argument("--shard", default=None, metavar="I/N", \
+        help="only run shard I (from 0) of N of the sweep (requires " +
+        "--seed), writing its partial results to the output directory")
+    sweep.add_argument("--merge", nargs="+", default=None, \
+        metavar="PARTIAL", help="merge the partial results of every " +
+        "shard of the sweep and plot them")
+    return parser
+
+#####################################################################
+# Given a shard on the command line (of the form i/n), returns it   #
+# as a tuple (i, n), or None if it is not of that form              #
+#####################################################################
+def SEModel_parseShard(shard):
+    try:
+        shardIndex, shardCount = [int(part) for part in \
+            shard.split("/")]
+    except ValueError:
+        sys.stderr.write("Shard must be of the form i/n\n")
+        return None
+    return shardIndex, shardCount
+
+#####################################################################
+# Given the parsed command line (see SEModel_getArgumentParser),    #
+# runs the simulation and the sensitivity sweep it asks for,        #
+# writing the results into the output directory. Returns False if   #
+# the arguments were not appropriate                                #
+#####################################################################
+def SEModel_runBatch(args):
+    if args.replicates < 1:
+        sys.stderr.write("Number of replicates must be a positive " +
+            "int\n")
+        return False
+
+    shard = None
+    if args.shard is not None:
+        shard = SEModel_parseShard(args.shard)
+        if shard is None:
+            return False
+        if not args.sensitivity:
+            sys.stderr.write("A shard can only be run of the " +
+                "sensitivity sweep\n")
+            return False
+        if args.seed is None:
+            sys.stderr.write("A shard can only be run with a seed, " +
+                "the same for every shard\n")
+            return False
+
+    # Shards of a job array share the output directory and merging
+    # only reads the partials, so neither runs the single simulation
+    # unless asked to
+    mode = args.mode
+    if shard is not None or args.merge is not None:
+        if mode is not None and mode != "none":
+            sys.stderr.write("The single simulation cannot be run " +
+                "with --shard or --merge\n")
+            return False
+        mode = "none"
+    elif mode is None:
+        mode = "visual"
+
+    if args.cache_dir is not None and args.seed is None:
+        sys.stderr.write("Topology cache is only used with a seed, " +
+            "so --cache-dir is ignored\n")
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    compress = not args.no_compress
+    resultsFile = os.path.join(args.output_dir, "results.csv")
+    if args.output_format == 'snapshot':
+        resultsFile = os.path.join(args.output_dir, "results.snap")
+
+    if mode != "none":
+        topologyCache = None
+        if args.cache_dir is not None:
+            from TopologyCache import TopologyCache
+            topologyCache = TopologyCache(args.cache_dir)
+        simulationModel = SEModel(args.time_impact, args.coach_impact, \
+            args.past_impact, args.social_impact, args.network_type, \
+            args.time_span, args.num_agents, args.num_coaches, \
+            args.seed, topologyCache, args.coach_policy)
+        if not hasattr(simulationModel, 'network'):
+            return False
+
+    if mode == "visual":
+        simulationModel.SEModel_runSimulation(resultsFile, \
+            args.snapshot_interval, args.output_format, compress, \
+            renderWorkers = args.workers, \
+            animationFile = args.animation_file, \
+            outputDir = args.output_dir)
+    elif mode == "streamline":
+        simulationModel.SEModel_runStreamlineSimulation(\
+            args.vectorized)
+        simulationModel.SEModel_writeFinalState(resultsFile, \
+            args.output_format, compress)
+
+    if args.sensitivity:
+        from SensitivitySimulations import \
+            Sensitivity_sensitivitySimulation
+        sweepFile = None
+        if shard is not None:
+            sweepFile = os.path.join(args.output_dir, \
+                "sensitivity_shard{}of{}.json".format(*shard))
+        results = Sensitivity_sensitivitySimulation(args.network_type, \
+            args.time_span, args.num_agents, args.num_coaches, \
+            args.time_impact, args.coach_impact, args.past_impact, \
+            args.social_impact, args.workers, args.seed, shard, \
+            sweepFile, args.output_dir, args.cache_dir, args.replicates)
+        if results is None:
+            return False
+
+    if args.merge is not None:
+        from SensitivitySimulations import Sensitivity_mergeShards
+        if Sensitivity_mergeShards(args.merge, \
+                outputDir = args.output_dir) is None:
+            return False
+    return True
 
 #####################################################################
-# Given the paramters of the simulation (upon being prompted on)    #
-# command line, runs simulation, outputting a CSV with each time    #
-# step and a graphical display corresponding to the final iteration #
+# Given the parameters of the simulation on the command line (see   #
+# SEModel_getArgumentParser, or run with --help), runs simulation,  #
+# outputting a CSV with each time step and a graphical display      #
+# corresponding to the final iteration                              #
 #####################################################################
 if __name__ == "__main__":
-    # Get all input for initializing simulation
-
-    # ER, SW, or ASF
-    networkType = "SW"
-    timeSpan = 15
-    numAgents = 25
-    numCoaches = 10
-
-    # Defaults for the impact values are as follow: 
-    # timeImpact = .005, coachImpact = .225, pastImpact = .025
-    # socialImpact = .015. Feel free to change as desired below
-    # for sensitivity analysis (automated by displaySensitive below)
-    
-    timeImpact = 0.005 
-    coachImpact = 0.225
-    pastImpact = 0.025
-    socialImpact = 0.015
-
-    displaySensitive = True
-
-    resultsFile = "Results\\TimeResults\\results.csv"
-    simulationModel = SEModel(timeImpact, coachImpact, pastImpact, \
-       socialImpact, networkType, timeSpan, numAgents, numCoaches)
-    simulationModel.SEModel_runSimulation(resultsFile)
-
-    # Runs alternative simulations for depicting effect of changing
-    # parameters on overall results -- Done before actual simulation
-    # due to bug in graphical display
-    if displaySensitive:
-        Sensitivity_sensitivitySimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-
-    print("Terminating simulation...")
\ No newline at end of file
+    args = SEModel_getArgumentParser().parse_args()
+    if not SEModel_runBatch(args):
+        sys.exit(2)
+    print("Terminating simulation...")
@@ -11,27 +11,26 @@ import random,itertools
 from copy import deepcopy
 from numpy import array, zeros, std, mean, sqrt
 
-from NetworkBase import NetworkBase
+from NetworkBase import NetworkBase, NetworkBase_importNetworkx
 from Agent import AgentFactory
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
-
 class SWNetwork:
     #################################################################
     # Given a nodeCount for the number of agents to be simulated,   #
     # number of coaches maximally present in the simulation, the    #
     # probability of adding a new edge for each edge present to     #
     # other nodes (defaulted to .0), and the number of neighbors to #
-    # which each node is to be connected (k) initializes SW Network #
+    # which each node is to be connected (k) initializes SW Network.#
+    # The graph is generated from seed, and if given a TopologyCache#
+    # (cache) along with a seed, is loaded from it when already     #
+    # generated before. The initial states of the agents are drawn  #
+    # from rng (a numpy Generator) if given. Pass in False for      #
+    # createAgents to only generate the graph                       #
     #################################################################
-    def __init__(self, nodeCount, maxCoachCount, k=4, p = 0.0):
+    def __init__(self, nodeCount, maxCoachCount, k=4, p = 0.0, \
+            seed = None, cache = None, rng = None, createAgents = True):
         if not self.SWNetwork_verifyNetwork(nodeCount, maxCoachCount,\
                 k, p):
             return None
@@ -41,16 +40,28 @@ class SWNetwork:
 
         self.k = k
         self.p = p
+        self.seed = seed
+        self.cache = cache
+        self.rng = rng
         self.agentFactory = AgentFactory
 
         self.Agents = {}
         self.networkBase = NetworkBase("SWNetwork", maxCoachCount)
 
-        self.SWNetwork_createAgents()
+        if createAgents:
+            self.SWNetwork_createAgents()
 
         # Sets the network base to have the agents just created and
-        # the graph just generated
-        self.networkBase.NetworkBase_setGraph(self.G)
+        # the graph just generated (or loaded), kept only as adjacency
+        # arrays: the networkx graph is built again only if requested
+        if self.cache is not None and self.seed is not None:
+            edges = self.cache.TopologyCache_getEdges("SW", \
+                self.nodeCount, (self.k, self.p), self.seed, \
+                self.SWNetwork_generateEdges)
+        else:
+            edges = self.SWNetwork_generateEdges()
+        self.networkBase.NetworkBase_setEdges(range(0, self.nodeCount), \
+            edges)
         self.networkBase.NetworkBase_setAgents(self.Agents)
     
     #################################################################
@@ -86,18 +97,33 @@ class SWNetwork:
         return True
 
     #################################################################
-    # Creates the agents present in the simulation (SW graph)       #
+    # Generates the SW graph of the network from its seed           #
     #################################################################
-    def SWNetwork_createAgents(self):
+    def SWNetwork_generateGraph(self):
+        nx = NetworkBase_importNetworkx()
         self.G = nx.generators.random_graphs.watts_strogatz_graph(
                     n = self.nodeCount,
                     k = self.k,
                     p = self.p,
-                    seed = None)
+                    seed = self.seed)
         self.G.name = "small_world_graph(%s,%s,%s)"%(self.nodeCount, \
             self.k, self.p)
 
-        for i in range(0, self.nodeCount):    
-            curAgent = self.agentFactory.\
-                AgentFactory_createAgent(self, i)
+    #################################################################
+    # Generates the SW graph and returns its edge list, as stored   #
+    # in the topology cache                                         #
+    #################################################################
+    def SWNetwork_generateEdges(self):
+        self.SWNetwork_generateGraph()
+        edges = list(self.G.edges())
+        self.G = None
+        return edges
+
+    #################################################################
+    # Creates the agents present in the simulation (SW graph)       #
+    #################################################################
+    def SWNetwork_createAgents(self):
+        agents = self.agentFactory.AgentFactory_createAgents(self, \
+            range(0, self.nodeCount), self.rng)
+        for curAgent in agents:
             self.Agents[curAgent.agentID] = curAgent
\ No newline at end of file
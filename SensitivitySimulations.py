@@ -19,28 +19,68 @@ import os
 import csv
 import random,itertools
 from copy import deepcopy
+from functools import partial
 import numpy as np
 
 from SESimulation import *
+from SweepEngine import *
 
-import matplotlib.pyplot as plt
 from operator import itemgetter 
 
-try:
-    import networkx as nx
-except ImportError:
-    raise ImportError("You must install NetworkX:\
-    (http://networkx.lanl.gov/) for SE simulation")
+#####################################################################
+# Levels of each of the parameters investigated by the sensitivity  #
+# simulations                                                       #
+#####################################################################
+Sensitivity_timeImpactTrials = [0.00, .001, .0025, .005, .0075, .01, \
+    .0125]
+Sensitivity_coachImpactTrials = [.100, .125, .15, .175, .20, .225, .25, \
+    .275, .30, .325]
+Sensitivity_pastImpactTrials = [0.0, .01, .015, .020, .025, .030, .035, \
+    .04, .045, .050]
+Sensitivity_socialImpactTrials = [0.00, .001, .005, .010, .015, .020, \
+    .025, .030, .035]
+Sensitivity_numCoachesTrials = [10, 15, 20, 25, 30, 35, 40, 45, 50]
+Sensitivity_networkTypeTrials = ["ER", "SW", "ASF"]
+
+#####################################################################
+# The sweeps conducted by Sensitivity_sensitivitySimulation, each   #
+# of the form (Varied Argument, Levels, Label). The network sweep   #
+# is kept last, as it is plotted separately                         #
+#####################################################################
+Sensitivity_sweeps = [
+    ('timeImpact', Sensitivity_timeImpactTrials, "Time_Impact"),
+    ('socialImpact', Sensitivity_socialImpactTrials, "Social_Impact"),
+    ('coachImpact', Sensitivity_coachImpactTrials, "Coach_Effectiveness"),
+    ('numCoaches', Sensitivity_numCoachesTrials, "Coach_Count"),
+    ('pastImpact', Sensitivity_pastImpactTrials, "Past_Impact"),
+    ('networkType', Sensitivity_networkTypeTrials, "Networks")
+]
 
 #####################################################################
 # Given the parameters needed for running simulation, executes the  #
 # simulation and returns an array of the final (population) mean    #
-# exercise and SE levels                                            #
+# exercise and SE levels (seeded with seed if given, the network    #
+# with topologySeed if given). With cacheDir, the network is kept   #
+# in (and loaded from) the TopologyCache in that directory. With    #
+# numReplicates above 1, that many replicates are run together on   #
+# the network (see SEModel_runEnsemble) and their results averaged  #
 #####################################################################
 def Sensitivity_runSimulation(networkType, timeSpan, numAgents, \
-    numCoaches, timeImpact, coachImpact, pastImpact, socialImpact):
+    numCoaches, timeImpact, coachImpact, pastImpact, socialImpact, \
+    seed = None, topologySeed = None, cacheDir = None, \
+    numReplicates = 1):
+    topologyCache = None
+    if cacheDir is not None:
+        from TopologyCache import TopologyCache
+        topologyCache = TopologyCache(cacheDir)
     simulationModel = SEModel(timeImpact, coachImpact, pastImpact, \
-        socialImpact, networkType, timeSpan, numAgents, numCoaches)
+        socialImpact, networkType, timeSpan, numAgents, numCoaches, \
+        seed, topologyCache, topologySeed = topologySeed)
+    if numReplicates > 1:
+        results = simulationModel.SEModel_runEnsemble(numReplicates)
+        if results is None:
+            return None
+        return np.mean(results, axis=0).tolist()
     simulationModel.SEModel_runStreamlineSimulation()
 
     curTrial = []
@@ -51,6 +91,47 @@ def Sensitivity_runSimulation(networkType, timeSpan, numAgents, \
 
     return curTrial
 
+#####################################################################
+# Given a task (a dict of the simulation parameters, as produced by #
+# the sweep engine), runs the simulation with the seeds of the task #
+# (and the topology cache in cacheDir and numReplicates replicates  #
+# if given): the unit of work handed out to the worker processes    #
+#####################################################################
+def Sensitivity_runTask(task, cacheDir = None, numReplicates = 1):
+    return Sensitivity_runSimulation(*Sweep_getTaskKey(task), \
+        seed = task.get('seed'), topologySeed = \
+        task.get('topologySeed'), cacheDir = cacheDir, \
+        numReplicates = numReplicates)
+
+#####################################################################
+# Given the values of the simulation parameters held fixed (base),  #
+# runs a single sweep over the levels of argName and returns the    #
+# results in the form given by Sensitivity_splitResults             #
+#####################################################################
+def Sensitivity_runSweep(base, argName, levels, label):
+    spec = {'base': base, 'sweeps': [{'label': label, 'kind': 'list', \
+        'params': {argName: levels}}]}
+    ran = Sweep_runSpec(spec, Sensitivity_runTask)
+    if ran is None:
+        return None
+    table, sweeps = ran
+    return Sweep_getSweepResults(table, sweeps[0])
+
+#####################################################################
+# Given the default values of the simulation parameters, returns    #
+# the spec of the sweeps conducted by the sensitivity simulation    #
+#####################################################################
+def Sensitivity_getSpec(networkType, timeSpan, numAgents, numCoaches, \
+        timeImpact, coachImpact, pastImpact, socialImpact):
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=numCoaches, \
+        timeImpact=timeImpact, coachImpact=coachImpact, \
+        pastImpact=pastImpact, socialImpact=socialImpact)
+    sweeps = [{'label': label, 'kind': 'list', 'params': \
+        {argName: levels}} for argName, levels, label in \
+        Sensitivity_sweeps]
+    return {'base': base, 'sweeps': sweeps}
+
 #####################################################################
 # Given an array formatted as [[ExerciseResults, SEResults]...],    #
 # as is the case for the results for each of the sensitivity trials #
@@ -85,16 +166,12 @@ def Sensitivity_splitResults(indVarScales, mixedArr, label):
 def Sensitivity_timeDecay(networkType, timeSpan, numAgents, numCoaches,\
          coachImpact, pastImpact, socialImpact):
     print("Performing sensitivity on time decay impact")
-    timeImpactTrials = [0.00, .001, .0025, .005, .0075, .01, .0125]
-    trials = []
-
-    for timeImpact in timeImpactTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(timeImpactTrials, trials, \
-        "Time_Impact")
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=numCoaches, \
+        coachImpact=coachImpact, pastImpact=pastImpact, \
+        socialImpact=socialImpact)
+    return Sensitivity_runSweep(base, 'timeImpact', \
+        Sensitivity_timeImpactTrials, "Time_Impact")
 
 #####################################################################
 # Investigates the sensitivity of the mean population/SE caused by  #
@@ -103,17 +180,12 @@ def Sensitivity_timeDecay(networkType, timeSpan, numAgents, numCoaches,\
 def Sensitivity_coachEffectiveness(networkType, timeSpan, numAgents, \
         numCoaches, timeImpact, pastImpact, socialImpact):
     print("Performing sensitivity on coach effectiveness")
-    coachImpactTrials = [.100, .125, .15, .175, .20, .225, .25, .275,\
-        .30, .325]
-    trials = []
-
-    for coachImpact in coachImpactTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(coachImpactTrials, trials, \
-        "Coach_Effectiveness")
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=numCoaches, \
+        timeImpact=timeImpact, pastImpact=pastImpact, \
+        socialImpact=socialImpact)
+    return Sensitivity_runSweep(base, 'coachImpact', \
+        Sensitivity_coachImpactTrials, "Coach_Effectiveness")
 
 #####################################################################
 # Investigates the sensitivity of the mean population/SE caused by  #
@@ -122,17 +194,12 @@ def Sensitivity_coachEffectiveness(networkType, timeSpan, numAgents, \
 def Sensitivity_pastBehavior(networkType, timeSpan, numAgents, \
         numCoaches, timeImpact, coachImpact, socialImpact):
     print("Performing sensitivity on past impact")
-    pastImpactTrials = [0.0, .01, .015, .020, .025, .030, .035, .04, \
-        .045, .050]
-    trials = []
-
-    for pastImpact in pastImpactTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(pastImpactTrials, trials, \
-    	"Past_Impact")
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=numCoaches, \
+        timeImpact=timeImpact, coachImpact=coachImpact, \
+        socialImpact=socialImpact)
+    return Sensitivity_runSweep(base, 'pastImpact', \
+        Sensitivity_pastImpactTrials, "Past_Impact")
 
 #####################################################################
 # Investigates the sensitivity of the mean population/SE caused by  #
@@ -141,17 +208,12 @@ def Sensitivity_pastBehavior(networkType, timeSpan, numAgents, \
 def Sensitivity_socialNetwork(networkType, timeSpan, numAgents, \
         numCoaches, timeImpact, coachImpact, pastImpact):
     print("Performing sensitivity on social impact")
-    socialImpactTrials = [0.00, .001, .005, .010, .015, .020, .025, \
-        .030, .035]
-    trials = []
-
-    for socialImpact in socialImpactTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(socialImpactTrials, trials, \
-    	"Social_Impact")
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=numCoaches, \
+        timeImpact=timeImpact, coachImpact=coachImpact, \
+        pastImpact=pastImpact)
+    return Sensitivity_runSweep(base, 'socialImpact', \
+        Sensitivity_socialImpactTrials, "Social_Impact")
 
 #####################################################################
 # Investigates the sensitivity of the mean population/SE caused by  #
@@ -160,16 +222,12 @@ def Sensitivity_socialNetwork(networkType, timeSpan, numAgents, \
 def Sensitivity_maxCoachCount(networkType, timeSpan, numAgents, \
         timeImpact, coachImpact, pastImpact, socialImpact):
     print("Performing sensitivity on number of coaches")
-    numCoachesTrials = [10, 15, 20, 25, 30, 35, 40, 45, 50]
-    trials = []
-
-    for numCoaches in numCoachesTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(numCoachesTrials, trials, \
-    	"Coach_Count")
+    base = dict(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, timeImpact=timeImpact, \
+        coachImpact=coachImpact, pastImpact=pastImpact, \
+        socialImpact=socialImpact)
+    return Sensitivity_runSweep(base, 'numCoaches', \
+        Sensitivity_numCoachesTrials, "Coach_Count")
 
 #####################################################################
 # Investigates the sensitivity of the mean population/SE caused by  #
@@ -178,22 +236,23 @@ def Sensitivity_maxCoachCount(networkType, timeSpan, numAgents, \
 def Sensitivity_networkCluster(timeSpan, numAgents, numCoaches, \
         timeImpact, coachImpact, pastImpact, socialImpact):
     print("Performing sensitivity on clustering method")
-    networkTypeTrials = ["ER", "SW", "ASF"]
-    trials = []
-
-    for networkType in networkTypeTrials:
-        trial = Sensitivity_runSimulation(networkType, timeSpan, \
-            numAgents, numCoaches, timeImpact, coachImpact, \
-            pastImpact, socialImpact)
-        trials.append(trial)
-    return Sensitivity_splitResults(networkTypeTrials, trials, \
-    	"Networks")
+    base = dict(timeSpan=timeSpan, numAgents=numAgents, \
+        numCoaches=numCoaches, timeImpact=timeImpact, \
+        coachImpact=coachImpact, pastImpact=pastImpact, \
+        socialImpact=socialImpact)
+    return Sensitivity_runSweep(base, 'networkType', \
+        Sensitivity_networkTypeTrials, "Networks")
 
 #####################################################################
 # Produces graphical display for the sensitivity results of the     #
 # different network types: produces single bar graphs for SE and Ex #
+# (saved under Sensitivity/Networks in outputDir)                   #
 #####################################################################
-def Sensitivity_networkGraphs(xArray, yArray, xLabel, yLabel):
+def Sensitivity_networkGraphs(xArray, yArray, xLabel, yLabel, \
+        outputDir = "Results"):
+    import matplotlib.pyplot as plt
+    directory = os.path.join(outputDir, "Sensitivity", "Networks")
+    os.makedirs(directory, exist_ok=True)
     N = len(xArray)
 
     ind = np.arange(N)  # the x locations for the groups
@@ -209,15 +268,20 @@ def Sensitivity_networkGraphs(xArray, yArray, xLabel, yLabel):
     ax.set_xticks(ind + width/2)
 
     ax.set_xticklabels(xArray)
-    plt.savefig("Results\\Sensitivity\\Networks\\{}vs{}.png"\
-    	.format(xLabel, yLabel))
+    plt.savefig(os.path.join(directory, "{}vs{}.png".format(xLabel, \
+        yLabel)))
     plt.close()
 
 #####################################################################
 # Produces graphical display for the sensitivity results of all     #
 # other variables aside from network type: plots line plot for each #
+# (saved under Sensitivity/<xLabel> in outputDir)                   #
 #####################################################################
-def Sensitivity_plotGraphs(xArray, yArray, xLabel, yLabel):
+def Sensitivity_plotGraphs(xArray, yArray, xLabel, yLabel, \
+        outputDir = "Results"):
+    import matplotlib.pyplot as plt
+    directory = os.path.join(outputDir, "Sensitivity", xLabel)
+    os.makedirs(directory, exist_ok=True)
     minX = min(xArray)
     maxX = max(xArray)
     
@@ -230,45 +294,94 @@ def Sensitivity_plotGraphs(xArray, yArray, xLabel, yLabel):
     plt.ylabel(yLabel)
     plt.title('{} Vs. {}'.format(xLabel, yLabel))
 
-    plt.savefig("Results\\Sensitivity\\{}\\{}vs{}.png"\
-    	.format(xLabel, xLabel, yLabel))
+    plt.savefig(os.path.join(directory, "{}vs{}.png".format(xLabel, \
+        yLabel)))
     plt.close()
 
 #####################################################################
-# Conducts sensitivity tests for each of the paramaters of interest #
-# and produces graphical displays for each (appropriately named)    #
+# Given the results of the sensitivity sweeps (in the form given by #
+# Sensitivity_splitResults, with the network sweep last), produces  #
+# graphical displays for each (appropriately named) under outputDir #
 #####################################################################
-def Sensitivity_sensitivitySimulation(networkType, timeSpan,     \
-        numAgents, numCoaches, timeImpact, coachImpact,          \
-        pastImpact, socialImpact):
-    finalResults = []
-
-    finalResults.append(Sensitivity_timeDecay(networkType, timeSpan,\
-        numAgents, numCoaches, coachImpact, pastImpact, socialImpact))
-
-    finalResults.append(Sensitivity_socialNetwork(networkType, timeSpan, \
-        numAgents, numCoaches, timeImpact, coachImpact, pastImpact))
-
-    finalResults.append(Sensitivity_coachEffectiveness(networkType, \
-        timeSpan, numAgents, numCoaches, timeImpact, pastImpact, \
-        socialImpact))
-
-    finalResults.append(Sensitivity_maxCoachCount(networkType, timeSpan, \
-        numAgents, timeImpact, coachImpact, pastImpact, socialImpact))
-
-    finalResults.append(Sensitivity_pastBehavior(networkType, timeSpan, \
-       numAgents, numCoaches, timeImpact, coachImpact, socialImpact))
-
-    networkResults = Sensitivity_networkCluster(timeSpan, numAgents, \
-        numCoaches, timeImpact, coachImpact, pastImpact, socialImpact)
+def Sensitivity_plotResults(finalResults, outputDir = "Results"):
+    finalResults = list(finalResults)
+    networkResults = finalResults.pop()
 
     for subResult in finalResults:
         Sensitivity_plotGraphs(subResult[0], subResult[1], 
-            subResult[3], "Exercise")
+            subResult[3], "Exercise", outputDir)
         Sensitivity_plotGraphs(subResult[0], subResult[2], \
-            subResult[3], "SE")
+            subResult[3], "SE", outputDir)
 
     Sensitivity_networkGraphs(networkResults[0], networkResults[1], \
-        "Exercise", networkResults[3])
+        "Exercise", networkResults[3], outputDir)
     Sensitivity_networkGraphs(networkResults[0], networkResults[2], \
-        "SE", networkResults[3])
\ No newline at end of file
+        "SE", networkResults[3], outputDir)
+
+#####################################################################
+# Conducts sensitivity tests for each of the paramaters of interest #
+# and produces graphical displays for each (appropriately named).   #
+# numWorkers sets the number of processes the simulations are run   #
+# on, and seed makes the results reproducible. If given a shard     #
+# (shardIndex, shardCount), only the tasks of that shard are run    #
+# (see Sweep_runShard) and their results table is returned rather   #
+# than plotted, written as a partial results file to resultsFile if #
+# given (see Sensitivity_mergeShards). Plots are saved under        #
+# outputDir, networks are cached in cacheDir if given and each      #
+# point is averaged over numReplicates replicates (see              #
+# Sensitivity_runSimulation). Returns the results of each sweep (in #
+# the form given by Sensitivity_splitResults), the results table of #
+# the shard, or None if the sweep or shard is not appropriate       #
+#####################################################################
+def Sensitivity_sensitivitySimulation(networkType, timeSpan,     \
+        numAgents, numCoaches, timeImpact, coachImpact,          \
+        pastImpact, socialImpact, numWorkers = 1, seed = None,   \
+        shard = None, resultsFile = None, outputDir = "Results", \
+        cacheDir = None, numReplicates = 1):
+    spec = Sensitivity_getSpec(networkType, timeSpan, numAgents, \
+        numCoaches, timeImpact, coachImpact, pastImpact, socialImpact)
+    expanded = Sweep_expandSpec(spec)
+    if expanded is None:
+        return None
+
+    # All of the (deduplicated) simulations of every sweep are run as
+    # one list of tasks, so that they can be handed out at once
+    tasks, sweeps = expanded
+    runTask = partial(Sensitivity_runTask, cacheDir = cacheDir, \
+        numReplicates = numReplicates)
+    if shard is not None:
+        print("Performing shard {}/{} of {} sensitivity simulations " \
+            "on {} worker(s)".format(shard[0], shard[1], len(tasks), \
+            numWorkers))
+        return Sweep_runShard(expanded, runTask, shard, \
+            numWorkers, seed, resultsFile)
+
+    print("Performing {} sensitivity simulations on {} worker(s)"\
+        .format(len(tasks), numWorkers))
+    table = Sweep_runTasks(tasks, runTask, numWorkers, seed, \
+        resultsFile)
+
+    finalResults = [Sweep_getSweepResults(table, sweep) for sweep in \
+        sweeps]
+    Sensitivity_plotResults(finalResults, outputDir)
+    return finalResults
+
+#####################################################################
+# Given the paths of the partial results files written by every     #
+# shard of the sensitivity simulation, merges them (see             #
+# Sweep_mergePartials) and returns the results of each sweep in the #
+# form given by Sensitivity_splitResults, plotting them unless      #
+# toPlot is False (under outputDir). Returns None if the partial    #
+# results do not cover every simulation exactly once                #
+#####################################################################
+def Sensitivity_mergeShards(paths, toPlot = True, outputDir = "Results"):
+    merged = Sweep_mergePartials(paths)
+    if merged is None:
+        return None
+    table, sweeps = merged
+
+    finalResults = [Sweep_getSweepResults(table, sweep) for sweep in \
+        sweeps]
+    if toPlot:
+        Sensitivity_plotResults(finalResults, outputDir)
+    return finalResults
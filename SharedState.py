@@ -0,0 +1,90 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: SharedState.py                                              #
+# Description: Publishes named arrays (the topology and initial     #
+# state of a network) once into shared memory blocks, which worker  #
+# processes attach to without copying or pickling them              #
+#####################################################################
+
+import sys
+import os
+from multiprocessing import shared_memory
+import numpy as np
+
+class SharedState:
+    #################################################################
+    # Given a dict of named arrays, copies each into a shared       #
+    # memory block of its own. The process creating the state owns  #
+    # the blocks and must release them with SharedState_close once  #
+    # the workers are done with them                                #
+    #################################################################
+    def __init__(self, arrays):
+        self.blocks = {}
+        self.arrays = {}
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            block = shared_memory.SharedMemory(create=True, \
+                size=max(values.nbytes, 1))
+            shared = np.ndarray(values.shape, dtype=values.dtype, \
+                buffer=block.buf)
+            shared[...] = values
+            self.blocks[name] = block
+            self.arrays[name] = shared
+
+    #################################################################
+    # Returns the specs of the shared arrays, {name: (block name,   #
+    # dtype, shape)}: all a worker needs to attach to them, small   #
+    # enough to be passed along with every task                     #
+    #################################################################
+    def SharedState_getSpecs(self):
+        return dict((name, (self.blocks[name].name, \
+            self.arrays[name].dtype.str, self.arrays[name].shape)) \
+            for name in self.blocks)
+
+    #################################################################
+    # Returns the shared array with the given name                  #
+    #################################################################
+    def SharedState_get(self, name):
+        return self.arrays[name]
+
+    #################################################################
+    # Releases the shared memory blocks: they are freed once every  #
+    # worker has detached from them as well. The blocks are         #
+    # unlinked even while arrays over them are still held (i.e. by  #
+    # the traceback of an error), in which case they are unmapped   #
+    # once those arrays are dropped                                 #
+    #################################################################
+    def SharedState_close(self):
+        self.arrays = {}
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                pass
+            block.unlink()
+        self.blocks = {}
+
+#####################################################################
+# Given the specs of shared arrays (see SharedState_getSpecs),      #
+# attaches to their blocks and returns the blocks along with the    #
+# arrays over them (read-only unless writable is True). The arrays  #
+# are views onto the blocks, so nothing is copied, and must be      #
+# dropped before the blocks are detached with SharedState_detach    #
+#####################################################################
+def SharedState_attach(specs, writable = False):
+    blocks = {}
+    arrays = {}
+    for name, (blockName, dtype, shape) in specs.items():
+        blocks[name] = shared_memory.SharedMemory(name=blockName)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), \
+            buffer=blocks[name].buf)
+        arrays[name].flags.writeable = writable
+    return blocks, arrays
+
+#####################################################################
+# Given the blocks returned by SharedState_attach, detaches from    #
+# them (without freeing them, which is left to their owner)         #
+#####################################################################
+def SharedState_detach(blocks):
+    for block in blocks.values():
+        block.close()
@@ -0,0 +1,184 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: SnapshotWriter.py                                           #
+# Description: Writes snapshots of the agents of a simulation to a  #
+# binary columnar file (buffered into optionally compressed chunks) #
+# and reads them back or converts them into the CSV results format  #
+#####################################################################
+
+import sys
+import os
+import csv
+import json
+import struct
+import zlib
+import numpy as np
+
+#####################################################################
+# Columns of a snapshot with their (compact) on-disk types, in the  #
+# order of the CSV results file. Exercise levels are at most 10 and #
+# exercise points at most 100, so they fit in a byte. SE is kept at #
+# full precision, as the CSV results file always held it            #
+#####################################################################
+Snapshot_columns = [('time', np.uint32), ('agent_id', np.uint32), \
+    ('has_coach', np.uint8), ('lowLevel', np.uint8), \
+    ('medLevel', np.uint8), ('highLevel', np.uint8), \
+    ('exercise_pts', np.uint8), ('SE', np.float64)]
+
+# Marks the start of a snapshot file (followed by its JSON header)
+Snapshot_magic = b"SESNAP1\n"
+
+# Each chunk starts with its row count and whether it is compressed
+Snapshot_chunkHeader = struct.Struct("<IB")
+Snapshot_sizeHeader = struct.Struct("<Q")
+
+class SnapshotWriter:
+    #################################################################
+    # Given the path of the file to be written, opens it and writes #
+    # its header. Snapshots are buffered until chunkRows rows are   #
+    # held, then written as one chunk, compressed (with zlib at the #
+    # given level) unless compress is False                         #
+    #################################################################
+    def __init__(self, path, compress = True, chunkRows = 2 ** 20, \
+            level = 1):
+        if not self.SnapshotWriter_verifyWriter(chunkRows, level):
+            return None
+
+        self.path = path
+        self.compress = compress
+        self.chunkRows = chunkRows
+        self.level = level
+
+        self.buffer = dict((name, []) for name, _ in Snapshot_columns)
+        self.bufferRows = 0
+        self.rowCount = 0
+
+        self.f = open(path, 'wb')
+        header = json.dumps({'columns': [[name, np.dtype(dtype).str] \
+            for name, dtype in Snapshot_columns]}).encode()
+        self.f.write(Snapshot_magic)
+        self.f.write(Snapshot_sizeHeader.pack(len(header)))
+        self.f.write(header)
+
+    #################################################################
+    # Ensures that the given parameters for the writer are          #
+    # appropriate                                                   #
+    #################################################################
+    def SnapshotWriter_verifyWriter(self, chunkRows, level):
+        if not isinstance(chunkRows, int) or chunkRows < 1:
+            sys.stderr.write("Chunk row count must be a positive int")
+            return False
+
+        if not isinstance(level, int) or level < 0 or level > 9:
+            sys.stderr.write("Compression level must be an int " +
+                "between 0 and 9")
+            return False
+        return True
+
+    #################################################################
+    # Given the time of the snapshot and a dict of per-agent arrays #
+    # keyed by the column names (other than time), adds the         #
+    # snapshot to the buffer, writing out a chunk once it is full   #
+    #################################################################
+    def SnapshotWriter_write(self, time, columns):
+        rowCount = len(columns['agent_id'])
+        for name, dtype in Snapshot_columns:
+            if name == 'time':
+                values = np.full(rowCount, time, dtype=dtype)
+            else:
+                values = np.asarray(columns[name]).astype(dtype)
+            self.buffer[name].append(values)
+
+        self.bufferRows += rowCount
+        if self.bufferRows >= self.chunkRows:
+            self.SnapshotWriter_flush()
+
+    #################################################################
+    # Writes the buffered snapshots out as a single chunk, holding  #
+    # each column contiguously                                      #
+    #################################################################
+    def SnapshotWriter_flush(self):
+        if self.bufferRows == 0:
+            return
+
+        self.f.write(Snapshot_chunkHeader.pack(self.bufferRows, \
+            int(self.compress)))
+        for name, _ in Snapshot_columns:
+            data = np.concatenate(self.buffer[name]).tobytes()
+            if self.compress:
+                data = zlib.compress(data, self.level)
+            self.f.write(Snapshot_sizeHeader.pack(len(data)))
+            self.f.write(data)
+            self.buffer[name] = []
+
+        self.rowCount += self.bufferRows
+        self.bufferRows = 0
+
+    #################################################################
+    # Writes out what remains in the buffer and closes the file     #
+    #################################################################
+    def SnapshotWriter_close(self):
+        if self.f is None:
+            return
+        self.SnapshotWriter_flush()
+        self.f.close()
+        self.f = None
+
+#####################################################################
+# Given the path of a snapshot file, yields its chunks one at a     #
+# time, each as a dict of arrays keyed by the column names          #
+#####################################################################
+def Snapshot_readChunks(path):
+    with open(path, 'rb') as f:
+        if f.read(len(Snapshot_magic)) != Snapshot_magic:
+            sys.stderr.write("File is not a snapshot file")
+            return
+
+        size, = Snapshot_sizeHeader.unpack(f.read(Snapshot_sizeHeader.\
+            size))
+        header = json.loads(f.read(size).decode())
+        columns = [(name, np.dtype(dtype)) for name, dtype in \
+            header['columns']]
+
+        while True:
+            chunkHeader = f.read(Snapshot_chunkHeader.size)
+            if len(chunkHeader) < Snapshot_chunkHeader.size:
+                return
+            rowCount, compressed = Snapshot_chunkHeader.unpack(\
+                chunkHeader)
+
+            chunk = {}
+            for name, dtype in columns:
+                size, = Snapshot_sizeHeader.unpack(f.read(\
+                    Snapshot_sizeHeader.size))
+                data = f.read(size)
+                if compressed:
+                    data = zlib.decompress(data)
+                chunk[name] = np.frombuffer(data, dtype=dtype, \
+                    count=rowCount)
+            yield chunk
+
+#####################################################################
+# Given the path of a snapshot file, returns all of its rows as a   #
+# dict of arrays keyed by the column names                          #
+#####################################################################
+def Snapshot_read(path):
+    chunks = list(Snapshot_readChunks(path))
+    return dict((name, np.concatenate([chunk[name] for chunk in \
+        chunks]) if chunks else np.zeros(0, dtype=dtype)) for name, \
+        dtype in Snapshot_columns)
+
+#####################################################################
+# Given the path of a snapshot file and that of a CSV file, writes  #
+# the rows of the snapshots out as CSV, with the same columns and    #
+# formatting as the results file of SEModel_runSimulation always    #
+# had (written by the csv module, floats in full)                   #
+#####################################################################
+def Snapshot_toCSV(path, csvPath):
+    names = [name for name, _ in Snapshot_columns]
+    with open(csvPath, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for chunk in Snapshot_readChunks(path):
+            writer.writerows(zip(*[chunk[name].tolist() for name in \
+                names]))
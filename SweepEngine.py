@@ -0,0 +1,478 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: SweepEngine.py                                              #
+# Description: Expands declarative specifications of parameter      #
+# sweeps over the SEModel parameters into a deduplicated list of    #
+# simulation tasks, runs them and gathers their results in a table  #
+#####################################################################
+
+import sys
+import os
+import csv
+import json
+import random
+import zlib
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#####################################################################
+# A sweep specification is a dict of the form:                      #
+#                                                                   #
+# {'base': {'networkType': 'SW', 'timeSpan': 15, ...},              #
+#  'seed': 0,                                                       #
+#  'sweeps': [                                                      #
+#     {'label': 'Time_Impact', 'kind': 'list',                      #
+#      'params': {'timeImpact': [0.0, .001, .0025]}},               #
+#     {'label': 'Coaching', 'kind': 'grid',                         #
+#      'params': {'coachImpact': (.1, .3, 5), 'numCoaches': [10,    #
+#      20]}},                                                       #
+#     {'label': 'Random', 'kind': 'random', 'samples': 20,          #
+#      'params': {'socialImpact': (0.0, .05), 'networkType': ['ER', #
+#      'SW']}},                                                     #
+#     {'label': 'LHS', 'kind': 'latin', 'samples': 20,              #
+#      'params': {'pastImpact': (0.0, .05), 'timeImpact': (0.0,     #
+#      .0125)}}]}                                                   #
+#                                                                   #
+# base holds the values of the parameters that are not varied (any  #
+# left out take the defaults of SEModel, see Sweep_defaults). For   #
+# 'list' sweeps, the lists of the params are zipped into points and #
+# for 'grid' sweeps, their cartesian product is taken, a tuple      #
+# (low, high, num) standing for num evenly spaced levels. 'random'  #
+# and 'latin' (Latin hypercube) sweeps draw samples points from     #
+# ranges (low, high) or lists of choices, seeded from the spec seed #
+#####################################################################
+Sweep_paramNames = ['networkType', 'timeSpan', 'numAgents', \
+    'numCoaches', 'timeImpact', 'coachImpact', 'pastImpact', \
+    'socialImpact']
+Sweep_intParams = ['timeSpan', 'numAgents', 'numCoaches']
+
+# Values of the parameters missing from the base of a spec (the
+# defaults of SEModel)
+Sweep_defaults = {'networkType': 'ASF', 'timeSpan': 10, \
+    'numAgents': 10, 'numCoaches': 10, 'timeImpact': .005, \
+    'coachImpact': .225, 'pastImpact': .025, 'socialImpact': .015}
+
+#####################################################################
+# Given a dict of parameter values, casts each to the type SEModel  #
+# expects (rounding floats so equal levels compare equal)           #
+#####################################################################
+def Sweep_normalizeTask(task):
+    normalized = {}
+    for name in Sweep_paramNames:
+        value = task[name]
+        if name == 'networkType':
+            normalized[name] = str(value)
+        elif name in Sweep_intParams:
+            normalized[name] = int(round(value))
+        else:
+            normalized[name] = float(round(value, 12))
+    return normalized
+
+#####################################################################
+# Given the domain of a parameter in a random or Latin hypercube    #
+# sweep and samples u in [0, 1), maps them onto the domain          #
+#####################################################################
+def Sweep_mapSamples(domain, u):
+    if isinstance(domain, list):
+        indices = np.minimum((u * len(domain)).astype(int), \
+            len(domain) - 1)
+        return [domain[i] for i in indices]
+    low, high = domain
+    return (low + u * (high - low)).tolist()
+
+#####################################################################
+# Given a single sweep of a spec, the base parameter values and a   #
+# random generator, returns the list of tasks (dicts of parameter   #
+# values) making up the sweep                                       #
+#####################################################################
+def Sweep_expandSweep(sweep, base, rng):
+    kind = sweep.get('kind', 'list')
+    params = sweep['params']
+    names = list(params)
+
+    if kind == 'list' or kind == 'grid':
+        levels = []
+        for name in names:
+            values = params[name]
+            if isinstance(values, tuple):
+                values = np.linspace(*values).tolist()
+            levels.append(list(values))
+        if kind == 'list':
+            if len(set(len(values) for values in levels)) > 1:
+                sys.stderr.write("List sweep params must have the " +
+                    "same number of levels\n")
+                return None
+            points = zip(*levels)
+        else:
+            points = itertools.product(*levels)
+
+    elif kind == 'random' or kind == 'latin':
+        samples = sweep['samples']
+        columns = []
+        for name in names:
+            if kind == 'random':
+                u = rng.random(samples)
+            else:
+                # One sample falls in each of the samples strata
+                u = (rng.permutation(samples) + rng.random(samples)) \
+                    / samples
+            columns.append(Sweep_mapSamples(params[name], u))
+        points = zip(*columns)
+
+    else:
+        sys.stderr.write("Sweep kind must be list, grid, random or " +
+            "latin\n")
+        return None
+
+    tasks = []
+    for point in points:
+        task = dict(base)
+        task.update(zip(names, point))
+        tasks.append(Sweep_normalizeTask(task))
+    return tasks
+
+#####################################################################
+# Ensures that the given spec is appropriate: every parameter named #
+# in it is a simulation parameter, each sweep varies some of them   #
+# and random and Latin hypercube sweeps give their sample count     #
+#####################################################################
+def Sweep_verifySpec(spec):
+    if not isinstance(spec, dict) or \
+            not isinstance(spec.get('sweeps'), list):
+        sys.stderr.write("Spec must be a dict with a list of sweeps\n")
+        return False
+
+    for name in spec.get('base', {}):
+        if name not in Sweep_paramNames:
+            sys.stderr.write("Unknown base parameter {}\n".format(name))
+            return False
+
+    for sweep in spec['sweeps']:
+        params = sweep.get('params')
+        if not isinstance(params, dict) or not params:
+            sys.stderr.write("Each sweep must vary a dict of params\n")
+            return False
+        for name in params:
+            if name not in Sweep_paramNames:
+                sys.stderr.write("Unknown sweep parameter {}\n"\
+                    .format(name))
+                return False
+
+        if sweep.get('kind', 'list') in ['random', 'latin']:
+            samples = sweep.get('samples')
+            if not isinstance(samples, int) or samples < 1:
+                sys.stderr.write("Random and latin sweeps must give a " +
+                    "positive int number of samples\n")
+                return False
+    return True
+
+#####################################################################
+# Given a spec, returns the deduplicated list of tasks it expands   #
+# to (in order of first appearance) along with its sweeps in form   #
+# [(Label, Varied Params, [Task Indices]), ...], or None if the     #
+# spec is not appropriate                                           #
+#####################################################################
+def Sweep_expandSpec(spec):
+    if not Sweep_verifySpec(spec):
+        return None
+
+    base = dict(Sweep_defaults)
+    base.update(spec.get('base', {}))
+    seedSeq = np.random.SeedSequence(spec.get('seed', 0))
+    sweepSeeds = seedSeq.spawn(len(spec['sweeps']))
+
+    tasks = []
+    taskIndex = {}
+    sweeps = []
+    for i, sweep in enumerate(spec['sweeps']):
+        sweepTasks = Sweep_expandSweep(sweep, base, \
+            np.random.default_rng(sweepSeeds[i]))
+        if sweepTasks is None:
+            return None
+
+        indices = []
+        for task in sweepTasks:
+            key = Sweep_getTaskKey(task)
+            if key not in taskIndex:
+                taskIndex[key] = len(tasks)
+                tasks.append(task)
+            indices.append(taskIndex[key])
+        sweeps.append((sweep.get('label', str(i)), \
+            list(sweep['params']), indices))
+    return tasks, sweeps
+
+#####################################################################
+# Returns the tuple of parameter values identifying a task          #
+#####################################################################
+def Sweep_getTaskKey(task):
+    return tuple(task[name] for name in Sweep_paramNames)
+
+#####################################################################
+# Given a task and the seed of the whole run, returns the seed for  #
+# the task. It depends only on the parameter values of the task, so #
+# the same task gets the same seed however the tasks are ordered    #
+#####################################################################
+def Sweep_getTaskSeed(task, seed):
+    entropy = np.random.SeedSequence(seed).entropy
+    taskHash = zlib.crc32(repr(Sweep_getTaskKey(task)).encode())
+    return int(np.random.SeedSequence([entropy, taskHash])\
+        .generate_state(1)[0])
+
+#####################################################################
+# Given a task and the seed of the whole run, returns the seed for  #
+# the network of the task. It depends only on the network type and  #
+# size, so every point of a sweep over the other parameters runs on #
+# the same network, which a TopologyCache can then serve            #
+#####################################################################
+def Sweep_getTopologySeed(task, seed):
+    entropy = np.random.SeedSequence(seed).entropy
+    topologyHash = zlib.crc32(repr((task['networkType'], \
+        task['numAgents'])).encode())
+    return int(np.random.SeedSequence([entropy, topologyHash, 1])\
+        .generate_state(1)[0])
+
+#####################################################################
+# Given (runTask, taskSeed, topologySeed, task), seeds the global   #
+# random generators and runs the task, passing the seeds along      #
+# under its 'seed' and 'topologySeed' keys: the unit of work handed #
+# out to the workers. The state of the global generators is         #
+# restored afterwards, as tasks may run in the calling process      #
+#####################################################################
+def Sweep_runSeededTask(item):
+    runTask, taskSeed, topologySeed, task = item
+    randomState = random.getstate()
+    numpyState = np.random.get_state()
+    try:
+        random.seed(taskSeed)
+        np.random.seed(taskSeed)
+        return runTask(dict(task, seed=taskSeed, \
+            topologySeed=topologySeed))
+    finally:
+        random.setstate(randomState)
+        np.random.set_state(numpyState)
+
+#####################################################################
+# Returns the dtype of the rows of the results table                #
+#####################################################################
+def Sweep_getTableType():
+    return np.dtype([('networkType', 'U8'), ('timeSpan', np.int64), \
+        ('numAgents', np.int64), ('numCoaches', np.int64), \
+        ('timeImpact', float), ('coachImpact', float), \
+        ('pastImpact', float), ('socialImpact', float), \
+        ('seed', np.uint32), ('exercise', float), ('SE', float)])
+
+#####################################################################
+# Given a list of tasks and a (module-level) function runTask that  #
+# takes a task and returns [MeanExercise, MeanSE], runs every task  #
+# (over a pool of numWorkers processes if more than one) and        #
+# returns the results as a table with one row per task. If          #
+# resultsFile is given, rows are also written to it (CSV) as the    #
+# results come in                                                   #
+#####################################################################
+def Sweep_runTasks(tasks, runTask, numWorkers = 1, seed = None, \
+        resultsFile = None):
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    items = [(runTask, Sweep_getTaskSeed(task, seed), \
+        Sweep_getTopologySeed(task, seed), task) for task in tasks]
+
+    table = np.zeros(len(tasks), dtype=Sweep_getTableType())
+    writer = None
+    if resultsFile is not None:
+        f = open(resultsFile, 'w')
+        writer = csv.writer(f)
+        writer.writerow(table.dtype.names)
+
+    executor = None
+    if numWorkers > 1:
+        executor = ProcessPoolExecutor(max_workers = numWorkers)
+        results = executor.map(Sweep_runSeededTask, items)
+    else:
+        results = map(Sweep_runSeededTask, items)
+
+    try:
+        for i, result in enumerate(results):
+            _, taskSeed, _, task = items[i]
+            row = [task[name] for name in Sweep_paramNames] + \
+                [taskSeed] + list(result)
+            table[i] = tuple(row)
+            if writer is not None:
+                writer.writerow(row)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if writer is not None:
+            f.close()
+    return table
+
+#####################################################################
+# Given a spec, expands and runs it (see Sweep_runTasks), returning #
+# the results table along with the sweeps of the spec               #
+#####################################################################
+def Sweep_runSpec(spec, runTask, numWorkers = 1, seed = None, \
+        resultsFile = None):
+    expanded = Sweep_expandSpec(spec)
+    if expanded is None:
+        return None
+    tasks, sweeps = expanded
+    table = Sweep_runTasks(tasks, runTask, numWorkers, seed, \
+        resultsFile)
+    return table, sweeps
+
+#####################################################################
+# Given a results table and one of the sweeps of its spec, returns  #
+# the results of the sweep in the form [[Levels], [Exercise         #
+# Results], [SEResults], Label], as Sensitivity_splitResults gives. #
+# For sweeps varying several params, each level is a tuple          #
+#####################################################################
+def Sweep_getSweepResults(table, sweep):
+    label, params, indices = sweep
+    rows = table[indices]
+    if len(params) == 1:
+        levels = rows[params[0]].tolist()
+    else:
+        levels = list(zip(*[rows[name].tolist() for name in params]))
+    return [levels, rows['exercise'].tolist(), rows['SE'].tolist(), \
+        label]
+
+#####################################################################
+# Given the number of tasks and a shard (its index, from 0, and the #
+# number of shards), returns the indices of the tasks in the shard. #
+# Tasks are dealt out in turn, so that every shard gets a similar   #
+# mix of the sweeps, and every task falls in exactly one shard      #
+#####################################################################
+def Sweep_getShardIndices(taskCount, shardIndex, shardCount):
+    if not isinstance(shardCount, int) or shardCount < 1:
+        sys.stderr.write("Shard count must be a positive int\n")
+        return None
+
+    if not isinstance(shardIndex, int) or shardIndex < 0 or \
+            shardIndex >= shardCount:
+        sys.stderr.write("Shard index must be an int between 0 and " +
+            "the shard count\n")
+        return None
+    return list(range(shardIndex, taskCount, shardCount))
+
+# Marks a file as the partial results of one shard of a sweep, along
+# with the version of its layout
+Sweep_partialFormat = "sweep-partial"
+Sweep_partialVersion = 1
+
+#####################################################################
+# Given the list of tasks of a spec, returns a digest identifying   #
+# it, so that partial results of different sweeps are never merged  #
+#####################################################################
+def Sweep_getTasksDigest(tasks):
+    keys = json.dumps([Sweep_getTaskKey(task) for task in tasks])
+    return hashlib.sha1(keys.encode()).hexdigest()
+
+#####################################################################
+# Given an expanded spec (tasks, sweeps as Sweep_expandSpec returns)#
+# and a shard (shardIndex, shardCount), runs the tasks of the shard #
+# (see Sweep_runTasks) and returns their results table. If given    #
+# partialFile, the results are written to it along with all that is #
+# needed to merge them with those of the other shards. A seed is    #
+# required, as every shard must seed its tasks alike for the merged #
+# results to match those of an unsharded run                        #
+#####################################################################
+def Sweep_runShard(expanded, runTask, shard, numWorkers = 1, \
+        seed = None, partialFile = None):
+    if seed is None:
+        sys.stderr.write("A seed is required to run a shard\n")
+        return None
+
+    tasks, sweeps = expanded
+    indices = Sweep_getShardIndices(len(tasks), *shard)
+    if indices is None:
+        return None
+
+    table = Sweep_runTasks([tasks[i] for i in indices], runTask, \
+        numWorkers, seed)
+    if partialFile is not None:
+        header = {'format': Sweep_partialFormat, \
+            'version': Sweep_partialVersion, \
+            'digest': Sweep_getTasksDigest(tasks), \
+            'taskCount': len(tasks), 'shard': list(shard), \
+            'seed': seed, 'sweeps': [list(sweep) for sweep in sweeps]}
+        Sweep_writePartial(partialFile, header, indices, table)
+    return table
+
+#####################################################################
+# Given the path of a partial results file, its header, the indices #
+# of the tasks run and their results table, writes the file (JSON)  #
+#####################################################################
+def Sweep_writePartial(path, header, indices, table):
+    rows = [dict(zip(table.dtype.names, row), task=index) for index, \
+        row in zip(indices, table.tolist())]
+    with open(path, 'w') as f:
+        json.dump({'header': header, 'rows': rows}, f, indent=1)
+
+#####################################################################
+# Given the path of a partial results file, returns its header and  #
+# rows, or None if it is not a partial results file                 #
+#####################################################################
+def Sweep_readPartial(path):
+    with open(path) as f:
+        partial = json.load(f)
+    header = partial.get('header', {})
+    if header.get('format') != Sweep_partialFormat or \
+            header.get('version') != Sweep_partialVersion:
+        sys.stderr.write("{} is not a partial results file\n"\
+            .format(path))
+        return None
+    return header, partial['rows']
+
+#####################################################################
+# Given the paths of the partial results files of the shards of a   #
+# sweep, merges them into the results table of the whole sweep (in  #
+# the order of its tasks) and returns it along with the sweeps of   #
+# the spec. Returns None unless the files all come from the same    #
+# sweep run with the same seed, and every task was run exactly once #
+#####################################################################
+def Sweep_mergePartials(paths):
+    headers = []
+    rows = []
+    for path in paths:
+        partial = Sweep_readPartial(path)
+        if partial is None:
+            return None
+        headers.append(partial[0])
+        rows.extend(partial[1])
+
+    if not headers:
+        sys.stderr.write("No partial results files to merge\n")
+        return None
+
+    header = headers[0]
+    for other in headers[1:]:
+        if other['digest'] != header['digest'] or \
+                other['shard'][1] != header['shard'][1]:
+            sys.stderr.write("Partial results come from different " +
+                "sweeps or shardings\n")
+            return None
+
+    seeds = set(other.get('seed') for other in headers)
+    if None in seeds or len(seeds) > 1:
+        sys.stderr.write("Partial results must all be run with the " +
+            "same seed (found {})\n".format(sorted(seeds, key=str)))
+        return None
+
+    taskCount = header['taskCount']
+    counts = np.bincount([row['task'] for row in rows], \
+        minlength=taskCount)
+    if len(counts) > taskCount or np.any(counts != 1):
+        missing = np.flatnonzero(counts[:taskCount] == 0).tolist()
+        repeated = np.flatnonzero(counts > 1).tolist()
+        sys.stderr.write("Every task must be run exactly once " +
+            "(missing {}, repeated {})\n".format(missing, repeated))
+        return None
+
+    table = np.zeros(taskCount, dtype=Sweep_getTableType())
+    for row in rows:
+        table[row['task']] = tuple(row[name] for name in \
+            table.dtype.names)
+    sweeps = [(label, params, indices) for label, params, indices in \
+        header['sweeps']]
+    return table, sweeps
@@ -0,0 +1,151 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: TopologyCache.py                                            #
+# Description: Keeps the edge lists of generated networks on disk,  #
+# keyed by the network type, node count, generator parameters and   #
+# seed, so that later runs can load a network instead of generating #
+#####################################################################
+
+import sys
+import os
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+
+#####################################################################
+# Version of the cached edge lists, part of the key of every file:  #
+# must be bumped whenever a network generator (or the file format)  #
+# changes, so that edges generated before are no longer served      #
+#####################################################################
+TopologyCache_version = 1
+
+class TopologyCache:
+    #################################################################
+    # Given the directory in which the edge lists are kept and the  #
+    # maximum total size (in bytes) of the files in it, initializes #
+    # the cache. The least recently used files are evicted first    #
+    #################################################################
+    def __init__(self, directory, maxBytes = 2 ** 30):
+        if not self.TopologyCache_verifyCache(directory, maxBytes):
+            return None
+
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    #################################################################
+    # Ensures the given parameters for the cache are appropriate    #
+    #################################################################
+    def TopologyCache_verifyCache(self, directory, maxBytes):
+        if not isinstance(directory, str):
+            sys.stderr.write("Cache directory must be of type string")
+            return False
+
+        if not isinstance(maxBytes, int) or maxBytes < 0:
+            sys.stderr.write("Maximum cache size must be a " +
+                "non-negative int")
+            return False
+        return True
+
+    #################################################################
+    # Given the network type, node count, the tuple of generator    #
+    # parameters and the seed, returns the path of the file holding #
+    # the edge list of the corresponding network (for the current   #
+    # TopologyCache_version)                                        #
+    #################################################################
+    def TopologyCache_getPath(self, networkType, nodeCount, params, seed):
+        key = repr((TopologyCache_version, networkType, nodeCount, \
+            tuple(params), seed))
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, "{}_{}_{}.npy".format(
+            networkType, nodeCount, digest))
+
+    #################################################################
+    # Returns the edge list (an edgeCount x 2 array of node indices)#
+    # of the given network, loading it from the cache if present and#
+    # otherwise calling generate() and storing what it returns      #
+    #################################################################
+    def TopologyCache_getEdges(self, networkType, nodeCount, params, \
+            seed, generate):
+        path = self.TopologyCache_getPath(networkType, nodeCount, \
+            params, seed)
+        edges = self.TopologyCache_load(path)
+        if edges is not None:
+            self.hits += 1
+            return edges
+
+        self.misses += 1
+        edges = np.asarray(generate()).reshape(-1, 2)
+        self.TopologyCache_store(path, edges, nodeCount)
+        return edges
+
+    #################################################################
+    # Given the path of a cached edge list, loads and returns it    #
+    # (marking it as recently used), or None if it is not present   #
+    # or cannot be read (i.e. a truncated file), so that it is      #
+    # generated and written again                                   #
+    #################################################################
+    def TopologyCache_load(self, path):
+        try:
+            edges = np.load(path)
+            os.utime(path, None)
+        except (IOError, OSError, ValueError, EOFError, \
+                zipfile.BadZipFile):
+            return None
+        if not isinstance(edges, np.ndarray) or edges.ndim != 2 or \
+                edges.shape[1] != 2:
+            return None
+        return edges.astype(np.int64)
+
+    #################################################################
+    # Given a path, an edge list and the node count of the network, #
+    # writes the edge list using the smallest integer type able to  #
+    # hold the node indices, then evicts files past the size limit. #
+    # Files are written under a temporary name and moved in place,  #
+    # so concurrent workers never load a partial file               #
+    #################################################################
+    def TopologyCache_store(self, path, edges, nodeCount):
+        if nodeCount < 2 ** 16:
+            edgeType = np.uint16
+        elif nodeCount < 2 ** 32:
+            edgeType = np.uint32
+        else:
+            edgeType = np.uint64
+
+        handle, tempPath = tempfile.mkstemp(suffix=".npy", \
+            dir=self.directory)
+        with os.fdopen(handle, 'wb') as f:
+            np.save(f, edges.astype(edgeType))
+        os.replace(tempPath, path)
+        self.TopologyCache_evict()
+
+    #################################################################
+    # Removes the least recently used edge lists until the total    #
+    # size of the cache is within maxBytes                          #
+    #################################################################
+    def TopologyCache_evict(self):
+        entries = []
+        for fileName in os.listdir(self.directory):
+            if not fileName.endswith(".npy"):
+                continue
+            path = os.path.join(self.directory, fileName)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        totalBytes = sum(entry[1] for entry in entries)
+        for mtime, size, path in sorted(entries):
+            if totalBytes <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            totalBytes -= size
@@ -0,0 +1,190 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: TrajectoryStore.py                                          #
+# Description: Records the SE, exercise points and coach flag of    #
+# every agent at every tick into memory-mapped (tick x agent) files #
+# and reads back agent histories, ticks or time windows from them   #
+#####################################################################
+
+import sys
+import os
+import json
+import numpy as np
+
+#####################################################################
+# Arrays of a trajectory with their on-disk types: each is stored   #
+# as a (tick x agent) .npy file in the directory of the trajectory  #
+#####################################################################
+Trajectory_arrays = [('SE', np.float64), ('exercise_pts', np.uint8), \
+    ('has_coach', np.uint8)]
+
+class TrajectoryStore:
+    #################################################################
+    # Given the directory to write the trajectory to, the number of #
+    # ticks to be recorded, the IDs of the agents (in the order     #
+    # their values will be given) and the tick of the first record  #
+    # (startTick, i.e. that a resumed run starts from), preallocates#
+    # the memory-mapped files holding the trajectory                #
+    #################################################################
+    def __init__(self, directory, numTicks, agentIDs, startTick = 0):
+        if not self.TrajectoryStore_verifyStore(directory, numTicks, \
+                startTick):
+            return None
+
+        self.directory = directory
+        self.numTicks = numTicks
+        self.startTick = startTick
+        self.agentIDs = np.asarray(agentIDs, dtype=np.int64)
+        self.tickCount = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        np.save(os.path.join(directory, "agent_id.npy"), self.agentIDs)
+
+        self.arrays = {}
+        for name, dtype in Trajectory_arrays:
+            self.arrays[name] = np.lib.format.open_memmap(
+                os.path.join(directory, name + ".npy"), mode='w+',
+                dtype=dtype, shape=(numTicks, len(self.agentIDs)))
+
+        # The header is written once: the number of ticks recorded so
+        # far is kept in a memory-mapped counter of its own, updated
+        # after every tick, so a trajectory cut short can still be
+        # read back
+        with open(os.path.join(directory, "header.json"), 'w') as f:
+            json.dump({'numTicks': numTicks, 'startTick': startTick}, f)
+        self.recorded = np.lib.format.open_memmap(os.path.join(\
+            directory, "tick_count.npy"), mode='w+', dtype=np.int64, \
+            shape=(1,))
+
+    #################################################################
+    # Ensures that the given parameters for the store are           #
+    # appropriate                                                   #
+    #################################################################
+    def TrajectoryStore_verifyStore(self, directory, numTicks, \
+            startTick):
+        if not isinstance(directory, str):
+            sys.stderr.write("Trajectory directory must be of type " +
+                "string")
+            return False
+
+        if not isinstance(numTicks, int) or numTicks < 1:
+            sys.stderr.write("Tick count must be a positive int")
+            return False
+
+        if not isinstance(startTick, int) or startTick < 0:
+            sys.stderr.write("Start tick must be a non-negative int")
+            return False
+        return True
+
+    #################################################################
+    # Given the SE, exercise points and coach flags of the agents   #
+    # (in the order of agentIDs), records them as the next tick     #
+    #################################################################
+    def TrajectoryStore_record(self, SE, exercisePts, hasCoach):
+        if self.tickCount >= self.numTicks:
+            sys.stderr.write("Trajectory already holds all its ticks")
+            return
+
+        tick = self.tickCount
+        self.arrays['SE'][tick] = SE
+        self.arrays['exercise_pts'][tick] = exercisePts
+        self.arrays['has_coach'][tick] = hasCoach
+        self.tickCount += 1
+        self.recorded[0] = self.tickCount
+
+    #################################################################
+    # Given a network base, records the current state of its agents #
+    # as the next tick, reading the arrays of its engine if in use  #
+    #################################################################
+    def TrajectoryStore_recordNetwork(self, networkBase):
+        engine = networkBase.engine
+        if engine is not None:
+            self.TrajectoryStore_record(engine.SE, \
+                engine.ArrayEngine_getExercisePts(), engine.hasCoach)
+            return
+
+        Agents = networkBase.Agents
+        agents = [Agents[agentID] for agentID in self.agentIDs.tolist()]
+        self.TrajectoryStore_record([agent.SE for agent in agents], \
+            [agent.Agent_getExercisePts() for agent in agents], \
+            [agent.hasCoach for agent in agents])
+
+    #################################################################
+    # Flushes the recorded ticks to disk and releases the files     #
+    #################################################################
+    def TrajectoryStore_close(self):
+        for name in self.arrays:
+            self.arrays[name].flush()
+        self.arrays = {}
+        self.recorded.flush()
+        self.recorded = None
+
+class TrajectoryReader:
+    #################################################################
+    # Given the directory of a recorded trajectory, maps its arrays #
+    # (read-only) without loading them into memory. Ticks are those #
+    # of the run, from the startTick of the trajectory              #
+    #################################################################
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "header.json")) as f:
+            header = json.load(f)
+        self.startTick = header['startTick']
+        self.tickCount = int(np.load(os.path.join(directory, \
+            "tick_count.npy"))[0])
+
+        self.agentIDs = np.load(os.path.join(directory, "agent_id.npy"))
+        self.agentIndex = dict((agentID, i) for i, agentID in \
+            enumerate(self.agentIDs.tolist()))
+
+        self.arrays = {}
+        for name, _ in Trajectory_arrays:
+            self.arrays[name] = np.load(os.path.join(directory, \
+                name + ".npy"), mmap_mode='r')[:self.tickCount]
+
+    #################################################################
+    # Given an agent ID, returns its history as a dict of arrays    #
+    # (one value per tick) keyed by the names of the arrays         #
+    #################################################################
+    def TrajectoryReader_getAgentHistory(self, agentID):
+        if agentID not in self.agentIndex:
+            sys.stderr.write("Agent ID not in trajectory")
+            return None
+
+        i = self.agentIndex[agentID]
+        return dict((name, np.array(self.arrays[name][:, i])) for name \
+            in self.arrays)
+
+    #################################################################
+    # Given a tick, returns the values of every agent at that tick  #
+    # as a dict of arrays (in the order of agentIDs)                #
+    #################################################################
+    def TrajectoryReader_getTick(self, tick):
+        row = tick - self.startTick
+        if row < 0 or row >= self.tickCount:
+            sys.stderr.write("Tick not in trajectory")
+            return None
+        return dict((name, np.array(self.arrays[name][row])) for name \
+            in self.arrays)
+
+    #################################################################
+    # Given a window of ticks [start, end) and optionally a list of #
+    # agent IDs (defaults to all), returns the (tick x agent) block #
+    # of each array as a dict of arrays, or None if any of the IDs  #
+    # is not in the trajectory                                      #
+    #################################################################
+    def TrajectoryReader_getWindow(self, start, end, agentIDs = None):
+        start = max(start - self.startTick, 0)
+        end = max(min(end - self.startTick, self.tickCount), start)
+        if agentIDs is None:
+            return dict((name, np.array(self.arrays[name][start:end])) \
+                for name in self.arrays)
+
+        if any(agentID not in self.agentIndex for agentID in agentIDs):
+            sys.stderr.write("Agent ID not in trajectory")
+            return None
+
+        columns = [self.agentIndex[agentID] for agentID in agentIDs]
+        return dict((name, np.array(self.arrays[name][start:end, \
+            columns])) for name in self.arrays)
@@ -0,0 +1,48 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_batch.py                                               #
+# Description: Checks what the batch driver runs and writes for     #
+# the shards of a sensitivity sweep and for merging them            #
+#####################################################################
+
+import sys
+import os
+import matplotlib
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel_getArgumentParser, SEModel_runBatch
+
+#####################################################################
+# Returns the parsed command line of a small seeded batch, given    #
+# the arguments that follow the model parameters                    #
+#####################################################################
+def parseArgs(outputDir, extra):
+    return SEModel_getArgumentParser().parse_args(["--num-agents", \
+        "30", "--num-coaches", "3", "--time-span", "1", "--seed", \
+        "3", "--output-dir", outputDir] + extra)
+
+def test_shardsAndMergeSkipSingleRun(tmp_path):
+    outputDir = str(tmp_path)
+    partials = []
+    for shardIndex in range(0, 2):
+        shard = "{}/2".format(shardIndex)
+        args = parseArgs(outputDir, ["--sensitivity", "--shard", shard])
+        assert SEModel_runBatch(args)
+        partials.append(os.path.join(outputDir, \
+            "sensitivity_shard{}of2.json".format(shardIndex)))
+    assert sorted(os.listdir(outputDir)) == sorted(\
+        [os.path.basename(partial) for partial in partials])
+
+    assert SEModel_runBatch(parseArgs(outputDir, ["--merge"] + \
+        partials))
+    assert not os.path.exists(os.path.join(outputDir, "results.csv"))
+    assert not os.path.exists(os.path.join(outputDir, "TimeResults"))
+
+def test_shardRejectsSingleRun(tmp_path):
+    args = parseArgs(str(tmp_path), ["--sensitivity", "--shard", \
+        "0/2", "--mode", "streamline"])
+    assert not SEModel_runBatch(args)
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,67 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_benchmark.py                                           #
+# Description: Checks the stages timed by the benchmark and how its #
+# results are compared against a baseline                           #
+#####################################################################
+
+import sys
+import os
+import matplotlib
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from Benchmark import Benchmark_measureCase, Benchmark_compare, \
+    Benchmark_repeat
+
+#####################################################################
+# Returns benchmark results holding one case of the given stages    #
+# (a dict of the rate of each) or of the given error                #
+#####################################################################
+def createResults(rates = None, error = None):
+    result = {'networkType': 'SW', 'numAgents': 100}
+    if error is not None:
+        result['error'] = error
+    else:
+        result['stages'] = dict((name, {'perSecond': rate}) for \
+            name, rate in rates.items())
+    return {'results': [result]}
+
+def test_repeatHonorsCallBounds():
+    calls = []
+    timing = Benchmark_repeat(calls.append, 3, 0.0, 5)
+    assert calls == [0, 1, 2]
+    assert timing['calls'] == 3
+    timing = Benchmark_repeat(lambda call: None, 1, 10.0, 4)
+    assert timing['calls'] == 4
+
+def test_measureCaseTimesEveryStage():
+    for networkType in ['ER', 'SW', 'ASF']:
+        stages = Benchmark_measureCase(networkType, 100, 0.0)['stages']
+        assert sorted(stages) == sorted(['network', 'agents', \
+            'updateAgents', 'updateVectorized', 'snapshot', \
+            'visualize']), networkType
+
+def test_compareFlagsSlowerStages():
+    baseline = createResults({'network': 100.0, 'snapshot': 100.0})
+    current = createResults({'network': 50.0, 'snapshot': 95.0})
+    regressions = Benchmark_compare(baseline, current, .1)
+    assert [regression['stage'] for regression in regressions] == \
+        ['network']
+    assert regressions[0]['slowdown'] == 2.0
+
+def test_compareSkipsStagesTooFastToTime():
+    baseline = createResults({'network': None, 'snapshot': 100.0})
+    current = createResults({'network': 1.0, 'snapshot': None})
+    assert Benchmark_compare(baseline, current) == []
+
+def test_compareFlagsNewErrors():
+    baseline = createResults({'network': 100.0})
+    regressions = Benchmark_compare(baseline, createResults(error = \
+        "timeout"))
+    assert regressions == [{'networkType': 'SW', 'numAgents': 100, \
+        'stage': None, 'error': "timeout"}]
+    assert Benchmark_compare(createResults(error = "timeout"), \
+        createResults(error = "timeout")) == []
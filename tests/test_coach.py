@@ -0,0 +1,74 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_coach.py                                               #
+# Description: Checks how coaches are released and granted for the  #
+# whole population under each allocation policy                     #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from Coach import Coach_allocateCoaches, Coach_allocateNeediest, \
+    Coach_allocationPolicies
+
+def test_releasedAgentsDoNotReacquire():
+    hasCoach = np.array([True, True, False])
+    SE = np.array([.5, .5, .5])
+    # Every agent would acquire a coach and the first two lose theirs
+    acquireRands = np.zeros(3)
+    retainRands = np.array([1.0, 1.0, 0.0])
+    for policy in Coach_allocationPolicies:
+        rng = np.random.default_rng(0)
+        result = Coach_allocateCoaches(hasCoach, SE, SE, 3, \
+            acquireRands, retainRands, policy, rng)
+        assert result.tolist() == [False, False, True], policy
+
+def test_capacityFreedByReleases():
+    hasCoach = np.array([True, False, False, False])
+    SE = np.array([.5, .2, .4, .3])
+    acquireRands = np.zeros(4)
+    retainRands = np.array([1.0, 0.0, 0.0, 0.0])
+    rng = np.random.default_rng(0)
+    result = Coach_allocateCoaches(hasCoach, SE, SE, 2, acquireRands, \
+        retainRands, 'neediest', rng)
+    assert result.tolist() == [False, True, False, True]
+
+def test_orderPolicyGrantsInAgentOrder():
+    hasCoach = np.zeros(4, dtype=bool)
+    SE = np.full(4, .5)
+    result = Coach_allocateCoaches(hasCoach, SE, SE, 2, np.zeros(4), \
+        np.zeros(4), 'order', np.random.default_rng(0))
+    assert result.tolist() == [True, True, False, False]
+
+def test_neediestKeepsCloseSEInOrder():
+    candidates = np.ones(3, dtype=bool)
+    # Differ by less than any random jitter on the SE could preserve
+    SE = np.array([.5 + 2e-10, .5, .5 + 1e-10])
+    for seed in range(0, 20):
+        rng = np.random.default_rng(seed)
+        granted = Coach_allocateNeediest(candidates, 2, SE, rng)
+        assert granted.tolist() == [False, True, True]
+
+def test_neediestBreaksTiesAtRandom():
+    candidates = np.ones(2, dtype=bool)
+    SE = np.full(2, .5)
+    granted = set()
+    for seed in range(0, 20):
+        rng = np.random.default_rng(seed)
+        granted.add(tuple(Coach_allocateNeediest(candidates, 1, SE, \
+            rng).tolist()))
+    assert granted == set([(True, False), (False, True)])
+
+def test_policiesRespectCapacityPerReplicate():
+    rng = np.random.default_rng(1)
+    hasCoach = rng.random((5, 40)) < .2
+    SE = rng.random((5, 40))
+    for policy in Coach_allocationPolicies:
+        result = Coach_allocateCoaches(hasCoach, SE, SE, 10, \
+            rng.random((5, 40)), rng.random((5, 40)), policy, rng)
+        assert np.all(result.sum(axis=-1) <= \
+            np.maximum(10, hasCoach.sum(axis=-1))), policy
@@ -0,0 +1,74 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_convergence.py                                         #
+# Description: Checks when the convergence monitor declares steady  #
+# state and that streamline runs stop (or not) accordingly          #
+#####################################################################
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel
+from ConvergenceMonitor import ConvergenceMonitor
+
+#####################################################################
+# Returns a small seeded model                                      #
+#####################################################################
+def createModel(seed):
+    return SEModel(networkType='SW', timeSpan=2, numAgents=60, \
+        numCoaches=6, seed=seed)
+
+def test_observeWaitsForWindowAndMinTicks():
+    monitor = ConvergenceMonitor(window = 3, tolerance = .01, \
+        minTicks = 4)
+    stats = [.5, .1, 50.0, 10.0]
+    converged = [monitor.ConvergenceMonitor_observe(tick, stats) \
+        for tick in range(0, 6)]
+    assert converged == [False, False, False, False, True, True]
+    assert monitor.convergedTick == 4
+
+def test_observeRejectsDrift():
+    monitor = ConvergenceMonitor(window = 3, tolerance = .01)
+    for tick in range(0, 10):
+        stats = [.5 + .02 * tick, .1, 50.0, 10.0]
+        assert not monitor.ConvergenceMonitor_observe(tick, stats)
+    assert monitor.convergedTick is None
+
+def test_runStopsAtSteadyState():
+    model = createModel(1)
+    monitor = ConvergenceMonitor(window = 5, tolerance = .05)
+    model.SEModel_runStreamlineSimulation(True, monitor = monitor)
+    assert model.convergedTick == monitor.convergedTick
+    assert model.tick == model.convergedTick + 1 < 52
+
+def test_unsettledRunIsFlagged():
+    model = createModel(1)
+    monitor = ConvergenceMonitor(window = 5, tolerance = 0.0)
+    model.SEModel_runStreamlineSimulation(True, monitor = monitor)
+    assert model.convergedTick is None
+    assert model.tick == 52
+
+def test_reusedMonitorMatchesFreshMonitor():
+    monitor = ConvergenceMonitor(window = 5, tolerance = .05)
+    createModel(1).SEModel_runStreamlineSimulation(True, \
+        monitor = monitor)
+
+    reused = createModel(2)
+    reused.SEModel_runStreamlineSimulation(True, monitor = monitor)
+    fresh = createModel(2)
+    fresh.SEModel_runStreamlineSimulation(True, \
+        monitor = ConvergenceMonitor(window = 5, tolerance = .05))
+    assert reused.tick == fresh.tick
+    assert reused.convergedTick == fresh.convergedTick
+
+def test_resumeRejectsConvergedMonitor():
+    model = createModel(1)
+    monitor = ConvergenceMonitor(window = 5, tolerance = .05)
+    model.SEModel_runStreamlineSimulation(True, monitor = monitor)
+    tick = model.tick
+    model.SEModel_runStreamlineSimulation(True, monitor = monitor, \
+        startTick = tick)
+    assert model.tick == tick
@@ -0,0 +1,84 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_ensemble.py                                            #
+# Description: Checks the ensemble of replicates run together in    #
+# arrays and its use by the sensitivity simulation                  #
+#####################################################################
+
+import sys
+import os
+from functools import partial
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel, SEModel_getArgumentParser, \
+    SEModel_runBatch
+from Agent import AgentFactory
+from SweepEngine import Sweep_expandSpec, Sweep_runTasks, \
+    Sweep_getTaskKey, Sweep_getTopologySeed
+from SensitivitySimulations import Sensitivity_runSimulation, \
+    Sensitivity_runTask
+
+#####################################################################
+# Returns a small seeded model of the given network type            #
+#####################################################################
+def createModel(networkType = 'SW', seed = 7):
+    return SEModel(networkType=networkType, timeSpan=1, numAgents=60, \
+        numCoaches=6, seed=seed)
+
+def test_seededEnsembleIsReproducible():
+    for networkType in ['ER', 'SW', 'ASF']:
+        results = createModel(networkType).SEModel_runEnsemble(4)
+        assert len(results) == 4
+        assert results == createModel(networkType).\
+            SEModel_runEnsemble(4)
+        # Each replicate draws its own initial state
+        assert len(set(tuple(result) for result in results)) == 4
+
+def test_ownTopologiesBuildNoAgents(monkeypatch):
+    model = createModel('ER')
+    createAgents = AgentFactory.AgentFactory_createAgents
+    calls = []
+    def countCalls(*args):
+        calls.append(True)
+        return createAgents(*args)
+    monkeypatch.setattr(AgentFactory, "AgentFactory_createAgents", \
+        staticmethod(countCalls))
+
+    results = model.SEModel_runEnsemble(3, shareTopology = False)
+    assert calls == []
+    assert len(results) == 3
+    assert results != createModel('ER').SEModel_runEnsemble(3)
+
+def test_invalidReplicateCount():
+    assert createModel().SEModel_runEnsemble(0) is None
+
+def test_sensitivityAveragesReplicates():
+    params = ['SW', 1, 60, 6, .005, .225, .025, .015]
+    result = Sensitivity_runSimulation(*params, seed = 3, \
+        topologySeed = 4, numReplicates = 5)
+    model = SEModel(.005, .225, .025, .015, 'SW', 1, 60, 6, 3, \
+        topologySeed = 4)
+    expected = np.mean(model.SEModel_runEnsemble(5), axis=0)
+    assert result == expected.tolist()
+
+def test_sweepRunsReplicates():
+    tasks, _ = Sweep_expandSpec({'base': {'networkType': 'SW', \
+        'timeSpan': 1, 'numAgents': 40, 'numCoaches': 4}, 'sweeps': \
+        [{'params': {'timeImpact': [0.0, .01]}}]})
+    runTask = partial(Sensitivity_runTask, numReplicates = 3)
+    table = Sweep_runTasks(tasks, runTask, seed = 5)
+    for task, row in zip(tasks, table):
+        expected = Sensitivity_runSimulation(*Sweep_getTaskKey(task), \
+            seed = int(row['seed']), topologySeed = \
+            Sweep_getTopologySeed(task, 5), numReplicates = 3)
+        assert [row['exercise'], row['SE']] == expected
+    assert not np.array_equal(table['SE'], Sweep_runTasks(tasks, \
+        Sensitivity_runTask, seed = 5)['SE'])
+
+def test_batchRejectsNoReplicates(tmp_path):
+    args = SEModel_getArgumentParser().parse_args(["--mode", "none", \
+        "--output-dir", str(tmp_path), "--replicates", "0"])
+    assert not SEModel_runBatch(args)
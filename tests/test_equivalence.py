@@ -0,0 +1,141 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_equivalence.py                                         #
+# Description: Seeded checks that the alternative ways of running   #
+# the simulation (array engine, incremental neighbor sums,          #
+# checkpoints, forks, partitions, shards and shared-state workers)  #
+# give the same results as the plain run they stand in for          #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel, SEModel_loadCheckpoint
+from SweepEngine import Sweep_expandSpec, Sweep_runTasks, \
+    Sweep_runShard, Sweep_mergePartials
+from SensitivitySimulations import Sensitivity_runTask
+
+networkTypes = ['ER', 'SW', 'ASF']
+
+#####################################################################
+# Returns a small seeded model of the given network type            #
+#####################################################################
+def createModel(networkType, seed = 7, numAgents = 120, timeSpan = 2):
+    return SEModel(networkType=networkType, timeSpan=timeSpan, \
+        numAgents=numAgents, numCoaches=12, seed=seed)
+
+#####################################################################
+# Returns the state of every agent of a model (see                  #
+# NetworkBase_getStates)                                            #
+#####################################################################
+def getStates(model):
+    return model.network.networkBase.NetworkBase_getStates()
+
+#####################################################################
+# Asserts that two states are identical, bit for bit                #
+#####################################################################
+def assertSameStates(states, expected):
+    assert sorted(states) == sorted(expected)
+    for name in expected:
+        assert np.array_equal(states[name], expected[name]), name
+
+# The array engine evaluates the decay with numpy, which may round the
+# last bit differently from the agents, so SE is compared to within
+# rounding there; everything discrete must match exactly
+@pytest.mark.parametrize("networkType", networkTypes)
+def test_vectorizedMatchesAgents(networkType):
+    agents = createModel(networkType)
+    agents.SEModel_runStreamlineSimulation()
+    vectorized = createModel(networkType)
+    vectorized.SEModel_runStreamlineSimulation(True)
+
+    expected = getStates(agents)
+    states = getStates(vectorized)
+    for name in expected:
+        if name in ['SE', 'oldSE']:
+            assert np.allclose(states[name], expected[name], \
+                rtol=1e-12, atol=0.0), name
+        else:
+            assert np.array_equal(states[name], expected[name]), name
+
+@pytest.mark.parametrize("networkType", networkTypes)
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_incrementalMatchesFull(networkType, vectorized):
+    full = createModel(networkType)
+    full.SEModel_runStreamlineSimulation(vectorized)
+    incremental = createModel(networkType)
+    incremental.SEModel_runStreamlineSimulation(vectorized, \
+        incremental = True)
+    assertSameStates(getStates(incremental), getStates(full))
+
+@pytest.mark.parametrize("networkType", networkTypes)
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_checkpointResumeMatches(networkType, vectorized, tmp_path):
+    path = str(tmp_path / "model.ckpt")
+    straight = createModel(networkType)
+    straight.SEModel_runStreamlineSimulation(vectorized)
+
+    interrupted = createModel(networkType)
+    interrupted.SEModel_runStreamlineSimulation(vectorized, \
+        endTick = 20)
+    interrupted.SEModel_saveCheckpoint(path, interrupted.tick)
+    resumed = SEModel_loadCheckpoint(path)
+    resumed.SEModel_runStreamlineSimulation(vectorized, \
+        startTick = resumed.tick)
+
+    assert resumed.tick == straight.tick
+    assertSameStates(getStates(resumed), getStates(straight))
+
+@pytest.mark.parametrize("networkType", networkTypes)
+def test_forkMatchesUnbranched(networkType):
+    straight = createModel(networkType)
+    straight.SEModel_runStreamlineSimulation(True)
+
+    branched = createModel(networkType)
+    forks = branched.SEModel_runScenarios(20, [{}, {'numCoaches': \
+        30}], True)
+    assertSameStates(getStates(forks[0]), getStates(straight))
+
+@pytest.mark.parametrize("networkType", networkTypes)
+def test_partitionedMatchesVectorized(networkType):
+    vectorized = createModel(networkType)
+    vectorized.SEModel_runStreamlineSimulation(True)
+    partitioned = createModel(networkType)
+    partitioned.SEModel_runPartitionedSimulation(3)
+    assertSameStates(getStates(partitioned), getStates(vectorized))
+
+def test_scenarioWorkersMatchInProcess():
+    scenarios = [{}, {'numCoaches': 30}, {'coachImpact': .3}]
+    inProcess = createModel('SW').SEModel_runScenarios(20, scenarios, \
+        True)
+    workers = createModel('SW').SEModel_runScenarios(20, scenarios, \
+        True, numWorkers = 2)
+    for fork, expected in zip(workers, inProcess):
+        assert fork.tick == expected.tick
+        assertSameStates(getStates(fork), getStates(expected))
+
+def test_shardMergeMatchesUnsharded(tmp_path):
+    spec = {'base': {'networkType': 'SW', 'timeSpan': 1, \
+        'numAgents': 40, 'numCoaches': 5}, 'sweeps': [
+        {'label': 'Time_Impact', 'params': {'timeImpact': [0.0, .005, \
+            .01]}},
+        {'label': 'Networks', 'params': {'networkType': networkTypes}}]}
+    expanded = Sweep_expandSpec(spec)
+    tasks, sweeps = expanded
+    unsharded = Sweep_runTasks(tasks, Sensitivity_runTask, seed = 3)
+
+    paths = []
+    for shardIndex in range(0, 2):
+        path = str(tmp_path / "shard{}.json".format(shardIndex))
+        Sweep_runShard(expanded, Sensitivity_runTask, (shardIndex, 2), \
+            seed = 3, partialFile = path)
+        paths.append(path)
+    merged, mergedSweeps = Sweep_mergePartials(paths)
+
+    assert np.array_equal(merged, unsharded)
+    assert mergedSweeps == sweeps
@@ -0,0 +1,47 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_frames.py                                              #
+# Description: Checks that frames of the network are saved under    #
+# the output directory, whether or not they are also displayed      #
+#####################################################################
+
+import sys
+import os
+import matplotlib
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+import matplotlib.pyplot as plt
+from SESimulation import SEModel
+from NetworkBase import NetworkBase_importNetworkx
+
+#####################################################################
+# Returns the network base of a small seeded model and a layout of  #
+# its nodes                                                         #
+#####################################################################
+def createNetwork():
+    model = SEModel(networkType='SW', timeSpan=1, numAgents=30, \
+        numCoaches=3, seed=7)
+    networkBase = model.network.networkBase
+    nx = NetworkBase_importNetworkx()
+    pos = nx.random_layout(networkBase.NetworkBase_getGraph())
+    return networkBase, pos
+
+def test_savedFrameCreatesDirectory(tmp_path):
+    networkBase, pos = createNetwork()
+    outputDir = str(tmp_path / "out")
+    networkBase.NetworkBase_visualizeNetwork(False, 0, pos, \
+        outputDir = outputDir)
+    assert os.path.isfile(os.path.join(outputDir, "TimeResults", \
+        "timestep0.png"))
+
+def test_shownFrameCreatesDirectory(tmp_path, monkeypatch):
+    monkeypatch.setattr(plt, "show", lambda: None)
+    networkBase, pos = createNetwork()
+    outputDir = str(tmp_path / "out")
+    networkBase.NetworkBase_visualizeNetwork(True, 3, pos, \
+        outputDir = outputDir)
+    assert os.path.isfile(os.path.join(outputDir, "TimeResults", \
+        "timestep3.png"))
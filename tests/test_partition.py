@@ -0,0 +1,72 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_partition.py                                           #
+# Description: Checks that partitioned runs release their workers   #
+# and shared memory, whether they finish or a worker dies           #
+#####################################################################
+
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel
+from PartitionedSimulation import PartitionedSimulation
+
+#####################################################################
+# Returns the names of the shared memory blocks of a partitioned    #
+# simulation                                                        #
+#####################################################################
+def getBlockNames(simulation):
+    return [block.name for state in [simulation.state, \
+        simulation.topology] for block in state.blocks.values()]
+
+#####################################################################
+# Returns whether a shared memory block of the given name exists    #
+#####################################################################
+def blockExists(name):
+    from multiprocessing import shared_memory
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+#####################################################################
+# Returns a small seeded model                                      #
+#####################################################################
+def createModel():
+    return SEModel(networkType='SW', timeSpan=1, numAgents=60, \
+        numCoaches=6, seed=7)
+
+def test_closeReleasesSharedMemory():
+    model = createModel()
+    simulation = PartitionedSimulation(model.network.networkBase, 2)
+    names = getBlockNames(simulation)
+    simulation.PartitionedSimulation_timeStep(0)
+    simulation.PartitionedSimulation_close()
+    assert not any(blockExists(name) for name in names)
+
+def test_deadWorkerReleasesSharedMemory(monkeypatch):
+    names = []
+    timeStep = PartitionedSimulation.PartitionedSimulation_timeStep
+
+    # Kills a worker a few ticks into the run
+    def killWorker(simulation, time, *args):
+        if not names:
+            names.extend(getBlockNames(simulation))
+        if time == 3:
+            simulation.workers[0].kill()
+            simulation.workers[0].join()
+        return timeStep(simulation, time, *args)
+    monkeypatch.setattr(PartitionedSimulation, \
+        "PartitionedSimulation_timeStep", killWorker)
+
+    model = createModel()
+    with pytest.raises((OSError, EOFError)):
+        model.SEModel_runPartitionedSimulation(2)
+    assert model.tick == 3
+    assert names
+    assert not any(blockExists(name) for name in names)
@@ -0,0 +1,72 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_profiler.py                                            #
+# Description: Checks the phases the profiler times on the object   #
+# and array engine paths and the shares it reports for them         #
+#####################################################################
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel
+from Profiler import Profiler
+from Agent import Agent
+
+#####################################################################
+# Returns the summary of a profiled streamline run of a small       #
+# seeded model                                                      #
+#####################################################################
+def profileRun(vectorized):
+    model = SEModel(networkType='SW', timeSpan=1, numAgents=60, \
+        numCoaches=6, seed=7)
+    profiler = Profiler()
+    model.SEModel_setProfiler(profiler)
+    model.SEModel_runStreamlineSimulation(vectorized)
+    return profiler.Profiler_getSummary()
+
+def test_pathsTimeSamePhases():
+    agents = profileRun(False)
+    vectorized = profileRun(True)
+    assert sorted(agents['phases']) == sorted(vectorized['phases'])
+    for name in ['decay', 'coaching', 'past', 'social', 'levels', \
+            'coaches', 'popStats', 'neighbors']:
+        assert agents['phases'][name]['calls'] == 26, name
+
+def test_sharesWithinTicks():
+    for vectorized in [False, True]:
+        summary = profileRun(vectorized)
+        shares = [phase['share'] for phase in \
+            summary['phases'].values()]
+        assert None not in shares
+        assert sum(shares) <= 1.0
+
+def test_phaseOutsideTicksHasNoShare():
+    profiler = Profiler()
+    profiler.Profiler_start('setup')
+    profiler.Profiler_stop('setup')
+    profiler.Profiler_startTick(0)
+    profiler.Profiler_start('update')
+    profiler.Profiler_stop('update')
+    profiler.Profiler_endTick()
+    phases = profiler.Profiler_getSummary()['phases']
+    assert phases['setup']['share'] is None
+    assert 0.0 <= phases['update']['share'] <= 1.0
+
+def test_levelsTimesExerciseLevels(monkeypatch):
+    model = SEModel(networkType='SW', timeSpan=1, numAgents=30, \
+        numCoaches=3, seed=7)
+    profiler = Profiler()
+    model.SEModel_setProfiler(profiler)
+    phases = set()
+    updateLevels = Agent.Agent_updateExerciseLevels
+
+    def recordPhase(agent):
+        phases.update(profiler.started)
+        updateLevels(agent)
+    monkeypatch.setattr(Agent, "Agent_updateExerciseLevels", \
+        recordPhase)
+    model.SEModel_runStreamlineSimulation()
+    assert phases == set(['levels'])
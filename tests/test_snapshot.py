@@ -0,0 +1,96 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_snapshot.py                                            #
+# Description: Checks that snapshot files and the CSV results made  #
+# from them read back exactly what was written                      #
+#####################################################################
+
+import sys
+import os
+import csv
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+import SnapshotWriter as snapshotModule
+from SnapshotWriter import SnapshotWriter, Snapshot_read, \
+    Snapshot_toCSV, Snapshot_columns
+from SESimulation import SEModel
+
+#####################################################################
+# Returns the columns of a snapshot of agentCount seeded agents     #
+#####################################################################
+def createColumns(agentCount, seed):
+    rng = np.random.default_rng(seed)
+    SE = rng.random(agentCount)
+    return {'agent_id': np.arange(agentCount), 'has_coach': \
+        rng.random(agentCount) < .5, 'lowLevel': (10 * SE).astype(int), \
+        'medLevel': (10 * SE ** 2).astype(int), 'highLevel': \
+        (10 * SE ** 3).astype(int), 'exercise_pts': \
+        rng.integers(0, 101, agentCount), 'SE': SE}
+
+#####################################################################
+# Writes snapshots at the given times to path, returning the        #
+# columns written at each                                           #
+#####################################################################
+def writeSnapshots(path, times, compress = True, chunkRows = 7):
+    writer = SnapshotWriter(path, compress, chunkRows)
+    written = []
+    for time in times:
+        columns = createColumns(5, time)
+        writer.SnapshotWriter_write(time, columns)
+        written.append(columns)
+    writer.SnapshotWriter_close()
+    return written
+
+def test_snapshotRoundTrip(tmp_path):
+    for compress in [True, False]:
+        path = str(tmp_path / "results.snap")
+        written = writeSnapshots(path, [0, 10, 20], compress)
+        rows = Snapshot_read(path)
+        assert rows['time'].tolist() == [0] * 5 + [10] * 5 + [20] * 5
+        assert rows['SE'].dtype == np.float64
+        for name, _ in Snapshot_columns[1:]:
+            expected = np.concatenate([columns[name] for columns in \
+                written])
+            assert np.array_equal(rows[name], expected), name
+
+def test_csvKeepsFullPrecision(tmp_path):
+    path = str(tmp_path / "results.snap")
+    csvPath = str(tmp_path / "results.csv")
+    written = writeSnapshots(path, [0, 10])
+    Snapshot_toCSV(path, csvPath)
+    with open(csvPath) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == [name for name, _ in Snapshot_columns]
+    assert [float(row[-1]) for row in rows[1:]] == np.concatenate(\
+        [columns['SE'] for columns in written]).tolist()
+    assert [int(row[0]) for row in rows[1:]] == [0] * 5 + [10] * 5
+
+def test_float32SnapshotsStillRead(tmp_path, monkeypatch):
+    columns = [(name, np.float32 if name == 'SE' else dtype) for \
+        name, dtype in Snapshot_columns]
+    monkeypatch.setattr(snapshotModule, "Snapshot_columns", columns)
+    path = str(tmp_path / "results.snap")
+    written = writeSnapshots(path, [0])
+    monkeypatch.undo()
+
+    rows = Snapshot_read(path)
+    assert rows['SE'].dtype == np.float32
+    assert np.array_equal(rows['SE'], written[0]['SE']\
+        .astype(np.float32))
+
+def test_finalStateMatchesModel(tmp_path):
+    model = SEModel(networkType='SW', timeSpan=1, numAgents=30, \
+        numCoaches=3, seed=7)
+    model.SEModel_runStreamlineSimulation()
+    csvPath = str(tmp_path / "results.csv")
+    model.SEModel_writeFinalState(csvPath)
+    with open(csvPath) as f:
+        rows = list(csv.DictReader(f))
+    snapshot = model.SEModel_getSnapshot()
+    assert [float(row['SE']) for row in rows] == snapshot['SE']
+    assert [int(row['agent_id']) for row in rows] == \
+        snapshot['agent_id']
+    assert not os.path.exists(csvPath + ".snap")
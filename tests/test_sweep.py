@@ -0,0 +1,128 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_sweep.py                                               #
+# Description: Checks how sweep specifications expand into tasks,   #
+# which specs are rejected and how seeded tasks are run and merged  #
+#####################################################################
+
+import sys
+import os
+import random
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SweepEngine import Sweep_expandSpec, Sweep_runTasks, \
+    Sweep_runShard, Sweep_mergePartials, Sweep_defaults
+
+#####################################################################
+# Stands in for a simulation: returns draws from the global random  #
+# generators, so results show how the task was seeded               #
+#####################################################################
+def drawTask(task):
+    return [random.random(), np.random.random()]
+
+#####################################################################
+# Returns a spec of the given sweeps over a small base              #
+#####################################################################
+def createSpec(sweeps, seed = 0):
+    return {'base': {'networkType': 'SW', 'numAgents': 40}, \
+        'seed': seed, 'sweeps': sweeps}
+
+def test_listAndGridSweeps():
+    tasks, sweeps = Sweep_expandSpec(createSpec([
+        {'label': 'List', 'params': {'timeImpact': [0.0, .01], \
+            'numCoaches': [5, 6]}},
+        {'label': 'Grid', 'kind': 'grid', 'params': {'timeImpact': \
+            (0.0, .01, 3), 'networkType': ['ER', 'SW']}}]))
+    listTasks = [tasks[i] for i in sweeps[0][2]]
+    assert [(task['timeImpact'], task['numCoaches']) for task in \
+        listTasks] == [(0.0, 5), (.01, 6)]
+    gridTasks = [tasks[i] for i in sweeps[1][2]]
+    assert [(task['timeImpact'], task['networkType']) for task in \
+        gridTasks] == [(0.0, 'ER'), (0.0, 'SW'), (.005, 'ER'), \
+        (.005, 'SW'), (.01, 'ER'), (.01, 'SW')]
+    assert sweeps[1][1] == ['timeImpact', 'networkType']
+
+def test_sharedPointsAreDeduplicated():
+    tasks, sweeps = Sweep_expandSpec(createSpec([
+        {'params': {'timeImpact': [0.0, .005]}},
+        {'params': {'coachImpact': [.225, .3]}}]))
+    # The base point (timeImpact .005, coachImpact .225) is shared
+    assert len(tasks) == 3
+    assert sweeps[0][2][1] == sweeps[1][2][0]
+
+def test_missingBaseTakesDefaults():
+    tasks, _ = Sweep_expandSpec(createSpec([{'params': \
+        {'timeImpact': [0.0]}}]))
+    for name in ['timeSpan', 'numCoaches', 'coachImpact', \
+            'pastImpact', 'socialImpact']:
+        assert tasks[0][name] == Sweep_defaults[name]
+    assert tasks[0]['numAgents'] == 40
+
+def test_randomAndLatinSweeps():
+    spec = createSpec([
+        {'kind': 'random', 'samples': 8, 'params': {'socialImpact': \
+            (0.0, .05), 'networkType': ['ER', 'SW']}},
+        {'kind': 'latin', 'samples': 10, 'params': {'pastImpact': \
+            (0.0, 1.0)}}])
+    tasks, sweeps = Sweep_expandSpec(spec)
+    assert Sweep_expandSpec(spec) == (tasks, sweeps)
+    assert len(sweeps[0][2]) == 8
+    for i in sweeps[0][2]:
+        assert 0.0 <= tasks[i]['socialImpact'] < .05
+        assert tasks[i]['networkType'] in ['ER', 'SW']
+
+    # One sample falls in each tenth of the range
+    levels = [tasks[i]['pastImpact'] for i in sweeps[1][2]]
+    assert sorted(int(level * 10) for level in levels) == \
+        list(range(0, 10))
+    assert Sweep_expandSpec(createSpec(spec['sweeps'], 1)) != \
+        (tasks, sweeps)
+
+def test_invalidSpecsAreRejected(capsys):
+    invalid = [
+        [{'params': {'unknown': [1]}}],
+        [{'params': {}}],
+        [{'kind': 'random', 'params': {'timeImpact': (0.0, .01)}}],
+        [{'kind': 'latin', 'samples': 0, 'params': {'timeImpact': \
+            (0.0, .01)}}],
+        [{'params': {'timeImpact': [0.0, .01], 'numCoaches': [5]}}],
+        [{'kind': 'spiral', 'params': {'timeImpact': [0.0]}}]]
+    for sweeps in invalid:
+        assert Sweep_expandSpec(createSpec(sweeps)) is None
+        assert capsys.readouterr().err.endswith("\n")
+    assert Sweep_expandSpec({'base': {'unknown': 1}, 'sweeps': []}) \
+        is None
+    assert Sweep_expandSpec([]) is None
+
+def test_seededTasksLeaveGlobalStateAlone():
+    tasks, _ = Sweep_expandSpec(createSpec([{'params': \
+        {'timeImpact': [0.0, .005, .01]}}]))
+    random.seed(11)
+    np.random.seed(11)
+    expected = (random.random(), np.random.random())
+
+    random.seed(11)
+    np.random.seed(11)
+    first = Sweep_runTasks(tasks, drawTask, seed = 3)
+    assert (random.random(), np.random.random()) == expected
+    assert np.array_equal(Sweep_runTasks(tasks[::-1], drawTask, \
+        seed = 3), first[::-1])
+
+def test_mergeRejectsMismatchedShards(tmp_path, capsys):
+    expanded = Sweep_expandSpec(createSpec([{'params': \
+        {'timeImpact': [0.0, .005, .01]}}]))
+    paths = [str(tmp_path / "shard{}.json".format(i)) for i in \
+        range(0, 3)]
+    for i, seed in enumerate([3, 3, 4]):
+        Sweep_runShard(expanded, drawTask, (i % 2, 2), seed = seed, \
+            partialFile = paths[i])
+
+    table, _ = Sweep_mergePartials(paths[:2])
+    assert np.array_equal(table, Sweep_runTasks(expanded[0], \
+        drawTask, seed = 3))
+    for partials in [paths[:1], [paths[0], paths[2]], paths]:
+        assert Sweep_mergePartials(partials) is None
+        assert capsys.readouterr().err.endswith("\n")
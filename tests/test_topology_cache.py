@@ -0,0 +1,97 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_topology_cache.py                                      #
+# Description: Checks that the topology cache serves the networks   #
+# it stored, regenerates those it cannot read and that models built #
+# through it match those generated directly                         #
+#####################################################################
+
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+import TopologyCache as topologyCacheModule
+from TopologyCache import TopologyCache
+from SESimulation import SEModel, SEModel_getArgumentParser, \
+    SEModel_runBatch
+
+edges = [(0, 1), (1, 2), (2, 3)]
+
+#####################################################################
+# Returns the edges of a cache lookup for a fixed network, along    #
+# with whether they had to be generated                             #
+#####################################################################
+def getEdges(cache):
+    generated = []
+    def generate():
+        generated.append(True)
+        return edges
+    result = cache.TopologyCache_getEdges("SW", 4, (10, 0.0), 3, \
+        generate)
+    return result, bool(generated)
+
+def test_missThenHit(tmp_path):
+    cache = TopologyCache(str(tmp_path))
+    first, generated = getEdges(cache)
+    assert generated
+    second, generated = getEdges(cache)
+    assert not generated
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert np.array_equal(first, second)
+    assert second.tolist() == [list(edge) for edge in edges]
+
+def test_versionChangeMisses(tmp_path, monkeypatch):
+    cache = TopologyCache(str(tmp_path))
+    getEdges(cache)
+    monkeypatch.setattr(topologyCacheModule, "TopologyCache_version", \
+        topologyCacheModule.TopologyCache_version + 1)
+    assert getEdges(cache)[1]
+
+def test_unreadableFilesRegenerate(tmp_path):
+    cache = TopologyCache(str(tmp_path))
+    path = cache.TopologyCache_getPath("SW", 4, (10, 0.0), 3)
+    getEdges(cache)
+    with open(path, 'rb') as f:
+        contents = f.read()
+
+    # A truncated file, one that is not an array and an array of the
+    # wrong shape
+    for corrupt in [contents[:len(contents) // 2], b"PK\x03\x04", \
+            None]:
+        if corrupt is None:
+            np.save(path, np.arange(5))
+        else:
+            with open(path, 'wb') as f:
+                f.write(corrupt)
+        result, generated = getEdges(cache)
+        assert generated
+        assert result.tolist() == [list(edge) for edge in edges]
+    assert not getEdges(cache)[1]
+
+def test_cachedModelMatchesGenerated(tmp_path):
+    for networkType in ['ER', 'SW', 'ASF']:
+        cache = TopologyCache(str(tmp_path))
+        direct = SEModel(networkType=networkType, numAgents=60, \
+            numCoaches=6, seed=7)
+        stored = SEModel(networkType=networkType, numAgents=60, \
+            numCoaches=6, seed=7, topologyCache=cache)
+        loaded = SEModel(networkType=networkType, numAgents=60, \
+            numCoaches=6, seed=7, topologyCache=cache)
+        assert (cache.hits, cache.misses) == (1, 1)
+        expected = direct.network.networkBase.NetworkBase_getAdjacency()
+        for model in [stored, loaded]:
+            adjacency = model.network.networkBase.\
+                NetworkBase_getAdjacency()
+            for array, expectedArray in zip(adjacency, expected):
+                assert np.array_equal(array, expectedArray), networkType
+
+def test_cacheWithoutSeedWarns(tmp_path, capsys):
+    args = SEModel_getArgumentParser().parse_args(["--num-agents", \
+        "30", "--num-coaches", "3", "--time-span", "1", "--mode", \
+        "none", "--output-dir", str(tmp_path / "out"), "--cache-dir", \
+        str(tmp_path / "cache")])
+    assert SEModel_runBatch(args)
+    assert "--cache-dir is ignored" in capsys.readouterr().err
@@ -0,0 +1,99 @@
+#####################################################################
+# Name: Yash Patel                                                  #
+# File: test_trajectory.py                                          #
+# Description: Checks that trajectories read back what was recorded #
+# (at full precision, from the tick the run started at) and that    #
+# runs cut short or looked up by unknown agents are handled         #
+#####################################################################
+
+import sys
+import os
+import json
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(\
+    __file__))))
+
+from SESimulation import SEModel, SEModel_loadCheckpoint
+from TrajectoryStore import TrajectoryStore, TrajectoryReader
+
+#####################################################################
+# Returns a small seeded model                                      #
+#####################################################################
+def createModel():
+    return SEModel(networkType='SW', timeSpan=1, numAgents=40, \
+        numCoaches=4, seed=7)
+
+def test_recordedRunReadsBack(tmp_path):
+    directory = str(tmp_path / "trajectory")
+    model = createModel()
+    model.SEModel_runStreamlineSimulation(True, trajectoryDir = \
+        directory)
+    states = model.network.networkBase.NetworkBase_getStates()
+
+    reader = TrajectoryReader(directory)
+    assert reader.startTick == 0
+    assert reader.tickCount == 27
+    final = reader.TrajectoryReader_getTick(26)
+    assert final['SE'].dtype == np.float64
+    assert np.array_equal(final['SE'], states['SE'])
+    assert np.array_equal(final['has_coach'], states['hasCoach'])
+
+    agentID = int(reader.agentIDs[5])
+    history = reader.TrajectoryReader_getAgentHistory(agentID)
+    window = reader.TrajectoryReader_getWindow(10, 15, [agentID])
+    assert np.array_equal(window['SE'][:, 0], history['SE'][10:15])
+
+def test_resumedRunKeepsTicks(tmp_path):
+    straightDir = str(tmp_path / "straight")
+    straight = createModel()
+    straight.SEModel_runStreamlineSimulation(True, trajectoryDir = \
+        straightDir)
+
+    path = str(tmp_path / "model.ckpt")
+    interrupted = createModel()
+    interrupted.SEModel_runStreamlineSimulation(True, endTick = 20)
+    interrupted.SEModel_saveCheckpoint(path, interrupted.tick)
+    resumedDir = str(tmp_path / "resumed")
+    resumed = SEModel_loadCheckpoint(path)
+    resumed.SEModel_runStreamlineSimulation(True, trajectoryDir = \
+        resumedDir, startTick = resumed.tick)
+
+    expected = TrajectoryReader(straightDir)
+    reader = TrajectoryReader(resumedDir)
+    assert reader.startTick == 20
+    assert reader.tickCount == 7
+    assert reader.TrajectoryReader_getTick(19) is None
+    for tick in range(20, 27):
+        ticks = reader.TrajectoryReader_getTick(tick)
+        expectedTicks = expected.TrajectoryReader_getTick(tick)
+        for name in ticks:
+            assert np.array_equal(ticks[name], expectedTicks[name])
+    window = reader.TrajectoryReader_getWindow(0, 22)
+    assert np.array_equal(window['SE'], expected.\
+        TrajectoryReader_getWindow(20, 22)['SE'])
+
+def test_unclosedStoreReadsRecordedTicks(tmp_path):
+    directory = str(tmp_path)
+    store = TrajectoryStore(directory, 5, [3, 1, 2])
+    store.TrajectoryStore_record([.1, .2, .3], [1, 2, 3], [0, 1, 0])
+    store.TrajectoryStore_record([.4, .5, .6], [4, 5, 6], [1, 0, 0])
+    with open(os.path.join(directory, "header.json")) as f:
+        assert json.load(f) == {'numTicks': 5, 'startTick': 0}
+
+    reader = TrajectoryReader(directory)
+    assert reader.tickCount == 2
+    assert reader.TrajectoryReader_getAgentHistory(1)['SE'].tolist() \
+        == [.2, .5]
+
+def test_unknownAgentReturnsNone(tmp_path):
+    directory = str(tmp_path)
+    store = TrajectoryStore(directory, 2, [3, 1, 2])
+    store.TrajectoryStore_record([.1, .2, .3], [1, 2, 3], [0, 1, 0])
+    store.TrajectoryStore_close()
+
+    reader = TrajectoryReader(directory)
+    assert reader.TrajectoryReader_getAgentHistory(7) is None
+    assert reader.TrajectoryReader_getWindow(0, 1, [1, 7]) is None
+    assert reader.TrajectoryReader_getWindow(0, 1, [2])['SE']\
+        .tolist() == [[.3]]